@@ -1,7 +1,3 @@
-import hashlib
-import json
-
-from csvexport.actions import csvexport
 from django.contrib import admin
 from django.db.models import Q
 from django.shortcuts import render
@@ -9,8 +5,10 @@ from ordered_model.admin import OrderedModelAdmin
 
 from campaigns.models import Campaign, Petition, PetitionCheckbox, PetitionSignature
 from campaigns.tasks import geocode_signature
+from facets.heatmap import build_heatmap, encode_heatmap
 from facets.models import District, RegisteredCommunityOrganization
 from pbaabp.admin import ReadOnlyLeafletGeoAdminMixin, organizer_admin
+from pbaabp.exports import CSVExport, export_action, register_export
 
 
 class CampaignAdmin(OrderedModelAdmin):
@@ -98,7 +96,7 @@ class PetitionCheckboxInline(admin.TabularInline):
 
 class PetitionAdmin(admin.ModelAdmin):
     actions = [pretty_report]
-    readonly_fields = ["petition_report"]
+    readonly_fields = ["signer_count", "comment_count", "petition_report"]
     inlines = [PetitionCheckboxInline]
 
     def petition_report(self, obj):
@@ -152,23 +150,49 @@ def geocode(modeladmin, request, queryset):
             geocode_signature.delay(obj.id)
 
 
-def randomize_lat_long(salt, lat, long):
-    hash = hashlib.sha256(f"{salt}-{lat}-{long}".encode())
-    smear_int = int.from_bytes(hash.digest(), "big")
-    x_smear = (((smear_int % 2179) / 2179) - 0.5) * 0.000287
-    y_smear = (((smear_int % 2803) / 2803) - 0.5) * 0.000358
-    return (lat + x_smear, long + y_smear)
+def heatmap(modeladmin, request, queryset):
+    pins = encode_heatmap(build_heatmap(queryset, salt="petition_id"))
+    return render(request, "petition/heatmap.html", {"pins": pins})
 
 
-def heatmap(modeladmin, request, queryset):
-    pins = []
-    for signature in queryset:
-        if signature.location:
-            lat, lng = randomize_lat_long(
-                signature.petition.id, signature.location.y, signature.location.x
-            )
-            pins.append([lat, lng, 1])
-    return render(request, "petition/heatmap.html", {"pins_json": json.dumps(pins)})
+@register_export
+class PetitionSignatureExport(CSVExport):
+    name = "petition-signatures"
+    model = PetitionSignature
+    fields = [
+        "first_name",
+        "last_name",
+        "email",
+        "postal_address_line_1",
+        "postal_address_line_2",
+        "city",
+        "state",
+        "zip_code",
+        "comment",
+        "petition.title",
+        "checkbox_responses",
+    ]
+
+    def prepare(self, queryset):
+        return queryset.select_related("petition")
+
+    def row(self, obj):
+        return [
+            obj.first_name,
+            obj.last_name,
+            obj.email,
+            obj.postal_address_line_1,
+            obj.postal_address_line_2,
+            obj.city,
+            obj.state,
+            obj.zip_code,
+            obj.comment,
+            obj.petition.title,
+            obj.checkbox_responses_formatted,
+        ]
+
+
+export_signatures = export_action(PetitionSignatureExport)
 
 
 class DistrictFilter(admin.SimpleListFilter):
@@ -220,7 +244,7 @@ class CheckboxResponseFilter(admin.SimpleListFilter):
 
 
 class PetitionSignatureAdmin(admin.ModelAdmin, ReadOnlyLeafletGeoAdminMixin):
-    actions = [csvexport, geocode, heatmap]
+    actions = [export_signatures, geocode, heatmap]
     list_display = [
         "get_name",
         "email",
@@ -259,20 +283,6 @@ class PetitionSignatureAdmin(admin.ModelAdmin, ReadOnlyLeafletGeoAdminMixin):
 
     checkbox_responses_display.short_description = "Checkbox Responses"
 
-    csvexport_selected_fields = [
-        "first_name",
-        "last_name",
-        "email",
-        "postal_address_line_1",
-        "postal_address_line_2",
-        "city",
-        "state",
-        "zip_code",
-        "comment",
-        "petition.title",
-        "checkbox_responses",
-    ]
-
     def get_name(self, obj):
         return f"{obj.first_name} {obj.last_name}"
 
@@ -0,0 +1,108 @@
+from django.db import connection, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Lower
+
+from campaigns.models import Petition, PetitionSignature, PetitionSigner
+
+# Signature fields the counters depend on, in the order count_signature takes them
+COUNTED_FIELDS = ("visible", "email", "comment")
+
+
+def signer_key(email):
+    """The email a signer is counted under: signatures differing only in case are one signer."""
+    return (email or "").lower()
+
+
+def count_signature(petition_id, email, comment, delta):
+    """
+    Add (``delta=1``) or remove (``delta=-1``) one visible signature from its
+    petition's signer and comment counters. Call inside the transaction that
+    saves or deletes the signature.
+
+    Returns True if adding found the email already signed up on the petition,
+    i.e. the signature is a duplicate; counting the signer detects it.
+    """
+    table = PetitionSigner._meta.db_table
+    key = signer_key(email)
+    signers = 0
+    duplicate = False
+    if key:
+        with connection.cursor() as cursor:
+            row = None
+            if delta > 0:
+                # Only returns a row when the email hasn't signed the petition before
+                cursor.execute(
+                    f"INSERT INTO {table} (petition_id, email, visible_signatures) "
+                    "VALUES (%s, %s, 1) ON CONFLICT (petition_id, email) DO NOTHING "
+                    "RETURNING visible_signatures",
+                    [petition_id, key],
+                )
+                row = cursor.fetchone()
+                duplicate = row is None
+            if row is None:
+                # An update rather than an upsert when removing, so deleting a
+                # petition (and its signers) along with its signatures doesn't
+                # recreate signer rows
+                cursor.execute(
+                    f"UPDATE {table} SET visible_signatures = visible_signatures + %s "
+                    "WHERE petition_id = %s AND email = %s RETURNING visible_signatures",
+                    [delta, petition_id, key],
+                )
+                row = cursor.fetchone()
+        # A signer appears with their first visible signature and goes with their last
+        if row is not None and row[0] == (1 if delta > 0 else 0):
+            signers = delta
+
+    comments = delta if comment else 0
+    if signers or comments:
+        Petition.objects.filter(pk=petition_id).update(
+            signer_count=F("signer_count") + signers, comment_count=F("comment_count") + comments
+        )
+    return duplicate
+
+
+def repair_petition_counters(petitions=None):
+    """
+    Recompute signers and counters from the signatures of ``petitions`` (a
+    Petition queryset, all petitions by default). Returns the number repaired.
+    """
+    if petitions is None:
+        petitions = Petition.objects.all()
+    with transaction.atomic():
+        # Lock the petitions so signatures counted meanwhile wait for the repair
+        petition_ids = list(petitions.select_for_update().values_list("pk", flat=True))
+        visible = PetitionSignature.objects.filter(petition__in=petition_ids, visible=True)
+
+        PetitionSigner.objects.filter(petition__in=petition_ids).delete()
+        PetitionSigner.objects.bulk_create(
+            (
+                PetitionSigner(
+                    petition_id=row["petition_id"],
+                    email=row["key"],
+                    visible_signatures=row["visible_signatures"],
+                )
+                for row in visible.exclude(Q(email__isnull=True) | Q(email=""))
+                .values("petition_id", key=Lower("email"))
+                .annotate(visible_signatures=Count("pk"))
+                .order_by()
+            ),
+            batch_size=1000,
+        )
+
+        signers = (
+            PetitionSigner.objects.filter(petition=OuterRef("pk"))
+            .values("petition")
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+        comments = (
+            visible.filter(petition=OuterRef("pk"))
+            .exclude(Q(comment__isnull=True) | Q(comment=""))
+            .values("petition")
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+        return Petition.objects.filter(pk__in=petition_ids).update(
+            signer_count=Coalesce(Subquery(signers), Value(0)),
+            comment_count=Coalesce(Subquery(comments), Value(0)),
+        )
@@ -0,0 +1,149 @@
+"""
+Live petition signature feed.
+
+New signatures are rendered once, when they're committed, and published on a
+Redis pub/sub channel per petition. Each web process holds a single Redis
+subscription and fans messages out to the Server-Sent-Events streams open on
+it, so viewers wait on a queue instead of polling the database.
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+import redis.asyncio as aioredis
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "petition-signatures:"
+
+# Messages a slow stream may fall behind by before it starts missing them
+STREAM_QUEUE_SIZE = 100
+
+# Seconds between keepalive comments on idle streams, under the proxy read timeout
+KEEPALIVE_INTERVAL = 15
+
+
+def channel_name(petition_id):
+    return f"{CHANNEL_PREFIX}{petition_id}"
+
+
+def _version_key(petition_id):
+    return f"petition-signatures-version:{petition_id}"
+
+
+def feed_version(petition_id):
+    """Changes whenever the petition's signatures or counts change, for polling ETags."""
+    return cache.get_or_set(_version_key(petition_id), uuid.uuid4().hex, timeout=None)
+
+
+def publish(petition_id, event, data):
+    """Send an event to every stream open on the petition, in every process."""
+    get_redis_connection("default").publish(
+        channel_name(petition_id), json.dumps({"event": event, "data": data})
+    )
+
+
+def broadcast_signatures(petition_id, signature_id=None):
+    """
+    Render the signature count update (and the new signature's card, if given)
+    once and publish it to the petition's viewers. Run after commit.
+    """
+    from campaigns.models import Petition
+
+    cache.set(_version_key(petition_id), uuid.uuid4().hex, timeout=None)
+    petition = Petition.objects.select_related("campaign").filter(pk=petition_id).first()
+    if petition is None:
+        return
+    new_signatures = petition.signatures.filter(pk=signature_id, visible=True)
+    html = render_to_string(
+        "campaigns/_partial_signatures_update.html",
+        {
+            "petition": petition,
+            "new_signatures": new_signatures if signature_id else [],
+        },
+    )
+    try:
+        publish(petition_id, "signatures", html)
+    except Exception:
+        # Viewers still catch up by polling
+        logger.exception("Could not publish signatures for petition %s", petition_id)
+
+
+class SignatureFeed:
+    """One Redis subscription per process, fanned out to every open stream."""
+
+    def __init__(self):
+        self.streams = defaultdict(set)
+        self._listener = None
+
+    async def _listen(self):
+        while True:
+            client = aioredis.from_url(settings.CACHES["default"]["LOCATION"])
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                    async for message in pubsub.listen():
+                        if message["type"] == "pmessage":
+                            self._dispatch(message["channel"].decode(), message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Signature feed subscription lost, reconnecting")
+                await asyncio.sleep(1)
+            finally:
+                # Each attempt has its own client, so its connection pool goes with it
+                await client.aclose()
+
+    def _dispatch(self, channel, data):
+        petition_id = channel.removeprefix(CHANNEL_PREFIX)
+        message = json.loads(data)
+        for queue in list(self.streams.get(petition_id, ())):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                pass
+
+    @asynccontextmanager
+    async def subscribe(self, petition_id):
+        """A queue of ``{"event", "data"}`` messages for the petition, while open."""
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        self.streams[str(petition_id)].add(queue)
+        try:
+            yield queue
+        finally:
+            streams = self.streams[str(petition_id)]
+            streams.discard(queue)
+            if not streams:
+                del self.streams[str(petition_id)]
+
+
+signature_feed = SignatureFeed()
+
+
+def format_event(event, data):
+    lines = "".join(f"data: {line}\n" for line in data.splitlines() or [""])
+    return f"event: {event}\n{lines}\n"
+
+
+async def event_stream(petition_id):
+    """Server-Sent-Events for a petition, until the client disconnects."""
+    async with signature_feed.subscribe(petition_id) as queue:
+        # Clients wait this long (ms) before reconnecting, and poll meanwhile
+        yield "retry: 10000\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), KEEPALIVE_INTERVAL)
+            except TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield format_event(message["event"], message["data"])
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import time
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from campaigns.live import publish
+from campaigns.views import _fetch_petition_by_slug_or_id
+
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Open many concurrent viewers on a petition's live signature stream, publish "
+        "test events and report how many viewers received them and how quickly. "
+        "Test events use their own event type, so real viewers ignore them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("petition", help="Slug or id of the petition to watch")
+        parser.add_argument(
+            "--base-url",
+            default="http://localhost:8000",
+            help="Where the site is running (default: http://localhost:8000)",
+        )
+        parser.add_argument("--viewers", type=int, default=2000)
+        parser.add_argument("--events", type=int, default=5, help="Test events to publish")
+        parser.add_argument(
+            "--connect-timeout",
+            type=float,
+            default=60,
+            help="Seconds to wait for every viewer to connect",
+        )
+
+    def handle(self, *args, **options):
+        petition = _fetch_petition_by_slug_or_id(options["petition"])
+        if petition is None:
+            raise CommandError(f"No petition {options['petition']}")
+        url = options["base_url"].rstrip("/") + reverse(
+            "petition_signature_stream", kwargs={"petition_slug_or_id": petition.id}
+        )
+        asyncio.run(self.run(petition.id, url, options))
+
+    async def viewer(self, client, url, connected, latencies):
+        async with client.stream("GET", url) as response:
+            response.raise_for_status()
+            event = None
+            async for line in response.aiter_lines():
+                if line.startswith("retry:"):
+                    connected.append(time.perf_counter())
+                elif line.startswith("event: "):
+                    event = line.removeprefix("event: ")
+                elif line.startswith("data: ") and event == "loadtest":
+                    latencies.append(time.time() - json.loads(line.removeprefix("data: ")))
+
+    async def run(self, petition_id, url, options):
+        viewers = options["viewers"]
+        connected, latencies = [], []
+        limits = httpx.Limits(max_connections=viewers, max_keepalive_connections=0)
+        timeout = httpx.Timeout(None, connect=options["connect_timeout"])
+        async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+            tasks = [
+                asyncio.create_task(self.viewer(client, url, connected, latencies))
+                for _ in range(viewers)
+            ]
+            start = time.perf_counter()
+            while (
+                len(connected) < viewers
+                and time.perf_counter() - start < options["connect_timeout"]
+            ):
+                await asyncio.sleep(0.1)
+            self.stdout.write(
+                f"{len(connected)}/{viewers} viewers connected in "
+                f"{time.perf_counter() - start:.1f}s"
+            )
+
+            for _ in range(options["events"]):
+                await sync_to_async(publish)(petition_id, "loadtest", json.dumps(time.time()))
+                await asyncio.sleep(1)
+            await asyncio.sleep(2)
+
+            for task in tasks:
+                task.cancel()
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Cancelled viewers return CancelledError, which isn't an Exception
+        errors = [result for result in results if isinstance(result, Exception)]
+        expected = len(connected) * options["events"]
+        self.stdout.write(f"Delivered {len(latencies)}/{expected} events, {len(errors)} errors")
+        if latencies:
+            latencies_ms = [latency * 1000 for latency in latencies]
+            self.stdout.write(
+                f"Delivery latency: p50 {_percentile(latencies_ms, 50):.1f}ms, "
+                f"p95 {_percentile(latencies_ms, 95):.1f}ms, max {max(latencies_ms):.1f}ms"
+            )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from campaigns.counters import repair_petition_counters
+from campaigns.models import Petition
+
+
+class Command(BaseCommand):
+    help = "Recompute petition signer and comment counters from their signatures."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "petitions",
+            nargs="*",
+            help="Slugs of the petitions to repair (default: all petitions)",
+        )
+
+    def handle(self, *args, **options):
+        petitions = Petition.objects.all()
+        if options["petitions"]:
+            petitions = petitions.filter(slug__in=options["petitions"])
+        count = repair_petition_counters(petitions)
+        self.stdout.write(self.style.SUCCESS(f"Repaired counters for {count} petitions"))
@@ -0,0 +1,94 @@
+# Generated by Django 5.1.15 on 2026-10-19 20:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Lower
+
+
+def populate_counters(apps, schema_editor):
+    # Mirrors campaigns.counters.repair_petition_counters
+    Petition = apps.get_model("campaigns", "Petition")
+    PetitionSignature = apps.get_model("campaigns", "PetitionSignature")
+    PetitionSigner = apps.get_model("campaigns", "PetitionSigner")
+
+    visible = PetitionSignature.objects.filter(visible=True)
+    PetitionSigner.objects.bulk_create(
+        (
+            PetitionSigner(
+                petition_id=row["petition_id"],
+                email=row["key"],
+                visible_signatures=row["visible_signatures"],
+            )
+            for row in visible.exclude(Q(email__isnull=True) | Q(email=""))
+            .values("petition_id", key=Lower("email"))
+            .annotate(visible_signatures=Count("pk"))
+            .order_by()
+        ),
+        batch_size=1000,
+    )
+    signers = (
+        PetitionSigner.objects.filter(petition=OuterRef("pk"))
+        .values("petition")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    comments = (
+        visible.filter(petition=OuterRef("pk"))
+        .exclude(Q(comment__isnull=True) | Q(comment=""))
+        .values("petition")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    Petition.objects.update(
+        signer_count=Coalesce(Subquery(signers), Value(0)),
+        comment_count=Coalesce(Subquery(comments), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("campaigns", "0030_petitionsignature_checkbox_responses_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="petition",
+            name="comment_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="petition",
+            name="signer_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name="PetitionSigner",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("email", models.CharField(max_length=254)),
+                ("visible_signatures", models.IntegerField(default=0)),
+                (
+                    "petition",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="signers",
+                        to="campaigns.petition",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("petition", "email"), name="unique_petition_signer"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.15 on 2026-10-19 21:20
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_existing_processed(apps, schema_editor):
+    # Their follow-up tasks were queued when they were signed
+    PetitionSignature = apps.get_model("campaigns", "PetitionSignature")
+    PetitionSignature.objects.update(processed_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("campaigns", "0031_petition_counters_petitionsigner"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="petitionsignature",
+            name="processed_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="petitionsignature",
+            name="send_petition_email",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_existing_processed, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="petitionsignature",
+            index=models.Index(
+                condition=models.Q(("processed_at__isnull", True)),
+                fields=["created_at"],
+                name="unprocessed_signatures",
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.15 on 2026-10-19 21:50
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("campaigns", "0032_petitionsignature_pipeline"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="petitionsignature",
+            index=models.Index(
+                models.F("petition"),
+                django.db.models.functions.text.Lower("email"),
+                name="petition_signature_email",
+            ),
+        ),
+    ]
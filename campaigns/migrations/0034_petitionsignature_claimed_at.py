@@ -0,0 +1,17 @@
+# Generated by Django 5.1.15 on 2026-10-19 23:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("campaigns", "0033_petitionsignature_email_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="petitionsignature",
+            name="claimed_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
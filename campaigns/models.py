@@ -3,19 +3,20 @@ import uuid
 from django.contrib.gis.db import models
 from django.core.validators import RegexValidator
 from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Lower
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from markdownfield.models import RenderedMarkdownField
 from markdownfield.validators import VALIDATOR_NULL
 from ordered_model.models import OrderedModel
 
-from campaigns.tasks import geocode_signature, send_post_sign_email
 from events.models import ScheduledEvent
 from facets.models import District, RegisteredCommunityOrganization
 from lib.slugify import unique_slugify
-from membership.models import Donation, DonationProduct
-from pbaabp.models import ChoiceArrayField, MarkdownField
-from pbaabp.tasks import create_pba_account, subscribe_to_newsletter
+from membership.donations import donation_total
+from membership.models import DonationProduct
+from pbaabp.models import ChangeTrackingMixin, ChoiceArrayField, MarkdownField
 
 
 class Campaign(OrderedModel):
@@ -71,26 +72,25 @@ class Campaign(OrderedModel):
     @property
     def has_actions(self):
         return (
-            self.petitions.filter(display_on_campaign_page=True, active=True).count()
-            or self.events.count()
+            self.petitions.filter(display_on_campaign_page=True, active=True).exists()
+            or self.events.exists()
             or self.donation_action
             or self.subscription_action
         )
 
     @property
     def donation_total(self):
-        if self.donation_product:
-            return Donation.objects.filter(donation_product=self.donation_product).aggregate(
-                models.Sum("amount", default=0)
-            )["amount__sum"]
+        if self.donation_product_id:
+            return donation_total(self.donation_product_id)
         return None
 
     @property
     def donation_progress(self):
         if self.donation_goal:
-            if self.donation_total > self.donation_goal:
+            total = self.donation_total
+            if total > self.donation_goal:
                 return 100
-            return int(100 * (self.donation_total / self.donation_goal))
+            return int(100 * (total / self.donation_goal))
         return 100
 
     def future_events(self):
@@ -182,6 +182,12 @@ class Petition(models.Model):
 
     create_account_opt_in = models.BooleanField(default=False, blank=False)
 
+    # Maintained by campaigns.counters as visible signatures are added, hidden or
+    # removed, including through signature queryset updates and deletes. Raw SQL
+    # bypasses them; repair with the repair_petition_counters command
+    signer_count = models.IntegerField(default=0, editable=False)
+    comment_count = models.IntegerField(default=0, editable=False)
+
     def save(self, *args, **kwargs):
         if self.slug is None:
             unique_slugify(self, self.title)
@@ -193,6 +199,16 @@ class Petition(models.Model):
         form = PetitionSignatureForm(petition=self)
         return form
 
+    def email_body_for(self, signature):
+        """The petition email as sent (or drafted in a mailto link) by a signer."""
+        email_body = ""
+        if self.email_body:
+            email_body += self.email_body + "\n\n"
+        if self.email_include_comment and signature.comment:
+            email_body += signature.comment + "\n\n"
+        email_body += f"- {signature.first_name} {signature.last_name}"
+        return email_body
+
     def signatures_with_comment(self):
         return self.signatures.filter(comment__isnull=False).exclude(comment="").all()
 
@@ -206,11 +222,11 @@ class Petition(models.Model):
 
     @property
     def signature_count(self):
-        return self.signatures.distinct("email").count()
+        return self.signer_count
 
     @property
     def comments(self):
-        return self.signatures.filter(comment__isnull=False).exclude(comment="").count()
+        return self.comment_count
 
     @property
     def progress(self):
@@ -238,7 +254,45 @@ class PetitionCheckbox(OrderedModel):
         return self.label
 
 
-class PetitionSignature(models.Model):
+class PetitionSigner(models.Model):
+    """
+    A distinct signer (by lowercased email) of a petition and how many of their
+    signatures are visible. Backs Petition.signer_count.
+    """
+
+    petition = models.ForeignKey(Petition, on_delete=models.CASCADE, related_name="signers")
+    email = models.CharField(max_length=254)
+    visible_signatures = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["petition", "email"], name="unique_petition_signer")
+        ]
+
+    def __str__(self):
+        return f"{self.email} on {self.petition}"
+
+
+class PetitionSignatureQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        """
+        Bulk updates skip save(), so when one changes a counted field the
+        counters of the petitions involved are recomputed afterwards.
+        """
+        from campaigns.counters import COUNTED_FIELDS, repair_petition_counters
+
+        if not COUNTED_FIELDS & kwargs.keys():
+            return super().update(**kwargs)
+        with transaction.atomic():
+            petition_ids = set(self.order_by().values_list("petition_id", flat=True))
+            rows = super().update(**kwargs)
+            repair_petition_counters(Petition.objects.filter(pk__in=petition_ids))
+        return rows
+
+
+class PetitionSignature(ChangeTrackingMixin, models.Model):
+    tracked_fields = ["visible", "email", "comment"]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     petition = models.ForeignKey(
         Petition, to_field="id", on_delete=models.CASCADE, related_name="signatures"
@@ -296,6 +350,25 @@ class PetitionSignature(models.Model):
         blank=False, default=False, verbose_name=_("Create a PBA Account")
     )
 
+    # Whether to email the petition's recipients on the signer's behalf
+    send_petition_email = models.BooleanField(default=False, editable=False)
+    # Set by campaigns.pipeline when a run takes the signature on, and once its
+    # follow-up work is done
+    claimed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    processed_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = PetitionSignatureQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(F("petition"), Lower("email"), name="petition_signature_email"),
+            models.Index(
+                fields=["created_at"],
+                condition=Q(processed_at__isnull=True),
+                name="unprocessed_signatures",
+            ),
+        ]
+
     @property
     def district(self):
         if self.location is None:
@@ -312,35 +385,26 @@ class PetitionSignature(models.Model):
         return "; ".join(parts)
 
     def save(self, *args, **kwargs):
-        if self.email and self.newsletter_opt_in:
-            name = ""
-            if self.first_name:
-                name += self.first_name
-            if self.last_name:
-                name += f" {self.last_name}"
-            transaction.on_commit(
-                lambda: subscribe_to_newsletter.delay(
-                    self.email,
-                    name,
-                    tags=["petition", f"petition-{self.petition.slug}"],
-                )
-            )
-        if self.create_account_opt_in:
-            transaction.on_commit(
-                lambda: create_pba_account.delay(
-                    first_name=self.first_name,
-                    last_name=self.last_name,
-                    street_address=self.postal_address_line_1,
-                    zip_code=self.zip_code,
-                    email=self.email,
-                    newsletter_opt_in=self.newsletter_opt_in,
-                )
-            )
-        if not self.location:
-            transaction.on_commit(lambda: geocode_signature.delay(self.id))
-        if self.petition.post_sign_email_enabled and self.email:
-            transaction.on_commit(lambda: send_post_sign_email.delay(self.id))
-        super(PetitionSignature, self).save(*args, **kwargs)
+        from campaigns.counters import COUNTED_FIELDS, count_signature
+        from campaigns.pipeline import queue_signature_processing
+
+        is_new = self._state.adding
+        previous = None
+        if not is_new and self.has_changed(*COUNTED_FIELDS):
+            previous = [self.previous_value(field) for field in COUNTED_FIELDS]
+        with transaction.atomic():
+            # Counting the signer detects a duplicate signature, and only a signer's
+            # first signature emails the petition's recipients
+            if is_new and self.visible:
+                if count_signature(self.petition_id, self.email, self.comment, delta=1):
+                    self.send_petition_email = False
+            super(PetitionSignature, self).save(*args, **kwargs)
+            if previous is not None and previous[0]:
+                count_signature(self.petition_id, *previous[1:], delta=-1)
+            if self.visible and previous is not None:
+                count_signature(self.petition_id, self.email, self.comment, delta=1)
+        if is_new:
+            queue_signature_processing()
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.email}"
@@ -0,0 +1,261 @@
+"""
+Follow-up work for new petition signatures: geocoding, newsletter updates,
+requested accounts, the post-sign email and the petition email sent on the
+signer's behalf.
+
+Signatures are saved unprocessed and handled in batches by one scheduled
+process_petition_signatures task, so a burst of signatures shares a task
+instead of queueing several per signature. A run claims its batch for
+CLAIM_TIMEOUT and marks it processed once the work is done, so signatures
+from a run that crashed are picked up again after the claim expires.
+"""
+
+import asyncio
+import datetime
+import logging
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.template import engines
+from django.utils import timezone
+
+from campaigns.models import PetitionSignature
+from campaigns.tasks import process_petition_signatures
+from facets.utils import geocode_address
+from pbaabp.email import send_email_message
+from pbaabp.tasks import create_pba_account
+from profiles.mailjet_sync import queue_contact_update
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait after a signature before processing, so that signatures
+# arriving close together are processed together.
+PROCESS_DELAY = 10
+
+# Signatures processed per run; a full batch schedules another run.
+PROCESS_BATCH_SIZE = 200
+
+# How long a run has to finish its batch before another run may take it over
+CLAIM_TIMEOUT = datetime.timedelta(minutes=15)
+
+# Geocoding requests in flight at once
+GEOCODE_CONCURRENCY = 5
+
+SCHEDULED_KEY = "petition-signature-processing-scheduled"
+
+# A lost scheduled run only holds up scheduling this long; the beat schedule
+# picks up its signatures meanwhile.
+SCHEDULED_TIMEOUT = 300
+
+
+def queue_signature_processing():
+    """Schedule a pipeline run after commit, unless one is already scheduled."""
+
+    def schedule():
+        if cache.add(SCHEDULED_KEY, True, timeout=SCHEDULED_TIMEOUT):
+            process_petition_signatures.apply_async(countdown=PROCESS_DELAY)
+
+    transaction.on_commit(schedule)
+
+
+async def _geocode_all(addresses):
+    semaphore = asyncio.Semaphore(GEOCODE_CONCURRENCY)
+
+    async def geocode(address):
+        async with semaphore:
+            try:
+                return await geocode_address(address)
+            except Exception:
+                # Already reported by geocode_address; the signature stays ungeocoded
+                return None
+
+    results = await asyncio.gather(*(geocode(address) for address in addresses))
+    return dict(zip(addresses, results))
+
+
+def geocode_signatures(signatures):
+    """Geocode signatures with an address and no location, each distinct address once."""
+    pending = {
+        signature: f"{signature.postal_address_line_1} {signature.zip_code or ''}".strip()
+        for signature in signatures
+        if signature.location is None and signature.postal_address_line_1
+    }
+    if not pending:
+        return
+    try:
+        found = async_to_sync(_geocode_all)(sorted(set(pending.values())))
+    except Exception:
+        # Ungeocoded signatures can be geocoded later from the admin
+        logger.exception("Could not geocode petition signatures")
+        return
+    located = []
+    for signature, address in pending.items():
+        if found[address] is not None:
+            signature.location = Point(found[address].longitude, found[address].latitude)
+            located.append(signature)
+    PetitionSignature.objects.bulk_update(located, ["location"])
+
+
+def _by_email(signatures):
+    """The latest of the signatures for each (lowercased) email."""
+    return {signature.email.lower(): signature for signature in signatures if signature.email}
+
+
+def queue_newsletter_updates(signatures):
+    opted_in = [signature for signature in signatures if signature.newsletter_opt_in]
+    for signature in _by_email(opted_in).values():
+        name = " ".join(filter(None, [signature.first_name, signature.last_name]))
+        try:
+            queue_contact_update(
+                signature.email,
+                {
+                    "first_name": signature.first_name,
+                    "last_name": signature.last_name,
+                    "name": name,
+                },
+                subscribed=True,
+                name=name,
+            )
+        except Exception:
+            logger.exception("Could not queue newsletter update for %s", signature.pk)
+
+
+def create_accounts(signatures):
+    """Create requested accounts for signers who don't already have one."""
+    requested = _by_email(
+        [signature for signature in signatures if signature.create_account_opt_in]
+    )
+    existing = set(
+        User.objects.annotate(email_lower=Lower("email"))
+        .filter(email_lower__in=requested)
+        .values_list("email_lower", flat=True)
+    )
+    for email, signature in requested.items():
+        if email in existing:
+            continue
+        try:
+            create_pba_account(
+                first_name=signature.first_name,
+                last_name=signature.last_name,
+                street_address=signature.postal_address_line_1,
+                zip_code=signature.zip_code,
+                email=signature.email,
+                newsletter_opt_in=signature.newsletter_opt_in,
+            )
+        except Exception:
+            logger.exception("Could not create an account for signature %s", signature.pk)
+
+
+def _petition_email(signature, connection):
+    petition = signature.petition
+    return EmailMessage(
+        subject=petition.email_subject,
+        body=petition.email_body_for(signature),
+        from_email=f"{signature.first_name} {signature.last_name} <{settings.DEFAULT_FROM_EMAIL}>",
+        to=petition.email_to.splitlines(),
+        cc=petition.email_cc.splitlines(),
+        reply_to=[signature.email],
+        connection=connection,
+    )
+
+
+def _send_post_sign_email(signature, subject_template, connection):
+    petition = signature.petition
+    context = {
+        "first_name": signature.first_name,
+        "last_name": signature.last_name,
+        "email": signature.email,
+        "petition": petition,
+        "campaign": petition.campaign,
+    }
+    send_email_message(
+        template_name="post_sign_email",
+        from_=None,
+        to=[signature.email],
+        context=context,
+        subject=subject_template.render(context),
+        message=petition.post_sign_email_body,
+        connection=connection,
+    )
+
+
+def send_emails(signatures):
+    """Send petition and post-sign emails over one connection."""
+    subject_templates = {}
+    with get_connection() as connection:
+        for signature in signatures:
+            petition = signature.petition
+            if signature.send_petition_email and petition.send_email:
+                try:
+                    _petition_email(signature, connection).send()
+                except Exception:
+                    logger.exception("Could not send petition email for %s", signature.pk)
+
+            if not (
+                signature.email
+                and petition.post_sign_email_enabled
+                and petition.post_sign_email_subject
+                and petition.post_sign_email_body
+            ):
+                continue
+            if petition.pk not in subject_templates:
+                subject_templates[petition.pk] = engines["django"].from_string(
+                    petition.post_sign_email_subject
+                )
+            try:
+                _send_post_sign_email(signature, subject_templates[petition.pk], connection)
+            except Exception:
+                logger.exception("Could not send post-sign email for %s", signature.pk)
+
+
+def claim_signatures():
+    """
+    Claim up to PROCESS_BATCH_SIZE unprocessed signatures that no live run has
+    claimed, oldest first. Returns their primary keys.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        claimed = list(
+            PetitionSignature.objects.filter(processed_at__isnull=True)
+            .filter(Q(claimed_at__isnull=True) | Q(claimed_at__lt=now - CLAIM_TIMEOUT))
+            .order_by("created_at")
+            .select_for_update(skip_locked=True)
+            .values_list("pk", flat=True)[:PROCESS_BATCH_SIZE]
+        )
+        # update() rather than save(), so claiming doesn't queue another run
+        PetitionSignature.objects.filter(pk__in=claimed).update(claimed_at=now)
+    return claimed
+
+
+def process_signatures():
+    """
+    Claim a batch of unprocessed signatures and do their follow-up work.
+    Returns the number of signatures processed.
+    """
+    # Signatures saved from here on schedule a new run
+    cache.delete(SCHEDULED_KEY)
+    claimed = claim_signatures()
+    if not claimed:
+        return 0
+
+    signatures = list(
+        PetitionSignature.objects.filter(pk__in=claimed)
+        .select_related("petition", "petition__campaign")
+        .order_by("created_at")
+    )
+    geocode_signatures(signatures)
+    queue_newsletter_updates(signatures)
+    create_accounts(signatures)
+    send_emails(signatures)
+    PetitionSignature.objects.filter(pk__in=claimed).update(processed_at=timezone.now())
+
+    if len(claimed) == PROCESS_BATCH_SIZE:
+        process_petition_signatures.delay()
+    return len(claimed)
@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from campaigns.counters import count_signature
+from campaigns.live import broadcast_signatures
+from campaigns.models import PetitionSignature
+
+
+@receiver(post_delete, sender=PetitionSignature, dispatch_uid="petition_signature_post_delete")
+def petition_signature_deleted(sender, instance, **kwargs):
+    if instance.visible:
+        count_signature(instance.petition_id, instance.email, instance.comment, delta=-1)
+        petition_id = instance.petition_id
+        transaction.on_commit(lambda: broadcast_signatures(petition_id))
+
+
+@receiver(post_save, sender=PetitionSignature, dispatch_uid="petition_signature_post_save")
+def petition_signature_saved(sender, instance, created, **kwargs):
+    petition_id = instance.petition_id
+    if created and instance.visible:
+        signature_id = instance.pk
+        transaction.on_commit(lambda: broadcast_signatures(petition_id, signature_id))
+    elif not created and instance.has_changed("visible", "comment"):
+        # Counts changed; hidden signatures' cards go on the next full load
+        transaction.on_commit(lambda: broadcast_signatures(petition_id))
@@ -0,0 +1,377 @@
+import asyncio
+import json
+from io import StringIO
+from unittest.mock import AsyncMock, patch
+
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from campaigns.counters import repair_petition_counters
+from campaigns.live import (
+    SignatureFeed,
+    broadcast_signatures,
+    channel_name,
+    feed_version,
+    format_event,
+)
+from campaigns.models import Petition, PetitionSignature, PetitionSigner
+from campaigns.pipeline import CLAIM_TIMEOUT, SCHEDULED_KEY, process_signatures
+from campaigns.tasks import process_petition_signatures
+
+
+class PetitionTestCase(TestCase):
+    def setUp(self):
+        self.petition = Petition.objects.create(title="Protected Bike Lanes Now")
+        # New signatures schedule the pipeline after commit
+        cache.delete(SCHEDULED_KEY)
+        patcher = patch("campaigns.pipeline.process_petition_signatures")
+        self.process_task = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sign(self, email="signer@example.com", comment=None, petition=None, **kwargs):
+        return PetitionSignature.objects.create(
+            petition=petition or self.petition,
+            first_name="Pat",
+            last_name="Signer",
+            email=email,
+            comment=comment,
+            **kwargs,
+        )
+
+    def assertCounts(self, signers, comments, petition=None):
+        petition = petition or self.petition
+        petition.refresh_from_db()
+        self.assertEqual((petition.signer_count, petition.comment_count), (signers, comments))
+
+
+class PetitionCounterTestCase(PetitionTestCase):
+    def test_signers_are_counted_once_per_email(self):
+        self.sign("signer@example.com", comment="Yes please")
+        self.sign("Signer@Example.com")
+        self.sign("other@example.com")
+
+        self.assertCounts(2, 1)
+        self.assertEqual(
+            PetitionSigner.objects.get(email="signer@example.com").visible_signatures, 2
+        )
+
+    def test_duplicate_signatures_do_not_email_again(self):
+        first = self.sign("signer@example.com", send_petition_email=True)
+        duplicate = self.sign("Signer@example.com", send_petition_email=True)
+
+        self.assertTrue(first.send_petition_email)
+        self.assertFalse(duplicate.send_petition_email)
+        self.assertCounts(1, 0)
+
+    def test_same_email_on_two_petitions_is_not_a_duplicate(self):
+        other_petition = Petition.objects.create(title="Slow Streets")
+        self.sign("signer@example.com", send_petition_email=True)
+
+        signature = self.sign(
+            "signer@example.com", petition=other_petition, send_petition_email=True
+        )
+
+        self.assertTrue(signature.send_petition_email)
+        self.assertCounts(1, 0)
+        self.assertCounts(1, 0, petition=other_petition)
+
+    def test_hidden_signatures_are_not_counted(self):
+        self.sign(visible=False, comment="Hidden")
+        self.assertCounts(0, 0)
+
+        signature = self.sign("shown@example.com", comment="Shown")
+        signature.visible = False
+        signature.save()
+        self.assertCounts(0, 0)
+
+        signature.visible = True
+        signature.save()
+        self.assertCounts(1, 1)
+
+    def test_comment_edits_are_counted(self):
+        signature = self.sign()
+        signature.comment = "Added later"
+        signature.save()
+        self.assertCounts(1, 1)
+
+        signature.comment = ""
+        signature.save()
+        self.assertCounts(1, 0)
+
+    def test_email_changes_move_the_signer(self):
+        signature = self.sign("signer@example.com")
+        self.sign("other@example.com")
+
+        signature.email = "SIGNER@example.com"
+        signature.save()
+        self.assertCounts(2, 0)
+
+        signature.email = "other@example.com"
+        signature.save()
+        self.assertCounts(1, 0)
+        self.assertFalse(
+            PetitionSigner.objects.filter(
+                email="signer@example.com", visible_signatures__gt=0
+            ).exists()
+        )
+
+    def test_deleting_a_signature_uncounts_it(self):
+        first = self.sign(comment="First")
+        second = self.sign(comment="Second")
+
+        first.delete()
+        self.assertCounts(1, 1)
+
+        PetitionSignature.objects.filter(pk=second.pk).delete()
+        self.assertCounts(0, 0)
+
+    def test_queryset_updates_repair_counters(self):
+        self.sign("signer@example.com", comment="A comment")
+        self.sign("other@example.com")
+
+        self.petition.signatures.filter(email="signer@example.com").update(visible=False)
+        self.assertCounts(1, 0)
+
+        PetitionSignature.objects.update(visible=True, comment="")
+        self.assertCounts(2, 0)
+
+    def test_repair_petition_counters(self):
+        other_petition = Petition.objects.create(title="Slow Streets")
+        self.sign("signer@example.com", comment="A comment")
+        self.sign("SIGNER@example.com")
+        self.sign("other@example.com", petition=other_petition)
+        Petition.objects.update(signer_count=50, comment_count=50)
+        PetitionSigner.objects.all().delete()
+
+        self.assertEqual(repair_petition_counters(Petition.objects.filter(pk=self.petition.pk)), 1)
+        self.assertCounts(1, 1)
+        self.assertCounts(50, 50, petition=other_petition)
+        self.assertEqual(PetitionSigner.objects.get().visible_signatures, 2)
+
+        stdout = StringIO()
+        call_command("repair_petition_counters", stdout=stdout)
+        self.assertIn("Repaired counters for 2 petitions", stdout.getvalue())
+        self.assertCounts(1, 0, petition=other_petition)
+
+
+@patch("campaigns.live.publish")
+class PetitionSignatureFeedTestCase(PetitionTestCase):
+    def _poll(self, since, **headers):
+        return self.client.get(
+            reverse("petition_signatures", args=[self.petition.slug]), {"since": since}, **headers
+        )
+
+    def test_poll_returns_new_signatures_and_etag(self, publish):
+        signature = self.sign(comment="Fix the lanes")
+
+        response = self._poll("0")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Fix the lanes")
+        self.assertEqual(response["X-Signatures-Since"], str(signature.created_at.timestamp()))
+        self.assertEqual(response["ETag"], f'"{feed_version(self.petition.id)}-0"')
+
+    def test_poll_without_new_signatures_keeps_since(self, publish):
+        since = "4102444800.0"  # 2100-01-01
+
+        response = self._poll(since)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Signatures-Since"], since)
+
+    def test_unchanged_feed_is_not_modified(self, publish):
+        self.sign(comment="First")
+        etag = self._poll("0")["ETag"]
+
+        self.assertEqual(self._poll("0", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sign("second@example.com", comment="Second")
+
+        response = self._poll("0", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Second")
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_invalid_since_is_not_found(self, publish):
+        self.assertEqual(self._poll("soon").status_code, 404)
+
+    def test_signature_changes_broadcast_after_commit(self, publish):
+        with patch("campaigns.signals.broadcast_signatures") as broadcast:
+            with self.captureOnCommitCallbacks(execute=True):
+                signature = self.sign(comment="Broadcast me")
+            broadcast.assert_called_once_with(self.petition.id, signature.pk)
+
+            broadcast.reset_mock()
+            with self.captureOnCommitCallbacks(execute=True):
+                self.sign("hidden@example.com", visible=False)
+            broadcast.assert_not_called()
+
+            with self.captureOnCommitCallbacks(execute=True):
+                signature.visible = False
+                signature.save()
+            broadcast.assert_called_once_with(self.petition.id)
+
+            broadcast.reset_mock()
+            signature.visible = True
+            signature.save()
+            with self.captureOnCommitCallbacks(execute=True):
+                signature.delete()
+            broadcast.assert_called_once_with(self.petition.id)
+
+    def test_broadcast_publishes_rendered_update(self, publish):
+        signature = self.sign(comment="Rendered once")
+        version = feed_version(self.petition.id)
+
+        broadcast_signatures(self.petition.id, signature.pk)
+
+        petition_id, event, html = publish.call_args.args
+        self.assertEqual((petition_id, event), (self.petition.id, "signatures"))
+        self.assertIn("Rendered once", html)
+        self.assertIn("1 Signatures", html)
+        self.assertNotEqual(feed_version(self.petition.id), version)
+
+
+class SignatureFeedTestCase(SimpleTestCase):
+    def test_format_event(self):
+        self.assertEqual(
+            format_event("signatures", "<p>\nHi</p>"),
+            "event: signatures\ndata: <p>\ndata: Hi</p>\n\n",
+        )
+        self.assertEqual(format_event("ping", ""), "event: ping\ndata: \n\n")
+
+    def test_dispatch_fans_out_to_the_petition_streams(self):
+        feed = SignatureFeed()
+        first, second, other = asyncio.Queue(), asyncio.Queue(), asyncio.Queue()
+        feed.streams["petition-1"] = {first, second}
+        feed.streams["petition-2"] = {other}
+        message = {"event": "signatures", "data": "<p>Hi</p>"}
+
+        feed._dispatch(channel_name("petition-1"), json.dumps(message))
+
+        self.assertEqual(first.get_nowait(), message)
+        self.assertEqual(second.get_nowait(), message)
+        self.assertTrue(other.empty())
+
+    def test_dispatch_skips_full_streams(self):
+        feed = SignatureFeed()
+        full, waiting = asyncio.Queue(maxsize=1), asyncio.Queue()
+        full.put_nowait({"event": "signatures", "data": "old"})
+        feed.streams["petition-1"] = {full, waiting}
+
+        feed._dispatch(
+            channel_name("petition-1"), json.dumps({"event": "signatures", "data": "new"})
+        )
+        feed._dispatch(channel_name("petition-9"), json.dumps({"event": "signatures", "data": "-"}))
+
+        self.assertEqual(full.get_nowait()["data"], "old")
+        self.assertEqual(waiting.get_nowait()["data"], "new")
+
+    async def test_subscribe_registers_the_stream_while_open(self):
+        feed = SignatureFeed()
+        with patch.object(feed, "_listen", AsyncMock()):
+            async with feed.subscribe("petition-1") as queue:
+                self.assertEqual(feed.streams["petition-1"], {queue})
+                listener = feed._listener
+            await listener
+
+        self.assertNotIn("petition-1", feed.streams)
+
+
+class SignaturePipelineTestCase(PetitionTestCase):
+    def setUp(self):
+        super().setUp()
+        Petition.objects.filter(pk=self.petition.pk).update(
+            send_email=True,
+            email_subject="Protect the lanes",
+            email_body="Please protect the lanes.",
+            email_to="council@example.com",
+        )
+
+    def test_new_signatures_schedule_one_run(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sign("first@example.com")
+            self.sign("second@example.com")
+
+        self.process_task.apply_async.assert_called_once()
+
+    def test_processes_in_batches(self):
+        for i in range(3):
+            self.sign(f"signer{i}@example.com")
+
+        with patch("campaigns.pipeline.PROCESS_BATCH_SIZE", 2):
+            self.assertEqual(process_signatures(), 2)
+            self.process_task.delay.assert_called_once()
+
+            self.process_task.delay.reset_mock()
+            self.assertEqual(process_signatures(), 1)
+            self.process_task.delay.assert_not_called()
+            self.assertEqual(process_signatures(), 0)
+
+        self.assertFalse(PetitionSignature.objects.filter(processed_at__isnull=True).exists())
+
+    def test_petition_email_is_sent_once_per_signer(self):
+        self.sign("signer@example.com", send_petition_email=True)
+        self.sign("SIGNER@example.com", send_petition_email=True)
+        self.sign("other@example.com", send_petition_email=True)
+
+        process_signatures()
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(
+            sorted(message.reply_to[0] for message in mail.outbox),
+            ["other@example.com", "signer@example.com"],
+        )
+
+    def test_newsletter_updates_are_queued_once_per_email(self):
+        self.sign("signer@example.com")
+        self.sign("signer@example.com")
+
+        with patch("campaigns.pipeline.queue_contact_update") as queue_contact_update:
+            process_signatures()
+
+        queue_contact_update.assert_called_once()
+
+    def test_failed_run_is_retried_after_its_claim_expires(self):
+        signature = self.sign("signer@example.com", send_petition_email=True)
+
+        with patch("campaigns.pipeline.send_emails", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                process_signatures()
+
+        signature.refresh_from_db()
+        self.assertIsNone(signature.processed_at)
+        # Still claimed by the failed run
+        self.assertEqual(process_signatures(), 0)
+
+        PetitionSignature.objects.update(claimed_at=timezone.now() - CLAIM_TIMEOUT)
+        self.assertEqual(process_signatures(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_failing_steps_do_not_stop_the_batch(self):
+        self.sign("signer@example.com", send_petition_email=True, postal_address_line_1="1 Main")
+
+        with (
+            patch("campaigns.pipeline.geocode_address", side_effect=RuntimeError),
+            patch("campaigns.pipeline.queue_contact_update", side_effect=RuntimeError),
+        ):
+            self.assertEqual(process_signatures(), 1)
+
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_beat_schedule_picks_up_unscheduled_signatures(self):
+        self.assertEqual(
+            settings.CELERY_BEAT_SCHEDULE["process-petition-signatures"]["task"],
+            "campaigns.tasks.process_petition_signatures",
+        )
+        # A run was scheduled but lost; the key is still set
+        cache.set(SCHEDULED_KEY, True)
+        self.sign("signer@example.com")
+
+        self.assertEqual(process_petition_signatures.run(), 1)
+        self.assertIsNone(cache.get(SCHEDULED_KEY))
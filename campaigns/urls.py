@@ -10,5 +10,10 @@ urlpatterns = [
         views.petition_signatures,
         name="petition_signatures",
     ),
+    path(
+        "petition/<slug:petition_slug_or_id>/_signatures/stream/",
+        views.petition_signature_stream,
+        name="petition_signature_stream",
+    ),
     path("<slug:slug>/", views.CampaignDetailView.as_view(), name="campaign"),
 ]
@@ -3,15 +3,17 @@ from datetime import datetime
 from datetime import timezone as dt_timezone
 from urllib.parse import quote, urlencode
 
-from django.conf import settings
+from asgiref.sync import sync_to_async
 from django.contrib import messages
-from django.core.mail import EmailMessage
-from django.http import Http404, HttpResponse
+from django.db import transaction
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import redirect, render
+from django.utils.cache import get_conditional_response
 from django.views.generic import DetailView, ListView
 
 from campaigns.forms import PetitionSignatureForm
-from campaigns.models import Campaign, Petition, PetitionSignature
+from campaigns.live import event_stream, feed_version
+from campaigns.models import Campaign, Petition
 
 
 def _fetch_petition_by_slug_or_id(petition_slug_or_id):
@@ -52,12 +54,21 @@ def petition_signatures(request, petition_slug_or_id):
         except (ValueError, OSError):
             raise Http404
 
-        new_signatures = petition.signatures.filter(created_at__gt=since_dt, visible=True).order_by(
-            "-created_at"
+        # Pollers send the newest timestamp they've seen, so until the feed changes
+        # they repeat the same URL and get a 304 without touching the signatures
+        etag = f'"{feed_version(petition.id)}-{since_param}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            return response
+
+        new_signatures = list(
+            petition.signatures.filter(created_at__gt=since_dt, visible=True).order_by(
+                "-created_at"
+            )
         )
 
         # Return signature cards + OOB updates for count/progress
-        return render(
+        response = render(
             request,
             "campaigns/_partial_signatures_update.html",
             {
@@ -65,11 +76,31 @@ def petition_signatures(request, petition_slug_or_id):
                 "new_signatures": new_signatures,
             },
         )
+        response["ETag"] = etag
+        response["Cache-Control"] = "no-cache"
+        response["X-Signatures-Since"] = (
+            str(new_signatures[0].created_at.timestamp()) if new_signatures else since_param
+        )
+        return response
 
     # Full render on initial load
     return render(request, "campaigns/_partial_signatures.html", {"petition": petition})
 
 
+@transaction.non_atomic_requests
+async def petition_signature_stream(request, petition_slug_or_id):
+    """Server-Sent-Events feed of new signatures, instead of polling petition_signatures."""
+    petition = await sync_to_async(_fetch_petition_by_slug_or_id)(petition_slug_or_id)
+    if petition is None:
+        raise Http404
+
+    response = StreamingHttpResponse(event_stream(petition.id), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
 def sign_petition(request, petition_slug_or_id):
     petition = _fetch_petition_by_slug_or_id(petition_slug_or_id)
     if petition is None:
@@ -77,10 +108,6 @@ def sign_petition(request, petition_slug_or_id):
     if request.method == "POST":
         form = PetitionSignatureForm(request.POST, petition=petition)
         if form.is_valid():
-            # Check for existing signature
-            existing_signature = PetitionSignature.objects.filter(
-                email__iexact=form.instance.email
-            ).first()
             form.instance.petition = petition
 
             checkbox_responses = {}
@@ -89,30 +116,16 @@ def sign_petition(request, petition_slug_or_id):
                 if field_name in form.cleaned_data:
                     checkbox_responses[checkbox.label] = form.cleaned_data[field_name]
             form.instance.checkbox_responses = checkbox_responses
+            # Sent by the signature pipeline, off the request path, for the
+            # signer's first signature on the petition
+            form.instance.send_petition_email = bool(
+                petition.send_email and form.cleaned_data.get("send_email", False)
+            )
 
             form.save()
 
-            email_body = ""
-            if petition.email_body:
-                email_body += petition.email_body + "\n\n"
-            if petition.email_include_comment and form.instance.comment:
-                email_body += form.instance.comment + "\n\n"
-            email_body += f"- {form.instance.first_name} {form.instance.last_name}"
+            email_body = petition.email_body_for(form.instance)
 
-            if petition.send_email and form.cleaned_data.get("send_email", False):
-                if not existing_signature:
-                    email = EmailMessage(
-                        subject=petition.email_subject,
-                        body=email_body,
-                        from_email=(
-                            f"{form.instance.first_name} {form.instance.last_name} "
-                            f"<{settings.DEFAULT_FROM_EMAIL}>"
-                        ),
-                        to=petition.email_to.splitlines(),
-                        cc=petition.email_cc.splitlines(),
-                        reply_to=[form.instance.email],
-                    )
-                    email.send()
             message = "Signature captured!"
             if petition.send_email and form.cleaned_data.get("send_email", False):
                 message += " E-Mail sent!"
@@ -1,11 +1,9 @@
-from collections import Counter, defaultdict
-
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.db import transaction
-from django.db.models import Count
 from django.utils import timezone
 from django.utils.html import format_html
 
+from elections.directory import home_district_name
 from elections.models import (
     Ballot,
     Election,
@@ -14,7 +12,9 @@ from elections.models import (
     Question,
     QuestionVote,
     Vote,
+    district_number,
 )
+from elections.tally import counted_ballots, nominee_vote_counts, question_vote_counts
 
 
 class NominationInline(admin.TabularInline):
@@ -41,65 +41,26 @@ def close_election(modeladmin, request, queryset):
 
     with transaction.atomic():
         for election in queryset:
-            # Get all ballots for this election
-            ballots = (
-                Ballot.objects.filter(election=election)
-                .select_related("voter__profile")
-                .prefetch_related("candidate_votes__nominee", "question_votes")
-                .annotate(
-                    num_candidate_votes=Count("candidate_votes"),
-                    num_question_votes=Count("question_votes"),
-                )
-            )
-
-            # Calculate vote counts for each nominee
-            nominee_votes = Counter()
-            # Track votes by district for each nominee
-            nominee_district_votes = defaultdict(lambda: defaultdict(int))
-
-            for ballot in ballots:
-                voter_profile = ballot.voter.profile
-                voter_district = voter_profile.district
+            # Tally votes with grouped queries, by each voter's district on the voter roll
+            election.ensure_voter_roll()
+            nominee_votes, nominee_district_votes = nominee_vote_counts(election)
+            question_votes = question_vote_counts(election)
 
-                # Get district number (extract from "District 5" -> 5)
-                voter_district_num = None
-                if voter_district:
-                    import re
-
-                    match = re.search(r"\d+", voter_district.name)
-                    if match:
-                        voter_district_num = int(match.group())
-
-                # Count votes for each nominee
-                for vote in ballot.candidate_votes.all():
-                    nominee = vote.nominee
-                    nominee_votes[nominee] += 1
-
-                    # Track district-specific votes if voter has a district
-                    if voter_district_num:
-                        nominee_district_votes[nominee][voter_district_num] += 1
-
-                # Mark ballots that had at least one vote
-                had_any_votes = ballot.num_candidate_votes > 0 or ballot.num_question_votes > 0
-                ballot.had_votes = had_any_votes
-                ballot.save(update_fields=["had_votes"])
+            # Mark ballots that had at least one vote
+            ballots = Ballot.objects.filter(election=election)
+            counted = counted_ballots(election)
+            ballots.filter(pk__in=counted.values("pk")).update(had_votes=True)
+            ballots.exclude(pk__in=counted.values("pk")).update(had_votes=False)
 
             # Store final vote counts for each nominee
-            for nominee in Nominee.objects.filter(election=election):
-                nominee.final_vote_count = nominee_votes.get(nominee, 0)
-
-                # Get nominee's district to find their district votes
-                nominee_district = nominee.user.profile.district
-                nominee_district_num = None
-                if nominee_district:
-                    import re
-
-                    match = re.search(r"\d+", nominee_district.name)
-                    if match:
-                        nominee_district_num = int(match.group())
-
+            nominees = Nominee.objects.filter(election=election).annotate(
+                home_district_name=home_district_name()
+            )
+            for nominee in nominees:
+                nominee.final_vote_count = nominee_votes.get(nominee.id, 0)
+                nominee_district_num = district_number(nominee.home_district_name)
                 if nominee_district_num:
-                    nominee.final_district_vote_count = nominee_district_votes[nominee].get(
+                    nominee.final_district_vote_count = nominee_district_votes[nominee.id].get(
                         nominee_district_num, 0
                     )
                 else:
@@ -109,10 +70,9 @@ def close_election(modeladmin, request, queryset):
 
             # Store final question vote counts
             for question in Question.objects.filter(election=election):
-                yes_count = QuestionVote.objects.filter(question=question, answer=True).count()
-                no_count = QuestionVote.objects.filter(question=question, answer=False).count()
-                question.final_yes_votes = yes_count
-                question.final_no_votes = no_count
+                question.final_yes_votes, question.final_no_votes = question_votes.get(
+                    question.id, (0, 0)
+                )
                 question.save(update_fields=["final_yes_votes", "final_no_votes"])
 
             # Now delete all votes to anonymize
@@ -144,6 +104,21 @@ def close_election(modeladmin, request, queryset):
         )
 
 
+@admin.action(description="Recompute voter roll (before the eligibility deadline)")
+def recompute_voter_roll(modeladmin, request, queryset):
+    for election in queryset:
+        try:
+            election.build_voter_roll()
+        except ValueError as e:
+            modeladmin.message_user(request, str(e), level=messages.ERROR)
+            continue
+        modeladmin.message_user(
+            request,
+            f"Recomputed voter roll for {election.title}: "
+            f"{election.eligible_voters_count} eligible voters",
+        )
+
+
 class ElectionAdmin(admin.ModelAdmin):
     list_display = (
         "title",
@@ -153,11 +128,13 @@ class ElectionAdmin(admin.ModelAdmin):
         "voting_open_status",
         "voting_closed_status",
         "nominee_count",
+        "eligible_voters_count",
         "preview_voting_booth",
     )
     search_fields = ("title", "description")
     ordering = ("-membership_eligibility_deadline",)
-    actions = [close_election]
+    readonly_fields = ("voter_roll_frozen_at", "eligible_voters_count")
+    actions = [close_election, recompute_voter_roll]
 
     def eligibility_closed(self, obj):
         return timezone.now() >= obj.membership_eligibility_deadline
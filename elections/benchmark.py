@@ -0,0 +1,274 @@
+"""
+Load test and benchmark harness for elections, used by ``simulate_voters --benchmark``.
+
+Builds a synthetic election with N eligible members spread across the council
+districts, replays concurrent ballot submissions through the Django test
+client, and times the election pages and the tally at each scale. Pages
+backed by a cache are timed warm and again cold, with their caches cleared
+before every request.
+"""
+
+import datetime
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from elections.directory import invalidate_nominee_directory
+from elections.models import Ballot, Election, Nomination, Nominee, Question
+from elections.tally import is_closed, results_cache_key, tally_election
+
+USERNAME_PREFIX = "benchmark-"
+
+# Requests timed with cold caches per page, each one rebuilding the caches
+COLD_SAMPLES = 10
+
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def summarize(samples):
+    """Latency (ms) and query count percentiles for a list of (seconds, queries)."""
+    if not samples:
+        return {"samples": 0}
+    latencies = [seconds * 1000 for seconds, _ in samples]
+    queries = [count for _, count in samples]
+    return {
+        "samples": len(samples),
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        "max_ms": round(max(latencies), 2),
+        "queries_p50": _percentile(queries, 50),
+        "queries_max": max(queries),
+    }
+
+
+def measure(fn, *args, **kwargs):
+    """Run ``fn`` and return ``(result, seconds, queries)``."""
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+    return result, elapsed, len(queries)
+
+
+def _client():
+    host = next((h.lstrip(".") for h in settings.ALLOWED_HOSTS if h != "*"), "localhost")
+    return Client(HTTP_HOST=host)
+
+
+class ElectionBenchmark:
+    def __init__(
+        self,
+        voters,
+        nominees=12,
+        questions=2,
+        turnout=0.69,
+        approval_rate=0.75,
+        concurrency=8,
+        samples=50,
+        stdout=None,
+    ):
+        self.voters = voters
+        self.nominees = nominees
+        self.questions = questions
+        self.turnout = turnout
+        self.approval_rate = approval_rate
+        self.concurrency = concurrency
+        self.samples = samples
+        self.stdout = stdout
+        self.run_id = uuid.uuid4().hex[:8]
+        self.election = None
+
+    def log(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+
+    def build(self):
+        """Create the election, its eligible members, nominees and questions."""
+        from facets.models import District
+        from membership.models import Membership
+        from profiles.models import Profile
+
+        now = timezone.now()
+        self.election = Election.objects.create(
+            title=f"Benchmark {self.voters} voters ({self.run_id})",
+            slug=f"benchmark-{self.voters}-{self.run_id}",
+            # Today's date, so eligibility is computed live rather than from a snapshot
+            membership_eligibility_deadline=now - datetime.timedelta(minutes=1),
+            nominations_open=now - datetime.timedelta(minutes=1),
+            nominations_close=now - datetime.timedelta(minutes=1),
+            voting_opens=now - datetime.timedelta(minutes=1),
+            voting_closes=now + datetime.timedelta(days=1),
+        )
+
+        points = [district.mpoly.point_on_surface for district in District.objects.all()]
+        with transaction.atomic():
+            users = User.objects.bulk_create(
+                [
+                    User(
+                        username=f"{USERNAME_PREFIX}{self.run_id}-{i}",
+                        email=f"{USERNAME_PREFIX}{self.run_id}-{i}@example.com",
+                        first_name=f"Voter{i}",
+                        last_name="Benchmark",
+                    )
+                    for i in range(self.voters + self.nominees)
+                ],
+                batch_size=1000,
+            )
+            Profile.objects.bulk_create(
+                [
+                    Profile(
+                        user=user,
+                        street_address=f"{i} Benchmark St",
+                        zip_code="19107",
+                        location=points[i % len(points)] if points else None,
+                    )
+                    for i, user in enumerate(users)
+                ],
+                batch_size=1000,
+            )
+            Membership.objects.bulk_create(
+                [
+                    Membership(
+                        user=user,
+                        kind=Membership.Kind.FISCAL,
+                        start_date=now.date() - datetime.timedelta(days=30),
+                    )
+                    for user in users
+                ],
+                batch_size=1000,
+            )
+            self.voter_users = users[: self.voters]
+            self.nominee_records = Nominee.objects.bulk_create(
+                [
+                    Nominee(election=self.election, user=user, slug=f"nominee-{i}")
+                    for i, user in enumerate(users[self.voters :])
+                ]
+            )
+            Nomination.objects.bulk_create(
+                [
+                    Nomination(
+                        nominee=nominee,
+                        nominator=nominee.user,
+                        acceptance_status=Nomination.AcceptanceStatus.ACCEPTED,
+                    )
+                    for nominee in self.nominee_records
+                ]
+            )
+            self.question_records = Question.objects.bulk_create(
+                [
+                    Question(election=self.election, question_text=f"Question {i}?", order=i)
+                    for i in range(self.questions)
+                ]
+            )
+
+    def _ballot_data(self):
+        count = max(1, int(len(self.nominee_records) * self.approval_rate))
+        data = {
+            "nominees": [str(n.id) for n in random.sample(self.nominee_records, count)],
+        }
+        for question in self.question_records:
+            data[f"question_{question.id}"] = random.choice(["yes", "no"])
+        return data
+
+    def _submit(self, users):
+        """Submit a ballot for each user, from one thread with its own connection."""
+        client = _client()
+        url = reverse("election_vote", args=[self.election.slug])
+        samples = []
+        try:
+            for user in users:
+                client.force_login(user)
+                _, seconds, queries = measure(client.post, url, self._ballot_data())
+                samples.append((seconds, queries))
+        finally:
+            connection.close()
+        return samples
+
+    def clear_caches(self):
+        """Drop the nominee directory and results caches the election pages read."""
+        invalidate_nominee_directory(self.election.pk)
+        cache.delete(results_cache_key(self.election, is_closed(self.election)))
+
+    def _get(self, url_name, users, cold=False):
+        """
+        Time a GET of the page for each user. Warm runs make one untimed request
+        first to fill the caches; cold runs clear them before every request.
+        """
+        client = _client()
+        url = reverse(url_name, args=[self.election.slug])
+        if not cold:
+            client.force_login(users[0])
+            client.get(url)
+        samples = []
+        for user in users:
+            client.force_login(user)
+            if cold:
+                self.clear_caches()
+            response, seconds, queries = measure(client.get, url)
+            if response.status_code >= 400:
+                raise RuntimeError(f"GET {url} returned {response.status_code}")
+            samples.append((seconds, queries))
+        return samples
+
+    def _time_page(self, endpoints, name, url_name, users):
+        endpoints[name] = summarize(self._get(url_name, users))
+        endpoints[f"{name}_cold"] = summarize(self._get(url_name, users[:COLD_SAMPLES], cold=True))
+
+    def run(self):
+        self.build()
+        report = {
+            "voters": self.voters,
+            "nominees": self.nominees,
+            "questions": self.questions,
+            "endpoints": {},
+        }
+        endpoints = report["endpoints"]
+        sample_users = random.sample(self.voter_users, min(self.samples, self.voters))
+
+        _, seconds, queries = measure(self.election.ensure_voter_roll)
+        endpoints["freeze_voter_roll"] = summarize([(seconds, queries)])
+
+        self.log("  timing election_detail and vote (GET)")
+        self._time_page(endpoints, "election_detail", "election_detail", sample_users)
+        self._time_page(endpoints, "vote_get", "election_vote", sample_users)
+
+        voting = random.sample(self.voter_users, int(self.voters * self.turnout))
+        self.log(f"  replaying {len(voting)} ballots with {self.concurrency} clients")
+        chunks = [voting[i :: self.concurrency] for i in range(self.concurrency)]
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            results = executor.map(self._submit, chunks)
+            endpoints["vote_post"] = summarize([s for samples in results for s in samples])
+        report["ballots"] = Ballot.objects.filter(election=self.election).count()
+
+        self.log("  timing tally and election_results")
+        tallies = []
+        for _ in range(min(self.samples, 10)):
+            _, seconds, queries = measure(tally_election, self.election)
+            tallies.append((seconds, queries))
+        endpoints["calculate_election_results"] = summarize(tallies)
+
+        Election.objects.filter(pk=self.election.pk).update(
+            voting_closes=timezone.now() - datetime.timedelta(seconds=1)
+        )
+        self.election.refresh_from_db()
+        self._time_page(endpoints, "election_results", "election_results", sample_users)
+        return report
+
+    def cleanup(self):
+        if self.election is not None:
+            User.objects.filter(username__startswith=f"{USERNAME_PREFIX}{self.run_id}-").delete()
+            self.election.delete()
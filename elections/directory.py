@@ -0,0 +1,80 @@
+import random
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Exists, OuterRef, Prefetch, Subquery, Value, When
+
+from elections.models import Nomination, Nominee
+
+# Backstop for changes the signals don't see, like nominee name or address edits
+DIRECTORY_TIMEOUT = 60 * 10
+
+
+def home_district_name():
+    """Expression for a nominee's current district name, mirroring Profile.district."""
+    from facets.models import District as DistrictFacet
+
+    district = DistrictFacet.objects.filter(mpoly__contains=OuterRef("user__profile__location"))
+    return Case(
+        When(user__profile__street_address__isnull=True, then=Value(None)),
+        default=Subquery(district.values("name")[:1]),
+    )
+
+
+def _accepted_nominations():
+    return Nomination.objects.filter(
+        acceptance_status=Nomination.AcceptanceStatus.ACCEPTED, draft=False
+    )
+
+
+def _directory_key(election_id):
+    # Only the id, so nominee and nomination signals can build it without loading the election
+    return f"election-nominee-directory:v1:{election_id}"
+
+
+def build_nominee_directory(election):
+    """
+    Nominees who accepted at least one nomination, in one query plus a
+    prefetch. Each has ``accepted_nominations`` (self-nominations first) and
+    ``home_district_name``.
+    """
+    nominees = list(
+        Nominee.objects.filter(election=election)
+        .filter(Exists(_accepted_nominations().filter(nominee=OuterRef("pk"))))
+        .select_related("user")
+        .annotate(home_district_name=home_district_name())
+        .prefetch_related(
+            Prefetch(
+                "nominations",
+                queryset=_accepted_nominations().select_related("nominator"),
+                to_attr="accepted_nominations",
+            )
+        )
+        .order_by("created_at")
+    )
+    for nominee in nominees:
+        nominee.accepted_nominations.sort(key=lambda n: n.nominator_id != nominee.user_id)
+    return nominees
+
+
+def get_nominee_directory(election):
+    """The cached nominee directory, see ``build_nominee_directory``."""
+    key = _directory_key(election.pk)
+    nominees = cache.get(key)
+    if nominees is None:
+        nominees = build_nominee_directory(election)
+        cache.set(key, nominees, DIRECTORY_TIMEOUT)
+    return nominees
+
+
+def shuffled_nominee_directory(election):
+    """The nominee directory in a random order, for the ballot and public list."""
+    nominees = get_nominee_directory(election)
+    return random.sample(nominees, len(nominees))
+
+
+def invalidate_nominee_directory(election_id):
+    key = _directory_key(election_id)
+    cache.delete(key)
+    # Again after commit, in case a concurrent request cached the old rows meanwhile
+    transaction.on_commit(lambda: cache.delete(key))
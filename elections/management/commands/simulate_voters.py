@@ -3,8 +3,13 @@ Management command to simulate voter turnout for an election.
 
 Usage:
     ./manage.py simulate_voters --election-slug <slug> --turnout 0.69 --approval-rate 0.75
+
+Benchmark mode builds synthetic elections at several scales, replays concurrent
+ballot submissions and writes latency and query counts to a JSON report:
+    ./manage.py simulate_voters --benchmark --scales 100,1000,5000 --report bench.json
 """
 
+import json
 import random
 
 from django.conf import settings
@@ -46,6 +51,46 @@ class Command(BaseCommand):
             action="store_true",
             help="Clear existing ballots before simulating",
         )
+        parser.add_argument(
+            "--benchmark",
+            action="store_true",
+            help="Benchmark synthetic elections instead of simulating an existing one",
+        )
+        parser.add_argument(
+            "--scales",
+            type=str,
+            default="100,1000,5000",
+            help="Comma separated numbers of eligible voters to benchmark (default: 100,1000,5000)",
+        )
+        parser.add_argument(
+            "--nominees",
+            type=int,
+            default=12,
+            help="Nominees per benchmark election (default: 12)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=8,
+            help="Concurrent clients submitting ballots (default: 8)",
+        )
+        parser.add_argument(
+            "--samples",
+            type=int,
+            default=50,
+            help="Page views timed per endpoint (default: 50)",
+        )
+        parser.add_argument(
+            "--report",
+            type=str,
+            default="election-benchmark.json",
+            help="Path to write the JSON report (default: election-benchmark.json)",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the synthetic elections and members after benchmarking",
+        )
 
     def handle(self, *args, **options):
         # Safety check: only allow in DEBUG mode
@@ -55,6 +100,9 @@ class Command(BaseCommand):
                 "Refusing to simulate voters in production environment."
             )
 
+        if options["benchmark"]:
+            return self.benchmark(options)
+
         # Get election
         if options["election_slug"]:
             try:
@@ -162,3 +210,44 @@ class Command(BaseCommand):
                 f"  Average votes per ballot: {votes_created / ballots_created:.1f}"
             )
         )
+
+    def benchmark(self, options):
+        from django.utils import timezone
+
+        from elections.benchmark import ElectionBenchmark
+
+        try:
+            scales = [int(scale) for scale in options["scales"].split(",")]
+        except ValueError:
+            raise CommandError("Scales must be a comma separated list of integers")
+
+        report = {"generated_at": timezone.now().isoformat(), "scales": []}
+        for scale in scales:
+            self.stdout.write(f"Benchmarking {scale} eligible voters")
+            benchmark = ElectionBenchmark(
+                scale,
+                nominees=options["nominees"],
+                turnout=options["turnout"],
+                approval_rate=options["approval_rate"],
+                concurrency=options["concurrency"],
+                samples=options["samples"],
+                stdout=self.stdout,
+            )
+            try:
+                result = benchmark.run()
+            finally:
+                if not options["keep"]:
+                    benchmark.cleanup()
+            report["scales"].append(result)
+            for name, stats in result["endpoints"].items():
+                if not stats["samples"]:
+                    self.stdout.write(f"  {name}: no samples")
+                    continue
+                self.stdout.write(
+                    f"  {name}: p50 {stats['p50_ms']}ms, p95 {stats['p95_ms']}ms, "
+                    f"{stats['queries_max']} queries max"
+                )
+
+        with open(options["report"], "w") as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote benchmark report to {options['report']}"))
@@ -0,0 +1,70 @@
+# Generated by Django 5.1.15 on 2026-10-19 18:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("elections", "0009_add_final_vote_counts"),
+        ("facets", "0009_facetoverlap"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="election",
+            name="eligible_voters_count",
+            field=models.IntegerField(
+                blank=True, help_text="Number of eligible voters on the voter roll", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="election",
+            name="voter_roll_frozen_at",
+            field=models.DateTimeField(
+                blank=True, help_text="When the eligible voter roll was frozen", null=True
+            ),
+        ),
+        migrations.CreateModel(
+            name="EligibleVoter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "district",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="facets.district",
+                    ),
+                ),
+                (
+                    "election",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="eligible_voters",
+                        to="elections.election",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="voter_roll_entries",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("election", "user")},
+            },
+        ),
+    ]
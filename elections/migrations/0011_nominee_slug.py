@@ -0,0 +1,44 @@
+# Generated by Django 5.1.15 on 2026-10-19 19:20
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def populate_slugs(apps, schema_editor):
+    # Mirrors Nominee.get_slug and the suffixing in Nominee.save
+    Nominee = apps.get_model("elections", "Nominee")
+    taken = set()
+    for nominee in Nominee.objects.select_related("user").order_by("created_at"):
+        if nominee.public_display_name:
+            base = slugify(nominee.public_display_name)
+        else:
+            last_initial = nominee.user.last_name[0].lower() if nominee.user.last_name else ""
+            base = slugify(f"{nominee.user.first_name or ''}-{last_initial}")
+        base = base or "nominee"
+        slug, suffix = base, 2
+        while (nominee.election_id, slug) in taken:
+            slug = f"{base}-{suffix}"
+            suffix += 1
+        taken.add((nominee.election_id, slug))
+        Nominee.objects.filter(pk=nominee.pk).update(slug=slug)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("elections", "0010_election_voter_roll_eligiblevoter"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="nominee",
+            name="slug",
+            field=models.SlugField(blank=True, max_length=255),
+        ),
+        migrations.RunPython(populate_slugs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="nominee",
+            constraint=models.UniqueConstraint(
+                fields=("election", "slug"), name="unique_nominee_slug"
+            ),
+        ),
+    ]
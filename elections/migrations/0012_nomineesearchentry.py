@@ -0,0 +1,88 @@
+# Generated by Django 5.1.15 on 2026-10-19 20:05
+
+import unicodedata
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+def normalize(text):
+    # Mirrors elections.search.normalize
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(text.lower().split())
+
+
+def populate_search_entries(apps, schema_editor):
+    User = apps.get_model("auth", "User")
+    SocialAccount = apps.get_model("socialaccount", "SocialAccount")
+    NomineeSearchEntry = apps.get_model("elections", "NomineeSearchEntry")
+
+    handles = {
+        user_id: (extra_data or {}).get("username") or ""
+        for user_id, extra_data in SocialAccount.objects.filter(provider="discord").values_list(
+            "user_id", "extra_data"
+        )
+    }
+    entries = []
+    for user in User.objects.only("first_name", "last_name", "username").iterator():
+        # Mirrors get_user_display_name
+        last_initial = f"{user.last_name[0]}." if user.last_name else ""
+        handle = handles.get(user.pk, "")
+        entries.append(
+            NomineeSearchEntry(
+                user_id=user.pk,
+                name=normalize(f"{user.first_name} {user.last_name}"),
+                handle=normalize(handle),
+                display_name=f"{user.first_name or ''} {last_initial}".strip() or user.username,
+                discord_handle=handle,
+            )
+        )
+    NomineeSearchEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("elections", "0011_nominee_slug"),
+        ("socialaccount", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.CreateModel(
+            name="NomineeSearchEntry",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="nominee_search_entry",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("name", models.TextField(blank=True, default="")),
+                ("handle", models.TextField(blank=True, default="")),
+                ("display_name", models.CharField(blank=True, default="", max_length=255)),
+                ("discord_handle", models.CharField(blank=True, default="", max_length=255)),
+            ],
+            options={
+                "indexes": [
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=["name"], name="nominee_search_name_trgm", opclasses=["gin_trgm_ops"]
+                    ),
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=["handle"],
+                        name="nominee_search_handle_trgm",
+                        opclasses=["gin_trgm_ops"],
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(populate_search_entries, migrations.RunPython.noop),
+    ]
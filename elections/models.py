@@ -1,11 +1,18 @@
+import re
 import uuid
+from collections import Counter
 
 from django.contrib.auth.models import User
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import Case, Count, F, OuterRef, Subquery, Value, When
 from django.utils import timezone
 from django.utils.safestring import mark_safe
 from django.utils.text import slugify
 
+from pbaabp.models import ChangeTrackingMixin
+
 
 def get_user_display_name(user):
     """
@@ -19,6 +26,17 @@ def get_user_display_name(user):
     return f"{first_name} {last_initial}".strip() or user.username
 
 
+DISTRICT_NUM_REGEX = re.compile(r"\d+")
+
+
+def district_number(district_name):
+    """Extract the district number from a district name ("District 5" -> 5)."""
+    if not district_name:
+        return None
+    match = DISTRICT_NUM_REGEX.search(district_name)
+    return int(match.group()) if match else None
+
+
 class Election(models.Model):
     title = models.CharField(max_length=255)
     slug = models.SlugField(max_length=255, unique=True)
@@ -43,6 +61,14 @@ class Election(models.Model):
         help_text="Minimum voters in a district required to activate that district's seat",
     )
 
+    # Voter roll, frozen once the membership eligibility deadline passes
+    voter_roll_frozen_at = models.DateTimeField(
+        null=True, blank=True, help_text="When the eligible voter roll was frozen"
+    )
+    eligible_voters_count = models.IntegerField(
+        null=True, blank=True, help_text="Number of eligible voters on the voter roll"
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -58,6 +84,12 @@ class Election(models.Model):
             .first()
         )
 
+    def _live_eligible_voters(self):
+        from membership.status import members_as_of
+        from profiles.models import Profile
+
+        return Profile.objects.filter(user__in=members_as_of(self.membership_eligibility_deadline))
+
     def get_eligible_voters(self):
         """
         Get a QuerySet of profiles for users who were eligible voters as of the
@@ -67,65 +99,136 @@ class Election(models.Model):
         - Active Membership record
         - Discord activity within 30 days (before deadline)
         - Active Stripe subscription
-        """
-        from datetime import timedelta
-
-        from django.db.models import Q
 
+        Once the deadline has passed this reads from the frozen voter roll.
+        """
         from profiles.models import Profile
 
-        # Use the deadline as a single point in time (already a timezone-aware datetime)
-        deadline = self.membership_eligibility_deadline
-        deadline_date = deadline.date()
-
-        # Calculate Discord activity window (30 days before deadline)
-        # Use date arithmetic to avoid timezone conversion issues
-        discord_start_date = deadline_date - timedelta(days=30)
-
-        # Build query for users who were members as of the deadline
-        # 1. Explicit Membership record active on deadline
-        membership_record_query = Q(memberships__start_date__lte=deadline) & (
-            Q(memberships__end_date__isnull=True) | Q(memberships__end_date__gte=deadline)
+        if self.ensure_voter_roll():
+            profiles = Profile.objects.filter(user__voter_roll_entries__election=self)
+        else:
+            profiles = self._live_eligible_voters()
+        return profiles.select_related("user")
+
+    def _live_voter_districts(self):
+        """Live eligible voters annotated with the ``district_id`` they live in."""
+        from facets.models import District as DistrictFacet
+
+        # Mirrors Profile.district, which requires a street address and location
+        district = DistrictFacet.objects.filter(mpoly__contains=OuterRef("location"))
+        return self._live_eligible_voters().annotate(
+            district_id=Case(
+                When(street_address__isnull=True, then=Value(None)),
+                default=Subquery(district.values("pk")[:1]),
+            )
         )
 
-        # 2. Discord activity within 30 days before deadline
-        # User must have BOTH a linked Discord account AND recent activity
-        # Use date comparison since DiscordActivity.date is a DateField
-        discord_activity_query = Q(socialaccount__provider="discord") & Q(
-            profile__discord_activity__date__gte=discord_start_date,
-            profile__discord_activity__date__lte=deadline_date,
-        )
-
-        # 3. Stripe subscription active as of deadline
-        # We need to check BOTH:
-        # a) Historical invoices (for past billing periods that have ended)
-        # b) Current subscription periods (for ongoing subscriptions without invoices yet)
-        # This is because invoices are only created after a billing period ends
-        deadline_start = deadline.replace(hour=0, minute=0, second=0, microsecond=0)
-        deadline_end = deadline.replace(hour=23, minute=59, second=59, microsecond=999999)
-
-        stripe_invoice_query = Q(
-            djstripe_customers__subscriptions__invoices__period_start__lte=deadline_end,
-            djstripe_customers__subscriptions__invoices__period_end__gte=deadline_start,
-            djstripe_customers__subscriptions__invoices__status="paid",
-        )
-        stripe_current_period_query = Q(
-            djstripe_customers__subscriptions__current_period_start__lte=deadline_end,
-            djstripe_customers__subscriptions__current_period_end__gte=deadline_start,
-        )
-        stripe_subscription_query = stripe_invoice_query | stripe_current_period_query
-
-        # Combine all three criteria with OR
-        eligible_users_query = (
-            membership_record_query | discord_activity_query | stripe_subscription_query
-        )
-
-        # Get profiles for eligible users
-        return (
-            Profile.objects.filter(user__in=User.objects.filter(eligible_users_query))
-            .select_related("user")
-            .distinct()
+    def build_voter_roll(self, freeze=False):
+        """
+        (Re)compute the eligible voter roll, recording each voter's district.
+        Raises ValueError if the roll has already been frozen.
+        """
+        with transaction.atomic():
+            election = Election.objects.select_for_update().get(pk=self.pk)
+            if election.voter_roll_frozen_at is not None:
+                raise ValueError(f"The voter roll for {self} is frozen")
+
+            EligibleVoter.objects.filter(election=self).delete()
+            EligibleVoter.objects.bulk_create(
+                (
+                    EligibleVoter(election=self, user_id=user_id, district_id=district_id)
+                    for user_id, district_id in self._live_voter_districts().values_list(
+                        "user_id", "district_id"
+                    )
+                ),
+                batch_size=1000,
+            )
+
+            self.eligible_voters_count = EligibleVoter.objects.filter(election=self).count()
+            self.voter_roll_frozen_at = timezone.now() if freeze else None
+            Election.objects.filter(pk=self.pk).update(
+                eligible_voters_count=self.eligible_voters_count,
+                voter_roll_frozen_at=self.voter_roll_frozen_at,
+            )
+
+    def ensure_voter_roll(self):
+        """
+        Freeze the voter roll if the eligibility deadline has passed and it
+        hasn't been frozen yet. Returns True if the roll is frozen.
+        """
+        if self.voter_roll_frozen_at is not None:
+            return True
+        if timezone.now() < self.membership_eligibility_deadline:
+            return False
+        try:
+            self.build_voter_roll(freeze=True)
+        except ValueError:
+            # Frozen concurrently, pick up the stored values
+            self.refresh_from_db(fields=["voter_roll_frozen_at", "eligible_voters_count"])
+        return True
+
+    def is_eligible_voter(self, user):
+        """Check if ``user`` was an eligible voter as of the eligibility deadline."""
+        if self.ensure_voter_roll():
+            return EligibleVoter.objects.filter(election=self, user_id=user.pk).exists()
+        return self._live_eligible_voters().filter(user_id=user.pk).exists()
+
+    def voter_count(self):
+        """Number of eligible voters."""
+        if self.ensure_voter_roll():
+            return self.eligible_voters_count
+        return self._live_eligible_voters().count()
+
+    def district_voter_counts(self):
+        """
+        Count eligible voters by district number, with None for voters outside
+        any numbered district. Before the roll is frozen the counts are live.
+        """
+        from facets.models import District as DistrictFacet
+
+        counts = Counter()
+        if self.ensure_voter_roll():
+            rows = (
+                EligibleVoter.objects.filter(election=self)
+                .values(district_name=F("district__name"))
+                .annotate(voters=Count("id"))
+                .order_by()
+            )
+        else:
+            names = DistrictFacet.objects.filter(pk=OuterRef("district_id")).values("name")
+            rows = (
+                self._live_voter_districts()
+                .values(district_name=Subquery(names))
+                .annotate(voters=Count("id"))
+                .order_by()
+            )
+        for row in rows:
+            counts[district_number(row["district_name"])] += row["voters"]
+        return counts
+
+    def activated_districts(self):
+        """
+        District numbers with enough eligible voters to activate their district
+        seat. Cached once the voter roll is frozen, since it can't change then.
+        """
+        key = None
+        if self.ensure_voter_roll():
+            key = (
+                f"election-activated-districts:{self.pk}:"
+                f"{self.voter_roll_frozen_at.timestamp()}:{self.district_seat_min_voters}"
+            )
+            activated = cache.get(key)
+            if activated is not None:
+                return activated
+
+        activated = sorted(
+            district_num
+            for district_num, count in self.district_voter_counts().items()
+            if district_num is not None and count >= self.district_seat_min_voters
         )
+        if key is not None:
+            cache.set(key, activated, None)
+        return activated
 
     def is_nominations_open(self):
         """Check if nominations are currently open."""
@@ -157,6 +260,53 @@ class Election(models.Model):
         return self.title
 
 
+class EligibleVoter(models.Model):
+    """
+    An entry on an election's voter roll: a user who was eligible to vote as of
+    the membership eligibility deadline, and the district they were in.
+    """
+
+    election = models.ForeignKey(Election, on_delete=models.CASCADE, related_name="eligible_voters")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="voter_roll_entries")
+    district = models.ForeignKey(
+        "facets.District", on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+
+    class Meta:
+        unique_together = ("election", "user")
+
+    def __str__(self):
+        return f"{self.user} eligible for {self.election.title}"
+
+
+class NomineeSearchEntry(models.Model):
+    """
+    A user's normalized name and Discord handle for the nominee typeahead, kept
+    up to date by signals. See ``elections.search``.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="nominee_search_entry"
+    )
+    name = models.TextField(blank=True, default="")
+    handle = models.TextField(blank=True, default="")
+
+    # What the results show, so they don't need the user or social account
+    display_name = models.CharField(max_length=255, blank=True, default="")
+    discord_handle = models.CharField(max_length=255, blank=True, default="")
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["name"], opclasses=["gin_trgm_ops"], name="nominee_search_name_trgm"),
+            GinIndex(
+                fields=["handle"], opclasses=["gin_trgm_ops"], name="nominee_search_handle_trgm"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Search entry for {self.user}"
+
+
 class Nominee(models.Model):
     """
     Represents a person who has been nominated for an election.
@@ -189,6 +339,9 @@ class Nominee(models.Model):
         ),
     )
 
+    # URL slug, unique within the election, from the public display name
+    slug = models.SlugField(max_length=255, blank=True)
+
     # Final results (set when election is closed and anonymized)
     final_vote_count = models.IntegerField(
         null=True,
@@ -208,11 +361,31 @@ class Nominee(models.Model):
     class Meta:
         unique_together = ("election", "user")
         ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(fields=["election", "slug"], name="unique_nominee_slug")
+        ]
 
     def __str__(self):
         nominee_name = self.user.get_full_name() or self.user.email
         return f"{nominee_name} for {self.election.title}"
 
+    def save(self, *args, **kwargs):
+        base = self.get_slug() or "nominee"
+        if not re.fullmatch(rf"{re.escape(base)}(-\d+)?", self.slug or ""):
+            self.slug = base
+            taken = set(
+                Nominee.objects.filter(election_id=self.election_id, slug__startswith=base)
+                .exclude(pk=self.pk)
+                .values_list("slug", flat=True)
+            )
+            suffix = 2
+            while self.slug in taken:
+                self.slug = f"{base}-{suffix}"
+                suffix += 1
+            if "update_fields" in kwargs and kwargs["update_fields"] is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "slug"}
+        super().save(*args, **kwargs)
+
     def nomination_count(self):
         """Return count of non-draft nominations."""
         return self.nominations.filter(draft=False).count()
@@ -247,6 +420,9 @@ class Nominee(models.Model):
         """
         Generate a URL-safe slug for the nominee based on first name + last initial.
         Format: firstname-l
+
+        The stored ``slug`` is this, with a numeric suffix if it's already taken
+        in the election.
         """
         from django.utils.text import slugify
 
@@ -268,7 +444,7 @@ class Nominee(models.Model):
         transaction.on_commit(lambda: send_nomination_notification.delay(str(nomination.id)))
 
 
-class Nomination(models.Model):
+class Nomination(ChangeTrackingMixin, models.Model):
     """
     Represents a single nomination of a person for an election.
     Multiple people can nominate the same Nominee.
@@ -279,6 +455,8 @@ class Nomination(models.Model):
         ACCEPTED = "accepted", "Accepted"
         DECLINED = "declined", "Declined"
 
+    tracked_fields = ["draft"]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     nominee = models.ForeignKey(Nominee, on_delete=models.CASCADE, related_name="nominations")
     nominator = models.ForeignKey(User, on_delete=models.CASCADE, related_name="nominations_given")
@@ -322,11 +500,7 @@ class Nomination(models.Model):
         is_self_nomination = self.nominator == self.nominee.user
 
         if not is_new:
-            try:
-                old_instance = Nomination.objects.get(pk=self.pk)
-                was_draft = old_instance.draft
-            except Nomination.DoesNotExist:
-                pass
+            was_draft = self.previous_value("draft")
 
         # Auto-accept self-nominations
         if not self.draft and is_self_nomination and (is_new or was_draft):
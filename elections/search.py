@@ -0,0 +1,98 @@
+import unicodedata
+import uuid
+
+from allauth.socialaccount.models import SocialAccount
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import F, Q
+
+from elections.models import NomineeSearchEntry, get_user_display_name
+from membership.status import annotate_membership
+
+SEARCH_LIMIT = 10
+
+# Typeahead results are reused for a short while; membership changes show up
+# once they expire
+SEARCH_CACHE_TIMEOUT = 30
+
+# Bumped whenever a search entry changes, so cached results for old entries are dropped
+SEARCH_VERSION_KEY = "nominee-search-version"
+
+
+def normalize(text):
+    """Lowercase, without accents and with single spaces, for matching."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(text.lower().split())
+
+
+def index_user(user_id):
+    """Create or refresh the search entry for a user."""
+    user = User.objects.filter(pk=user_id).first()
+    if user is None:
+        return
+    discord = SocialAccount.objects.filter(user_id=user_id, provider="discord").first()
+    discord_handle = ((discord.extra_data or {}).get("username") or "") if discord else ""
+    NomineeSearchEntry.objects.update_or_create(
+        user_id=user_id,
+        defaults={
+            "name": normalize(f"{user.first_name} {user.last_name}"),
+            "handle": normalize(discord_handle),
+            "display_name": get_user_display_name(user),
+            "discord_handle": discord_handle,
+        },
+    )
+    cache.set(SEARCH_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def _cache_key(version, term):
+    return f"nominee-search:v1:{version}:{term}"
+
+
+def _matches(result, term):
+    return term in result["name"] or term in result["handle"]
+
+
+def _public(results):
+    # name and handle include the full last name, which is never shown
+    return [
+        {"id": r["id"], "display_name": r["display_name"], "discord_handle": r["discord_handle"]}
+        for r in results
+    ]
+
+
+def search_members(query, limit=SEARCH_LIMIT):
+    """
+    Current members whose name or Discord handle contains ``query``, as dicts
+    of ``id``, ``display_name`` and ``discord_handle``. Matching and the
+    membership check happen in one query against the trigram indexes.
+    """
+    term = normalize(query)
+    version = cache.get(SEARCH_VERSION_KEY)
+    key = _cache_key(version, term)
+    results = cache.get(key)
+    if results is not None:
+        return _public(results)
+
+    # While typing, each query extends the last, so a complete (under the limit)
+    # result list for a shorter prefix already holds every match
+    prefixes = {_cache_key(version, term[:end]): end for end in range(1, len(term))}
+    cached = cache.get_many(prefixes)
+    complete = [prefix for prefix, previous in cached.items() if len(previous) < limit]
+    if complete:
+        previous = cached[max(complete, key=prefixes.get)]
+        results = [result for result in previous if _matches(result, term)]
+    else:
+        entries = annotate_membership(
+            NomineeSearchEntry.objects.filter(user__profile__isnull=False).filter(
+                Q(name__contains=term) | Q(handle__contains=term)
+            ),
+            user_ref="user",
+        ).filter(is_member=True)
+        results = list(
+            entries.order_by("name").values(
+                "name", "handle", "display_name", "discord_handle", id=F("user_id")
+            )[:limit]
+        )
+    cache.set(key, results, SEARCH_CACHE_TIMEOUT)
+    return _public(results)
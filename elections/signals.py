@@ -0,0 +1,48 @@
+from allauth.socialaccount.models import SocialAccount
+from django.contrib.auth.models import User
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save, pre_migrate
+from django.dispatch import receiver
+
+from elections.directory import invalidate_nominee_directory
+from elections.models import Nomination, Nominee
+from elections.search import index_user
+
+
+@receiver(pre_migrate, dispatch_uid="elections_pre_migrate_trigram_extension")
+def create_trigram_extension(sender, using, **kwargs):
+    # Test databases are built from the models without migrations, so the
+    # extension migration 0012 installs must exist before the trigram indexes.
+    if sender.name == "elections":
+        with connections[using].cursor() as cursor:
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+
+@receiver(post_save, sender=Nominee, dispatch_uid="nominee_post_save")
+@receiver(post_delete, sender=Nominee, dispatch_uid="nominee_post_delete")
+def nominee_changed(sender, instance, **kwargs):
+    invalidate_nominee_directory(instance.election_id)
+
+
+@receiver(post_save, sender=Nomination, dispatch_uid="nomination_post_save")
+@receiver(post_delete, sender=Nomination, dispatch_uid="nomination_post_delete")
+def nomination_changed(sender, instance, **kwargs):
+    invalidate_nominee_directory(instance.nominee.election_id)
+
+
+@receiver(post_save, sender=User, dispatch_uid="nominee_search_user_post_save")
+def user_search_entry(sender, instance, created, update_fields=None, **kwargs):
+    # Logins save last_login alone, which doesn't change the entry
+    if created or update_fields is None or {"first_name", "last_name"} & set(update_fields):
+        index_user(instance.pk)
+
+
+@receiver(post_save, sender=SocialAccount, dispatch_uid="nominee_search_social_account_post_save")
+@receiver(
+    post_delete, sender=SocialAccount, dispatch_uid="nominee_search_social_account_post_delete"
+)
+def social_account_search_entry(sender, instance, **kwargs):
+    if instance.provider == "discord":
+        # After commit, so deleting a user doesn't recreate their entry mid-cascade
+        user_id = instance.user_id
+        transaction.on_commit(lambda: index_user(user_id))
@@ -0,0 +1,267 @@
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+from django.db.models import Count, Exists, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from elections.directory import home_district_name
+from elections.models import (
+    Ballot,
+    EligibleVoter,
+    Nominee,
+    Question,
+    QuestionVote,
+    Vote,
+    district_number,
+)
+
+# Bump when the shape or rules of the results change, so cached results are dropped
+RESULTS_VERSION = 1
+
+RESULTS_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
+
+def _voter_district_name(election, voter_ref):
+    """Subquery for the district a ballot's voter had on the election's voter roll."""
+    return Subquery(
+        EligibleVoter.objects.filter(election=election, user=OuterRef(voter_ref)).values(
+            "district__name"
+        )[:1]
+    )
+
+
+def is_closed(election):
+    """Whether the election has been closed and its ballots anonymized."""
+    return Nominee.objects.filter(election=election, final_vote_count__isnull=False).exists()
+
+
+def counted_ballots(election, closed=False):
+    """Ballots with at least one answer (candidate vote or question vote)."""
+    if closed:
+        return Ballot.objects.filter(election=election, had_votes=True)
+    return Ballot.objects.filter(election=election).filter(
+        Exists(Vote.objects.filter(ballot=OuterRef("pk")))
+        | Exists(QuestionVote.objects.filter(ballot=OuterRef("pk")))
+    )
+
+
+def nominee_vote_counts(election):
+    """
+    Count live votes per nominee, in total and by the voter's district.
+    Returns ``(totals, by_district)``: nominee id -> votes, and nominee id ->
+    Counter of district number -> votes. Only nominees with votes appear.
+    """
+    rows = (
+        Vote.objects.filter(ballot__election=election)
+        .annotate(district_name=_voter_district_name(election, "ballot__voter"))
+        .values("nominee_id", "district_name")
+        .annotate(votes=Count("id"))
+        .order_by()
+    )
+    totals = Counter()
+    by_district = defaultdict(Counter)
+    for row in rows:
+        totals[row["nominee_id"]] += row["votes"]
+        district_num = district_number(row["district_name"])
+        if district_num:
+            by_district[row["nominee_id"]][district_num] += row["votes"]
+    return totals, by_district
+
+
+def question_vote_counts(election):
+    """Yes and no counts per question id, in one grouped query."""
+    rows = (
+        QuestionVote.objects.filter(question__election=election)
+        .values("question_id")
+        .annotate(yes=Count("id", filter=Q(answer=True)), no=Count("id", filter=Q(answer=False)))
+        .order_by()
+    )
+    return {row["question_id"]: (row["yes"], row["no"]) for row in rows}
+
+
+def tally_election(election):
+    """
+    Calculate election results using district-reserved + at-large seat allocation.
+
+    If election has been closed (final_vote_count is set), uses stored results.
+    Otherwise calculates from live Vote/QuestionVote records.
+
+    Returns:
+        dict with keys:
+            - district_seats: list of dicts (district_num, winner, total_votes, district_votes)
+            - at_large_seats: list of tuples (nominee, total_votes)
+            - all_candidates: list of dicts, winners first
+            - question_results: list of tuples (question, yes_count, no_count)
+            - total_ballots: int
+            - eligible_voters_count: int
+            - district_turnout: list of dicts per district, plus "No District"
+    """
+    from facets.models import District as DistrictFacet
+
+    election.ensure_voter_roll()
+    closed = is_closed(election)
+
+    nominees = list(
+        Nominee.objects.filter(election=election)
+        .select_related("user")
+        .annotate(home_district_name=home_district_name())
+    )
+    if closed:
+        nominee_votes = {nominee: nominee.final_vote_count or 0 for nominee in nominees}
+        nominee_district_votes = defaultdict(Counter)
+        for nominee in nominees:
+            home = district_number(nominee.home_district_name)
+            if home:
+                nominee_district_votes[nominee.id][home] = nominee.final_district_vote_count or 0
+    else:
+        totals, nominee_district_votes = nominee_vote_counts(election)
+        nominee_votes = {
+            nominee: totals[nominee.id] for nominee in nominees if nominee.id in totals
+        }
+
+    nominee_home_districts = {
+        nominee.id: district_number(nominee.home_district_name) for nominee in nominee_votes
+    }
+
+    # Ballots cast by the voter's district on the voter roll
+    ballots_by_district = Counter()
+    for row in (
+        counted_ballots(election, closed)
+        .annotate(district_name=_voter_district_name(election, "voter"))
+        .values("district_name")
+        .annotate(ballots=Count("id"))
+        .order_by()
+    ):
+        ballots_by_district[district_number(row["district_name"])] += row["ballots"]
+    total_ballots = sum(ballots_by_district.values())
+
+    district_numbers = sorted(
+        {
+            num
+            for num in map(district_number, DistrictFacet.objects.values_list("name", flat=True))
+            if num is not None
+        }
+    )
+
+    # District seats: only in districts with enough voters, among nominees from the
+    # district who met the threshold of votes FROM the district, most TOTAL votes wins
+    district_seats = []
+    district_winners = set()
+    for district_num in district_numbers:
+        if ballots_by_district.get(district_num, 0) < election.district_seat_min_voters:
+            continue
+        candidates_for_district = [
+            (nominee, total_votes, nominee_district_votes[nominee.id][district_num])
+            for nominee, total_votes in nominee_votes.items()
+            if nominee_home_districts.get(nominee.id) == district_num
+            and nominee_district_votes[nominee.id][district_num] >= election.district_seat_min_votes
+        ]
+        if candidates_for_district:
+            winner, total_votes, district_votes = max(candidates_for_district, key=lambda x: x[1])
+            district_seats.append(
+                {
+                    "district_num": district_num,
+                    "winner": winner,
+                    "total_votes": total_votes,
+                    "district_votes": district_votes,
+                }
+            )
+            district_winners.add(winner)
+
+    # At-large seats from the remaining candidates
+    remaining_candidates = [
+        (nominee, count)
+        for nominee, count in nominee_votes.items()
+        if nominee not in district_winners
+    ]
+    remaining_candidates.sort(key=lambda x: x[1], reverse=True)
+    at_large_seats = remaining_candidates[: election.at_large_seats_count]
+    at_large_winners = {nominee for nominee, _ in at_large_seats}
+
+    all_candidates = []
+    for nominee, total_votes in nominee_votes.items():
+        district_num = nominee_home_districts.get(nominee.id)
+        seat_type = None
+        if nominee in district_winners:
+            seat_type = "district"
+        elif nominee in at_large_winners:
+            seat_type = "at_large"
+        all_candidates.append(
+            {
+                "nominee": nominee,
+                "total_votes": total_votes,
+                "district_num": district_num,
+                "district_votes": (
+                    nominee_district_votes[nominee.id].get(district_num, 0) if district_num else 0
+                ),
+                "seat_type": seat_type,
+            }
+        )
+
+    # District seats (by district number), at-large seats, then everyone else alphabetically
+    def sort_key(candidate):
+        if candidate["seat_type"] == "district":
+            return (0, candidate["district_num"] or 999, "")
+        elif candidate["seat_type"] == "at_large":
+            return (1, 0, candidate["nominee"].get_display_name().lower())
+        return (2, 0, candidate["nominee"].get_display_name().lower())
+
+    all_candidates.sort(key=sort_key)
+
+    questions = Question.objects.filter(election=election).order_by("order")
+    if closed:
+        question_results = [
+            (question, question.final_yes_votes or 0, question.final_no_votes or 0)
+            for question in questions
+        ]
+    else:
+        counts = question_vote_counts(election)
+        question_results = [(question, *counts.get(question.id, (0, 0))) for question in questions]
+
+    eligible_voters_by_district = election.district_voter_counts()
+    district_turnout = []
+    for district_num in [*range(1, 11), None]:
+        eligible = eligible_voters_by_district.get(district_num, 0)
+        ballots_cast = ballots_by_district.get(district_num, 0)
+        district_turnout.append(
+            {
+                "district_num": district_num,
+                "eligible_voters": eligible,
+                "ballots_cast": ballots_cast,
+                "turnout_rate": (ballots_cast / eligible * 100) if eligible > 0 else None,
+            }
+        )
+
+    return {
+        "district_seats": district_seats,
+        "at_large_seats": at_large_seats,
+        "all_candidates": all_candidates,
+        "question_results": question_results,
+        "total_ballots": total_ballots,
+        "eligible_voters_count": election.voter_count(),
+        "district_turnout": district_turnout,
+    }
+
+
+def results_cache_key(election, closed):
+    # created_at keeps keys unique if primary keys are ever reused
+    return (
+        f"election-results:v{RESULTS_VERSION}:{election.pk}:"
+        f"{election.created_at.timestamp()}:{'closed' if closed else 'live'}"
+    )
+
+
+def get_election_results(election):
+    """
+    Election results, cached once voting has closed and ballots can no longer
+    change. Closing (anonymizing) an election moves it to a new cache key.
+    """
+    if timezone.now() < election.voting_closes:
+        return tally_election(election)
+
+    key = results_cache_key(election, is_closed(election))
+    results = cache.get(key)
+    if results is None:
+        results = tally_election(election)
+        cache.set(key, results, RESULTS_CACHE_TIMEOUT)
+    return results
@@ -1,8 +1,9 @@
 from celery import shared_task
 from django.conf import settings
 from django.urls import reverse
+from django.utils import timezone
 
-from elections.models import Nomination, get_user_display_name
+from elections.models import Election, Nomination, get_user_display_name
 from pbaabp.email import send_email_message
 
 
@@ -77,3 +78,15 @@ Thank you for your participation!
     )
 
     return f"Sent nomination notification to {user.email} for {election.title}"
+
+
+@shared_task
+def freeze_voter_rolls():
+    """Freeze the voter roll of every election whose eligibility deadline has passed."""
+    frozen = []
+    for election in Election.objects.filter(
+        membership_eligibility_deadline__lte=timezone.now(), voter_roll_frozen_at__isnull=True
+    ):
+        election.ensure_voter_roll()
+        frozen.append(election.slug)
+    return f"Froze voter rolls for {', '.join(frozen) or 'no elections'}"
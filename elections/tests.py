@@ -230,6 +230,24 @@ class NominationModelTests(TestCase):
         # Still no email for self-nomination
         mock_send_email.assert_not_called()
 
+    @patch("elections.models.Nominee.send_notification_email")
+    def test_submitting_draft_does_not_refetch_nomination(self, mock_send_email):
+        """Saving a loaded nomination should only issue the UPDATE."""
+        nominee = Nominee.objects.create(election=self.election, user=self.user_b)
+        Nomination.objects.create(
+            nominee=nominee,
+            nominator=self.user_a,
+            nomination_statement="Draft statement",
+            draft=True,
+        )
+        nomination = Nomination.objects.select_related("nominee__user", "nominator").get()
+
+        nomination.draft = False
+        with self.assertNumQueries(1):
+            nomination.save()
+
+        mock_send_email.assert_called_once_with(nomination)
+
     def test_get_eligible_voters_returns_members_as_of_deadline(self):
         """get_eligible_voters() should return profiles who were members at the deadline."""
         from membership.models import Membership
@@ -298,6 +316,135 @@ class NominationModelTests(TestCase):
         self.assertNotIn(profile_c.id, eligible_ids)
         self.assertNotIn(profile_d.id, eligible_ids)
 
+    def test_nominee_slugs_are_unique_within_election(self):
+        """Nominees who'd share a slug get a numeric suffix, and keep it when saved again."""
+        namesake = User.objects.create_user(
+            username="alice_archer", email="archer@test.com", first_name="Alice", last_name="Archer"
+        )
+        first = Nominee.objects.create(election=self.election, user=self.user_a)
+        second = Nominee.objects.create(election=self.election, user=namesake)
+
+        self.assertEqual(first.slug, "alice-a")
+        self.assertEqual(second.slug, "alice-a-2")
+        second.save()
+        self.assertEqual(second.slug, "alice-a-2")
+
+        # A new display name gives a new slug
+        second.public_display_name = "Ali Archer"
+        second.save()
+        self.assertEqual(second.slug, "ali-archer")
+
+    def test_nominee_detail_found_by_stored_slug(self):
+        """The public nominee page finds the nominee by slug, including suffixed ones."""
+        namesake = User.objects.create_user(
+            username="alice_archer", email="archer@test.com", first_name="Alice", last_name="Archer"
+        )
+        for user in (self.user_a, namesake):
+            nominee = Nominee.objects.create(election=self.election, user=user)
+            Nomination.objects.create(nominee=nominee, nominator=user, draft=False)
+        self.election.nominations_close = timezone.now() - timedelta(days=1)
+        self.election.save()
+
+        response = self.client.get(
+            reverse(
+                "nominee_detail",
+                kwargs={"election_slug": self.election.slug, "nominee_slug": "alice-a-2"},
+            )
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["nominee"].user, namesake)
+
+        response = self.client.get(
+            reverse(
+                "nominee_detail",
+                kwargs={"election_slug": self.election.slug, "nominee_slug": "nobody-x"},
+            )
+        )
+        self.assertRedirects(
+            response, reverse("election_nominees", kwargs={"election_slug": self.election.slug})
+        )
+
+
+class VoterRollTests(TestCase):
+    """Test the materialized eligible voter roll."""
+
+    def setUp(self):
+        from membership.models import Membership
+        from profiles.models import Profile
+
+        now = timezone.now()
+        self.election = Election.objects.create(
+            title="Roll Election",
+            membership_eligibility_deadline=now - timedelta(days=30),
+            nominations_open=now - timedelta(days=21),
+            nominations_close=now - timedelta(days=14),
+            voting_opens=now - timedelta(days=1),
+            voting_closes=now + timedelta(days=7),
+        )
+        deadline = self.election.membership_eligibility_deadline
+
+        self.member = User.objects.create_user(username="member", email="member@test.com")
+        Profile.objects.create(user=self.member)
+        Membership.objects.create(
+            user=self.member,
+            kind=Membership.Kind.FISCAL,
+            start_date=(deadline - timedelta(days=60)).date(),
+            end_date=(deadline + timedelta(days=30)).date(),
+        )
+
+        self.late_joiner = User.objects.create_user(username="late", email="late@test.com")
+        Profile.objects.create(user=self.late_joiner)
+
+    def test_roll_is_frozen_after_deadline(self):
+        from membership.models import Membership
+
+        self.assertTrue(self.election.is_eligible_voter(self.member))
+        self.assertIsNotNone(self.election.voter_roll_frozen_at)
+        self.assertEqual(self.election.voter_count(), 1)
+
+        # Backdated memberships added after the roll froze don't change it
+        Membership.objects.create(
+            user=self.late_joiner,
+            kind=Membership.Kind.FISCAL,
+            start_date=(self.election.membership_eligibility_deadline - timedelta(days=5)).date(),
+            end_date=None,
+        )
+        self.assertFalse(self.election.is_eligible_voter(self.late_joiner))
+        with self.assertRaises(ValueError):
+            self.election.build_voter_roll()
+
+    def test_eligibility_check_is_a_single_query(self):
+        self.election.ensure_voter_roll()
+        with self.assertNumQueries(1):
+            self.assertTrue(self.election.is_eligible_voter(self.member))
+
+    def test_roll_can_be_recomputed_before_deadline(self):
+        self.election.membership_eligibility_deadline = timezone.now() + timedelta(days=1)
+        self.election.save()
+
+        self.election.build_voter_roll()
+        self.assertIsNone(self.election.voter_roll_frozen_at)
+        self.assertEqual(self.election.eligible_voters_count, self.election.eligible_voters.count())
+        self.assertFalse(self.election.ensure_voter_roll())
+
+    def test_district_voter_counts(self):
+        self.assertEqual(self.election.district_voter_counts(), {None: 1})
+
+    def test_district_voter_counts_are_live_before_deadline(self):
+        from membership.models import Membership
+
+        self.election.membership_eligibility_deadline = timezone.now() + timedelta(days=1)
+        self.election.save()
+        self.assertEqual(self.election.district_voter_counts(), {None: 1})
+        self.assertFalse(self.election.eligible_voters.exists())
+
+        Membership.objects.create(
+            user=self.late_joiner,
+            kind=Membership.Kind.FISCAL,
+            start_date=timezone.now().date() - timedelta(days=1),
+        )
+        self.assertEqual(self.election.district_voter_counts(), {None: 2})
+
 
 @override_settings(
     STORAGES={
@@ -938,11 +1085,11 @@ class VotingTests(TestCase):
             order=1,
         )
 
-    @patch("elections.models.Election.get_eligible_voters")
+    @patch("elections.models.Election.is_eligible_voter")
     def test_eligible_voter_can_vote(self, mock_eligible):
         """Eligible voters should be able to cast ballots."""
         # Mock eligibility check
-        mock_eligible.return_value = [self.voter.profile]
+        mock_eligible.return_value = True
 
         self.client.force_login(self.voter)
         response = self.client.get(
@@ -955,12 +1102,12 @@ class VotingTests(TestCase):
         self.assertContains(response, self.nominee2.first_name)
         self.assertContains(response, "Should we do the thing?")
 
-    @patch("elections.models.Election.get_eligible_voters")
+    @patch("elections.models.Election.is_eligible_voter")
     def test_ballot_submission(self, mock_eligible):
         """Voters should be able to submit ballots."""
         from elections.models import Ballot, QuestionVote, Vote
 
-        mock_eligible.return_value = [self.voter.profile]
+        mock_eligible.return_value = True
         self.client.force_login(self.voter)
 
         # Submit ballot
@@ -988,12 +1135,12 @@ class VotingTests(TestCase):
         self.assertEqual(question_votes.count(), 1)
         self.assertEqual(question_votes.first().answer, True)
 
-    @patch("elections.models.Election.get_eligible_voters")
+    @patch("elections.models.Election.is_eligible_voter")
     def test_ballot_can_be_updated(self, mock_eligible):
         """Voters should be able to change their votes."""
         from elections.models import Ballot, Vote
 
-        mock_eligible.return_value = [self.voter.profile]
+        mock_eligible.return_value = True
         self.client.force_login(self.voter)
 
         # Submit initial ballot
@@ -1025,6 +1172,71 @@ class VotingTests(TestCase):
         self.assertEqual(votes.count(), 1)
         self.assertEqual(votes.first().nominee, self.nominee_record2)
 
+    @patch("elections.models.Election.is_eligible_voter")
+    def test_ballot_update_only_touches_changed_votes(self, mock_eligible):
+        """Unchanged votes are kept, changed and removed votes are replaced."""
+        from elections.models import Ballot, QuestionVote, Vote
+
+        mock_eligible.return_value = True
+        self.client.force_login(self.voter)
+        url = reverse("election_vote", kwargs={"election_slug": self.election.slug})
+
+        self.client.post(
+            url,
+            {
+                "nominees": [str(self.nominee_record1.id), str(self.nominee_record2.id)],
+                f"question_{self.question.id}": "yes",
+            },
+        )
+        ballot = Ballot.objects.get(election=self.election, voter=self.voter)
+        kept_vote = Vote.objects.get(ballot=ballot, nominee=self.nominee_record1)
+
+        self.client.post(
+            url,
+            {
+                "nominees": [str(self.nominee_record1.id), "not-a-uuid"],
+                f"question_{self.question.id}": "no",
+            },
+        )
+
+        votes = Vote.objects.filter(ballot=ballot)
+        self.assertEqual([vote.pk for vote in votes], [kept_vote.pk])
+        self.assertEqual(QuestionVote.objects.get(ballot=ballot).answer, False)
+
+    @patch("elections.models.Election.is_eligible_voter")
+    def test_voting_booth_query_count_does_not_grow(self, mock_eligible):
+        """Rendering the voting booth takes the same queries for any number of nominees."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from elections.directory import invalidate_nominee_directory
+        from profiles.models import Profile
+
+        mock_eligible.return_value = True
+        self.client.force_login(self.voter)
+        url = reverse("election_vote", kwargs={"election_slug": self.election.slug})
+        self.client.get(url)
+
+        # Both requests rebuild the nominee directory rather than reading the cache
+        invalidate_nominee_directory(self.election.pk)
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(url)
+
+        for i in range(3):
+            user = User.objects.create_user(username=f"extra{i}", email=f"extra{i}@test.com")
+            Profile.objects.create(user=user, street_address=f"{i} Pine St", zip_code="19123")
+            nominee = Nominee.objects.create(election=self.election, user=user)
+            Nomination.objects.create(
+                nominee=nominee,
+                nominator=user,
+                acceptance_status=Nomination.AcceptanceStatus.ACCEPTED,
+            )
+
+        invalidate_nominee_directory(self.election.pk)
+        with CaptureQueriesContext(connection) as after:
+            self.client.get(url)
+        self.assertEqual(len(after), len(before))
+
     def test_voting_not_open_yet(self):
         """Users should not be able to vote before voting opens."""
         # Create election with voting not yet open
@@ -1046,7 +1258,7 @@ class VotingTests(TestCase):
         # Should redirect with error
         self.assertEqual(response.status_code, 302)
 
-    @patch("elections.models.Election.get_eligible_voters")
+    @patch("elections.models.Election.is_eligible_voter")
     def test_staff_can_preview_before_voting_opens(self, mock_eligible):
         """Staff users should be able to preview the voting booth before voting opens."""
         # Create election with voting not yet open
@@ -1069,7 +1281,7 @@ class VotingTests(TestCase):
         )
 
         # Mock eligibility check
-        mock_eligible.return_value = [self.voter.profile]
+        mock_eligible.return_value = True
 
         # Make voter a staff user
         self.voter.is_staff = True
@@ -1087,7 +1299,7 @@ class VotingTests(TestCase):
         self.assertContains(response, "Future Election")
         self.assertContains(response, self.nominee1.first_name)
 
-    @patch("elections.models.Election.get_eligible_voters")
+    @patch("elections.models.Election.is_eligible_voter")
     def test_preview_mode_does_not_save_ballots(self, mock_eligible):
         """Preview mode should not save ballots to the database."""
         from elections.models import Ballot
@@ -1112,7 +1324,7 @@ class VotingTests(TestCase):
         )
 
         # Mock eligibility check
-        mock_eligible.return_value = [self.voter.profile]
+        mock_eligible.return_value = True
 
         # Make voter a staff user
         self.voter.is_staff = True
@@ -1134,7 +1346,7 @@ class VotingTests(TestCase):
         # Should redirect back to preview
         self.assertEqual(response.status_code, 302)
 
-    @patch("elections.models.Election.get_eligible_voters")
+    @patch("elections.models.Election.is_eligible_voter")
     def test_eligible_voters_can_preview(self, mock_eligible):
         """Eligible voters should be able to use preview mode."""
         # Create election with voting not yet open
@@ -1157,7 +1369,7 @@ class VotingTests(TestCase):
         )
 
         # Mock eligibility check
-        mock_eligible.return_value = [self.voter.profile]
+        mock_eligible.return_value = True
 
         # User is logged in and eligible
         self.client.force_login(self.voter)
@@ -1202,11 +1414,11 @@ class VotingTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Results")
 
-    @patch("elections.models.Election.get_eligible_voters")
+    @patch("elections.models.Election.is_eligible_voter")
     def test_empty_ballots_not_counted_in_turnout(self, mock_eligible):
         """Empty ballots (with no votes) should not be counted in voter turnout."""
         from elections.models import Ballot, QuestionVote, Vote
-        from elections.views import calculate_election_results
+        from elections.tally import tally_election
         from profiles.models import Profile
 
         # Create 2 additional voters
@@ -1236,10 +1448,238 @@ class VotingTests(TestCase):
         Ballot.objects.create(election=self.election, voter=voter3)
 
         # Calculate results
-        results = calculate_election_results(self.election)
+        results = tally_election(self.election)
 
         # Should count only 2 ballots (ballot1 and ballot2), not ballot3
         self.assertEqual(results["total_ballots"], 2)
 
         # Verify all 3 ballots exist in database
         self.assertEqual(Ballot.objects.filter(election=self.election).count(), 3)
+
+
+class TallyTests(TestCase):
+    """Pin election results from the tally engine against a worked example."""
+
+    def setUp(self):
+        from django.contrib.gis.geos import MultiPolygon, Point, Polygon
+
+        from elections.models import Ballot, Question, QuestionVote, Vote
+        from facets.models import District
+        from membership.models import Membership
+        from profiles.models import Profile
+
+        District.objects.create(
+            name="District 1",
+            mpoly=MultiPolygon(Polygon(((0, 0), (0, 1), (1, 1), (1, 0), (0, 0)), srid=4326)),
+            properties={},
+        )
+        District.objects.create(
+            name="District 2",
+            mpoly=MultiPolygon(Polygon(((2, 0), (2, 1), (3, 1), (3, 0), (2, 0)), srid=4326)),
+            properties={},
+        )
+        locations = {1: Point(0.5, 0.5, srid=4326), 2: Point(2.5, 0.5, srid=4326)}
+
+        now = timezone.now()
+        self.election = Election.objects.create(
+            title="Tally Election",
+            membership_eligibility_deadline=now - timedelta(days=30),
+            nominations_open=now - timedelta(days=28),
+            nominations_close=now - timedelta(days=21),
+            voting_opens=now - timedelta(days=7),
+            voting_closes=now - timedelta(hours=1),
+            at_large_seats_count=1,
+            district_seat_min_votes=2,
+            district_seat_min_voters=2,
+        )
+        deadline = self.election.membership_eligibility_deadline
+
+        def make_user(name, district=None, member=True):
+            user = User.objects.create_user(
+                username=name, email=f"{name}@test.com", first_name=name.title(), last_name="T"
+            )
+            Profile.objects.create(
+                user=user,
+                street_address="1 Main St" if district else None,
+                zip_code="19123",
+                location=locations.get(district),
+            )
+            if member:
+                Membership.objects.create(
+                    user=user,
+                    kind=Membership.Kind.FISCAL,
+                    start_date=(deadline - timedelta(days=60)).date(),
+                    end_date=None,
+                )
+            return user
+
+        self.nominee_a = Nominee.objects.create(
+            election=self.election, user=make_user("alice", district=1, member=False)
+        )
+        self.nominee_b = Nominee.objects.create(
+            election=self.election, user=make_user("bob", district=2, member=False)
+        )
+        self.nominee_c = Nominee.objects.create(
+            election=self.election, user=make_user("carol", member=False)
+        )
+        self.question = Question.objects.create(
+            election=self.election, question_text="Should we?", order=1
+        )
+
+        ballots = [
+            ("v1", 1, [self.nominee_a, self.nominee_b], True),
+            ("v2", 1, [self.nominee_a, self.nominee_c], False),
+            ("v3", 1, [self.nominee_c], True),
+            ("v4", 2, [self.nominee_b, self.nominee_c], None),
+            ("v5", None, [self.nominee_b], None),
+            ("v6", None, [self.nominee_c], None),
+            ("v7", None, [], None),  # empty ballot, not counted
+        ]
+        for name, district, nominees, answer in ballots:
+            ballot = Ballot.objects.create(
+                election=self.election, voter=make_user(name, district=district)
+            )
+            for nominee in nominees:
+                Vote.objects.create(ballot=ballot, nominee=nominee)
+            if answer is not None:
+                QuestionVote.objects.create(ballot=ballot, question=self.question, answer=answer)
+
+    def assertPinnedResults(self, results):
+        self.assertEqual(results["total_ballots"], 6)
+        self.assertEqual(results["eligible_voters_count"], 7)
+
+        self.assertEqual(
+            [(s["district_num"], s["winner"], s["total_votes"]) for s in results["district_seats"]],
+            [(1, self.nominee_a, 2)],
+        )
+        self.assertEqual(results["at_large_seats"], [(self.nominee_c, 4)])
+        self.assertEqual(
+            [
+                (c["nominee"], c["total_votes"], c["district_num"], c["seat_type"])
+                for c in results["all_candidates"]
+            ],
+            [
+                (self.nominee_a, 2, 1, "district"),
+                (self.nominee_c, 4, None, "at_large"),
+                (self.nominee_b, 3, 2, None),
+            ],
+        )
+        self.assertEqual(results["question_results"], [(self.question, 2, 1)])
+
+        turnout = {row["district_num"]: row for row in results["district_turnout"]}
+        self.assertEqual((turnout[1]["eligible_voters"], turnout[1]["ballots_cast"]), (3, 3))
+        self.assertEqual((turnout[2]["eligible_voters"], turnout[2]["ballots_cast"]), (1, 1))
+        self.assertEqual((turnout[None]["eligible_voters"], turnout[None]["ballots_cast"]), (3, 2))
+
+    def test_live_results(self):
+        from elections.tally import tally_election
+
+        results = tally_election(self.election)
+        self.assertPinnedResults(results)
+        district_votes = {c["nominee"]: c["district_votes"] for c in results["all_candidates"]}
+        self.assertEqual(district_votes, {self.nominee_a: 2, self.nominee_b: 1, self.nominee_c: 0})
+
+    def test_results_survive_closing_the_election(self):
+        from unittest.mock import Mock
+
+        from elections.admin import close_election
+        from elections.models import Vote
+        from elections.tally import tally_election
+
+        close_election(Mock(), None, Election.objects.filter(pk=self.election.pk))
+
+        self.assertFalse(Vote.objects.filter(ballot__election=self.election).exists())
+        self.nominee_a.refresh_from_db()
+        self.assertEqual(
+            (self.nominee_a.final_vote_count, self.nominee_a.final_district_vote_count), (2, 2)
+        )
+        self.assertPinnedResults(tally_election(self.election))
+
+    def test_query_count_does_not_grow_with_ballots(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from elections.models import Ballot, Vote
+        from elections.tally import tally_election
+
+        self.election.ensure_voter_roll()
+        with CaptureQueriesContext(connection) as before:
+            tally_election(self.election)
+
+        for i in range(5):
+            voter = User.objects.create_user(username=f"extra{i}", email=f"extra{i}@test.com")
+            ballot = Ballot.objects.create(election=self.election, voter=voter)
+            Vote.objects.create(ballot=ballot, nominee=self.nominee_b)
+
+        with CaptureQueriesContext(connection) as after:
+            tally_election(self.election)
+        self.assertEqual(len(after), len(before))
+
+
+class NomineeSearchTests(TestCase):
+    """The nominee typeahead searches the trigram-indexed search entries."""
+
+    def setUp(self):
+        from allauth.socialaccount.models import SocialAccount
+
+        from membership.models import Membership
+        from profiles.models import Profile
+
+        self.member = User.objects.create_user(
+            username="zoe_member",
+            email="zoe.member@example.com",
+            first_name="Zoë",
+            last_name="Quimby",
+            password="testpass123",
+        )
+        self.non_member = User.objects.create_user(
+            username="zoe_other", email="zoe.other@example.com", first_name="Zoe", last_name="Quill"
+        )
+        for user in (self.member, self.non_member):
+            Profile.objects.create(user=user, street_address="1 Test St", zip_code="19123")
+        Membership.objects.create(
+            user=self.member,
+            kind=Membership.Kind.FISCAL,
+            start_date=(timezone.now() - timedelta(days=60)).date(),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            SocialAccount.objects.create(
+                user=self.member,
+                provider="discord",
+                uid="5150",
+                extra_data={"username": "ZQ_Bikes"},
+            )
+        self.client.force_login(self.member)
+
+    def search(self, query):
+        response = self.client.get(reverse("nominee_search"), {"q": query})
+        return response.context["users"]
+
+    def test_only_members_match_without_accents(self):
+        results = self.search("zoe")
+        self.assertEqual([r["id"] for r in results], [self.member.id])
+        self.assertEqual(results[0]["display_name"], "Zoë Q.")
+        self.assertEqual(results[0]["discord_handle"], "ZQ_Bikes")
+        self.assertNotIn("name", results[0])
+
+    def test_matches_discord_handle(self):
+        self.assertEqual([r["id"] for r in self.search("@zq_b")], [self.member.id])
+
+    def test_renaming_updates_the_entry(self):
+        self.assertEqual(self.search("quimby")[0]["id"], self.member.id)
+        self.member.last_name = "Rhodes"
+        self.member.save()
+        self.assertEqual(self.search("quimby"), [])
+        self.assertEqual(self.search("rhodes")[0]["display_name"], "Zoë R.")
+
+    def test_longer_query_refines_cached_results(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from elections.search import search_members
+
+        search_members("zo")
+        with CaptureQueriesContext(connection) as queries:
+            results = search_members("zoe q")
+        self.assertEqual(len(queries), 0)
+        self.assertEqual([r["id"] for r in results], [self.member.id])
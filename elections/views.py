@@ -1,11 +1,13 @@
+import uuid
+
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.db.models import Q
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone
 
+from elections.directory import get_nominee_directory, shuffled_nominee_directory
 from elections.forms import NominationForm, NomineeProfileForm
 from elections.models import (
     Ballot,
@@ -17,6 +19,8 @@ from elections.models import (
     Vote,
     get_user_display_name,
 )
+from elections.search import search_members
+from elections.tally import get_election_results
 
 
 @login_required
@@ -240,8 +244,7 @@ def election_detail(request, election_slug):
 
         # Check if user is eligible to vote
         if election.is_voting_open() and hasattr(request.user, "profile"):
-            eligible_voters = election.get_eligible_voters()
-            can_vote = request.user.profile in eligible_voters
+            can_vote = election.is_eligible_voter(request.user)
 
     return render(
         request,
@@ -265,38 +268,8 @@ def election_nominees(request, election_slug):
         messages.info(request, "Nominees will be visible after nominations close.")
         return redirect("election_detail", election_slug=election.slug)
 
-    # Get nominee IDs who have accepted at least one nomination
-    nominee_ids = (
-        Nominee.objects.filter(
-            election=election,
-            nominations__acceptance_status=Nomination.AcceptanceStatus.ACCEPTED,
-            nominations__draft=False,
-        )
-        .values_list("id", flat=True)
-        .distinct()
-    )
-
-    # Fetch the nominees in random order
-    nominees = (
-        Nominee.objects.filter(id__in=nominee_ids)
-        .select_related("user", "user__profile")
-        .prefetch_related("nominations__nominator")
-        .order_by("?")  # Random order
-    )
-
-    # Filter to get only accepted nominations for each nominee
-    # Sort so self-nominations appear first
-    for nominee in nominees:
-        accepted = nominee.nominations.filter(
-            acceptance_status=Nomination.AcceptanceStatus.ACCEPTED, draft=False
-        ).select_related("nominator")
-
-        # Separate self-nominations and other nominations
-        self_noms = [n for n in accepted if n.nominator == nominee.user]
-        other_noms = [n for n in accepted if n.nominator != nominee.user]
-
-        # Combine with self-nominations first
-        nominee.accepted_nominations = self_noms + other_noms
+    # Nominees with at least one accepted nomination, in random order
+    nominees = shuffled_nominee_directory(election)
 
     return render(
         request,
@@ -314,38 +287,11 @@ def nominee_detail(request, election_slug, nominee_slug):
         messages.info(request, "Nominees will be visible after nominations close.")
         return redirect("election_detail", election_slug=election.slug)
 
-    # Find the nominee by matching the slug
-    # We need to check all nominees with accepted nominations
-    nominees = (
-        Nominee.objects.filter(
-            election=election,
-            nominations__acceptance_status=Nomination.AcceptanceStatus.ACCEPTED,
-            nominations__draft=False,
-        )
-        .distinct()
-        .select_related("user", "user__profile")
-        .prefetch_related("nominations__nominator")
-    )
-
-    nominee = None
-    for n in nominees:
-        if n.get_slug() == nominee_slug:
-            nominee = n
-            break
-
+    nominee = next((n for n in get_nominee_directory(election) if n.slug == nominee_slug), None)
     if not nominee:
         messages.error(request, "Nominee not found.")
         return redirect("election_nominees", election_slug=election.slug)
 
-    # Get accepted nominations, sorted with self-nominations first
-    accepted = nominee.nominations.filter(
-        acceptance_status=Nomination.AcceptanceStatus.ACCEPTED, draft=False
-    ).select_related("nominator")
-
-    self_noms = [n for n in accepted if n.nominator == nominee.user]
-    other_noms = [n for n in accepted if n.nominator != nominee.user]
-    nominee.accepted_nominations = self_noms + other_noms
-
     return render(
         request,
         "elections/nominee_detail.html",
@@ -465,36 +411,11 @@ def nominee_search(request):
     if not query or len(query) < 2:
         return render(request, "elections/nominee_search_results.html", {"users": []})
 
-    # Search by name or Discord username (not email for privacy)
-    users = (
-        User.objects.filter(profile__isnull=False)
-        .filter(
-            Q(first_name__icontains=query)
-            | Q(last_name__icontains=query)
-            | Q(socialaccount__extra_data__username__icontains=query)
-        )
-        .distinct()
-        .select_related("profile")[:10]
-    )
+    # Search by name or Discord username (not email for privacy), members only.
+    # Results hold only what the frontend needs: first name + last initial + discord
+    users = search_members(query)
 
-    # Filter to only members and create sanitized data structure
-    eligible_users = []
-    for user in users:
-        if user.profile.membership():
-            # Include Discord handle if available (OK in authenticated context)
-            discord = user.socialaccount_set.filter(provider="discord").first()
-            discord_handle = discord.extra_data.get("username") if discord else None
-
-            # Only send necessary data to frontend (no email, first name + last initial + discord)
-            eligible_users.append(
-                {
-                    "id": user.id,
-                    "display_name": get_user_display_name(user),
-                    "discord_handle": discord_handle,
-                }
-            )
-
-    return render(request, "elections/nominee_search_results.html", {"users": eligible_users})
+    return render(request, "elections/nominee_search_results.html", {"users": users})
 
 
 @login_required
@@ -572,8 +493,7 @@ def vote(request, election_slug):
         return redirect("profile")
 
     # Check if user was eligible as of the membership eligibility deadline
-    eligible_voters = election.get_eligible_voters()
-    if request.user.profile not in eligible_voters:
+    if not election.is_eligible_voter(request.user):
         messages.error(
             request,
             f"You must have been a member in good standing as of "
@@ -594,54 +514,14 @@ def vote(request, election_slug):
                 messages.error(request, "Voting has closed for this election.")
             return redirect("profile")
 
-    # Get eligible nominees (accepted at least one nomination)
-    # First get the IDs of nominees with accepted nominations
-    eligible_nominee_ids = (
-        Nominee.objects.filter(
-            election=election,
-            nominations__acceptance_status=Nomination.AcceptanceStatus.ACCEPTED,
-            nominations__draft=False,
-        )
-        .values_list("id", flat=True)
-        .distinct()
-    )
-    # Then get the full nominee objects and randomize order
-    nominees = (
-        Nominee.objects.filter(id__in=eligible_nominee_ids)
-        .select_related("user__profile")
-        .order_by("?")  # Random order
-    )
+    # Eligible nominees (accepted at least one nomination) in random order
+    nominees = shuffled_nominee_directory(election)
 
     # Get questions for this election
     questions = Question.objects.filter(election=election).order_by("order")
 
     # Calculate available seats (district seats only count if district has enough voters)
-    # Use the already-fetched eligible_voters from above
-    eligible_voters_qs = eligible_voters
-
-    # Count voters per district (districts 1-10)
-    from collections import Counter
-
-    district_voter_counts = Counter()
-    for profile in eligible_voters_qs:
-        district = profile.district
-        if district:
-            # Extract district number from name (e.g., "District 5" -> 5)
-            import re
-
-            match = re.search(r"\d+", district.name)
-            if match:
-                district_num = int(match.group())
-                district_voter_counts[district_num] += 1
-
-    # Get list of activated districts
-    activated_districts = sorted(
-        [
-            district_num
-            for district_num, count in district_voter_counts.items()
-            if count >= election.district_seat_min_voters
-        ]
-    )
+    activated_districts = election.activated_districts()
     activated_district_seats = len(activated_districts)
     total_available_seats = activated_district_seats + election.at_large_seats_count
 
@@ -664,26 +544,37 @@ def vote(request, election_slug):
         ballot, ballot_created = Ballot.objects.get_or_create(election=election, voter=request.user)
 
         if request.method == "POST":
-            # Clear existing votes (allow changes)
-            ballot.candidate_votes.all().delete()
-            ballot.question_votes.all().delete()
-
-            # Process candidate votes
-            nominee_ids = request.POST.getlist("nominees")
-            for nominee_id in nominee_ids:
+            # Apply only the changes from the existing votes (votes can be changed)
+            submitted_ids = set()
+            for nominee_id in request.POST.getlist("nominees"):
                 try:
-                    nominee = nominees.get(id=nominee_id)
-                    Vote.objects.create(ballot=ballot, nominee=nominee)
-                except Nominee.DoesNotExist:
+                    submitted_ids.add(uuid.UUID(nominee_id))
+                except ValueError:
                     pass
+            selected_ids = submitted_ids & {nominee.id for nominee in nominees}
+            existing_ids = set(ballot.candidate_votes.values_list("nominee_id", flat=True))
+            if existing_ids - selected_ids:
+                ballot.candidate_votes.filter(nominee_id__in=existing_ids - selected_ids).delete()
+            Vote.objects.bulk_create(
+                Vote(ballot=ballot, nominee_id=nominee_id)
+                for nominee_id in selected_ids - existing_ids
+            )
 
-            # Process question votes
+            answers = {}
             for question in questions:
                 answer_value = request.POST.get(f"question_{question.id}")
                 if answer_value in ["yes", "no"]:
-                    QuestionVote.objects.create(
-                        ballot=ballot, question=question, answer=(answer_value == "yes")
-                    )
+                    answers[question.id] = answer_value == "yes"
+            existing_answers = dict(ballot.question_votes.values_list("question_id", "answer"))
+            # Changed answers are replaced, so they're both deleted and created
+            stale = {q for q, answer in existing_answers.items() if answers.get(q) != answer}
+            if stale:
+                ballot.question_votes.filter(question_id__in=stale).delete()
+            QuestionVote.objects.bulk_create(
+                QuestionVote(ballot=ballot, question_id=question_id, answer=answer)
+                for question_id, answer in answers.items()
+                if existing_answers.get(question_id) != answer
+            )
 
             messages.success(
                 request,
@@ -724,8 +615,7 @@ def election_results(request, election_slug):
         messages.error(request, "Results will be available after voting closes.")
         return redirect("profile")
 
-    # Calculate results
-    results = calculate_election_results(election)
+    results = get_election_results(election)
 
     return render(
         request,
@@ -741,306 +631,3 @@ def election_results(request, election_slug):
             "district_turnout": results["district_turnout"],
         },
     )
-
-
-def calculate_election_results(election):
-    """
-    Calculate election results using district-reserved + at-large seat allocation.
-
-    If election has been closed (final_vote_count is set), uses stored results.
-    Otherwise calculates from live Vote/QuestionVote records.
-
-    Returns:
-        dict with keys:
-            - district_seats: list of tuples (district_num, nominee, votes_from_district)
-            - at_large_seats: list of tuples (nominee, total_votes)
-            - question_results: list of tuples (question, yes_count, no_count)
-            - total_ballots: int
-    """
-    import re
-    from collections import Counter, defaultdict
-
-    from django.db.models import Count, Q
-
-    # Compile regex once for reuse
-    DISTRICT_NUM_REGEX = re.compile(r"\d+")
-
-    # Check if election has been closed (anonymized)
-    election_closed = Nominee.objects.filter(
-        election=election, final_vote_count__isnull=False
-    ).exists()
-
-    if election_closed:
-        # Use stored results from closed election
-        ballots = Ballot.objects.filter(election=election, had_votes=True).select_related(
-            "voter__profile"
-        )
-        total_ballots = ballots.count()
-
-        # Get nominee votes from stored data
-        nominee_votes = {}
-        nominee_district_votes = defaultdict(lambda: defaultdict(int))
-
-        for nominee in Nominee.objects.filter(election=election).select_related("user__profile"):
-            nominee_votes[nominee] = nominee.final_vote_count or 0
-
-            # Get nominee's district number
-            nominee_district = nominee.user.profile.district
-            if nominee_district:
-                match = DISTRICT_NUM_REGEX.search(nominee_district.name)
-                if match:
-                    nominee_district_num = int(match.group())
-                    nominee_district_votes[nominee][nominee_district_num] = (
-                        nominee.final_district_vote_count or 0
-                    )
-    else:
-        # Calculate from live Vote records
-        # Get all ballots with optimized queries
-        # Only count ballots that have at least one answer (candidate vote OR question vote)
-        ballots = (
-            Ballot.objects.filter(election=election)
-            .select_related("voter__profile")
-            .prefetch_related("candidate_votes__nominee__user__profile", "question_votes")
-            .annotate(
-                num_candidate_votes=Count("candidate_votes"),
-                num_question_votes=Count("question_votes"),
-            )
-            .filter(Q(num_candidate_votes__gt=0) | Q(num_question_votes__gt=0))
-        )
-        total_ballots = ballots.count()
-
-        # Count votes for each nominee
-        nominee_votes = Counter()
-        # Track votes by district for each nominee
-        nominee_district_votes = defaultdict(lambda: defaultdict(int))
-
-        for ballot in ballots:
-            voter_profile = ballot.voter.profile
-            voter_district = voter_profile.district
-
-            # Get district number (extract from "District 5" -> 5)
-            voter_district_num = None
-            if voter_district:
-                match = DISTRICT_NUM_REGEX.search(voter_district.name)
-                if match:
-                    voter_district_num = int(match.group())
-
-            # Count votes for each nominee (using prefetched data)
-            for vote in ballot.candidate_votes.all():
-                nominee = vote.nominee
-                nominee_votes[nominee] += 1
-
-                # Track district-specific votes if voter has a district
-                if voter_district_num:
-                    nominee_district_votes[nominee][voter_district_num] += 1
-
-    # Calculate district seats
-    district_seats = []
-    district_winners = set()
-
-    # Get all district numbers from DistrictFacet
-    from facets.models import District as DistrictFacet
-
-    district_numbers = []
-    for district_facet in DistrictFacet.objects.all():
-        match = DISTRICT_NUM_REGEX.search(district_facet.name)
-        if match:
-            district_numbers.append(int(match.group()))
-    district_numbers = sorted(set(district_numbers))  # Remove duplicates and sort
-
-    # Pre-calculate district info for ballots and nominees to avoid repeated iterations
-    ballot_districts = {}
-    for ballot in ballots:
-        voter_district = ballot.voter.profile.district
-        if voter_district:
-            match = DISTRICT_NUM_REGEX.search(voter_district.name)
-            if match:
-                ballot_districts[ballot.id] = int(match.group())
-
-    nominee_home_districts = {}
-    for nominee in nominee_votes:
-        nominee_district = nominee.user.profile.district
-        if nominee_district:
-            match = DISTRICT_NUM_REGEX.search(nominee_district.name)
-            if match:
-                nominee_home_districts[nominee.id] = int(match.group())
-
-    # Count voters by district
-    voters_by_district = Counter(ballot_districts.values())
-
-    for district_num in district_numbers:
-        voters_in_district = voters_by_district.get(district_num, 0)
-
-        # Only allocate district seat if enough voters
-        if voters_in_district >= election.district_seat_min_voters:
-            # Find candidates from this district who meet minimum vote threshold
-            candidates_for_district = []
-            for nominee in nominee_votes:
-                # Check if nominee is from this district
-                if nominee_home_districts.get(nominee.id) == district_num:
-                    district_vote_count = nominee_district_votes[nominee][district_num]
-                    # Must meet threshold of votes FROM district
-                    if district_vote_count >= election.district_seat_min_votes:
-                        # But winner determined by TOTAL votes (from all voters)
-                        total_votes = nominee_votes[nominee]
-                        candidates_for_district.append((nominee, total_votes, district_vote_count))
-
-            # Select winner (most TOTAL votes, among those who met district threshold)
-            if candidates_for_district:
-                winner, total_votes, district_votes = max(
-                    candidates_for_district, key=lambda x: x[1]
-                )
-                district_seats.append(
-                    {
-                        "district_num": district_num,
-                        "winner": winner,
-                        "total_votes": total_votes,
-                        "district_votes": district_votes,
-                    }
-                )
-                district_winners.add(winner)
-
-    # Calculate at-large seats (from remaining candidates)
-    remaining_candidates = [
-        (nominee, count)
-        for nominee, count in nominee_votes.items()
-        if nominee not in district_winners
-    ]
-    remaining_candidates.sort(key=lambda x: x[1], reverse=True)
-    at_large_seats = remaining_candidates[: election.at_large_seats_count]
-    at_large_winners = {nominee for nominee, _ in at_large_seats}
-
-    # Compile all candidates with results
-    all_candidates = []
-    for nominee, total_votes in nominee_votes.items():
-        # Use pre-calculated district number
-        district_num = nominee_home_districts.get(nominee.id)
-
-        # Determine seat type (if won)
-        seat_type = None
-        if nominee in district_winners:
-            seat_type = "district"
-        elif nominee in at_large_winners:
-            seat_type = "at_large"
-
-        all_candidates.append(
-            {
-                "nominee": nominee,
-                "total_votes": total_votes,
-                "district_num": district_num,
-                "district_votes": (
-                    nominee_district_votes[nominee].get(district_num, 0) if district_num else 0
-                ),
-                "seat_type": seat_type,
-            }
-        )
-
-    # Sort: district seats (by district number),
-    # at-large seats (alphabetically),
-    # then losers (alphabetically)
-    def sort_key(candidate):
-        if candidate["seat_type"] == "district":
-            # District winners first, sorted by district number
-            return (0, candidate["district_num"] or 999, "")
-        elif candidate["seat_type"] == "at_large":
-            # At-large winners second, sorted alphabetically
-            return (1, 0, candidate["nominee"].get_display_name().lower())
-        else:
-            # Non-winners last, sorted alphabetically
-            return (2, 0, candidate["nominee"].get_display_name().lower())
-
-    all_candidates.sort(key=sort_key)
-
-    # Calculate question results
-    question_results = []
-    if election_closed:
-        # Use stored results
-        for question in Question.objects.filter(election=election).order_by("order"):
-            yes_count = question.final_yes_votes or 0
-            no_count = question.final_no_votes or 0
-            question_results.append((question, yes_count, no_count))
-    else:
-        # Calculate from live votes - use aggregation to get both counts
-        # in single query per question
-        from django.db.models import Case, IntegerField, Sum, When
-
-        for question in Question.objects.filter(election=election).order_by("order"):
-            vote_counts = QuestionVote.objects.filter(question=question).aggregate(
-                yes_count=Sum(
-                    Case(When(answer=True, then=1), default=0, output_field=IntegerField())
-                ),
-                no_count=Sum(
-                    Case(When(answer=False, then=1), default=0, output_field=IntegerField())
-                ),
-            )
-            yes_count = vote_counts["yes_count"] or 0
-            no_count = vote_counts["no_count"] or 0
-            question_results.append((question, yes_count, no_count))
-
-    # Get eligible voters - call once and cache
-    eligible_voters = election.get_eligible_voters()
-    eligible_voters_count = eligible_voters.count()
-
-    # Calculate district-level turnout statistics
-    # Count eligible voters by district
-    eligible_voters_by_district = Counter()
-    for profile in eligible_voters:
-        district = profile.district
-        if district:
-            match = DISTRICT_NUM_REGEX.search(district.name)
-            if match:
-                district_num = int(match.group())
-                eligible_voters_by_district[district_num] += 1
-            else:
-                eligible_voters_by_district[None] += 1
-        else:
-            eligible_voters_by_district[None] += 1
-
-    # Count ballots cast by district - use pre-calculated ballot_districts
-    ballots_by_district = Counter()
-    for ballot in ballots:
-        district_num = ballot_districts.get(ballot.id)
-        if district_num:
-            ballots_by_district[district_num] += 1
-        else:
-            ballots_by_district[None] += 1
-
-    # Build district turnout list (districts 1-10 plus "No District")
-    district_turnout = []
-    for district_num in range(1, 11):
-        eligible = eligible_voters_by_district.get(district_num, 0)
-        ballots_cast = ballots_by_district.get(district_num, 0)
-        turnout_rate = (ballots_cast / eligible * 100) if eligible > 0 else None
-        district_turnout.append(
-            {
-                "district_num": district_num,
-                "eligible_voters": eligible,
-                "ballots_cast": ballots_cast,
-                "turnout_rate": turnout_rate,
-            }
-        )
-
-    # Add "No District" row
-    eligible_no_district = eligible_voters_by_district.get(None, 0)
-    ballots_no_district = ballots_by_district.get(None, 0)
-    turnout_no_district = (
-        (ballots_no_district / eligible_no_district * 100) if eligible_no_district > 0 else None
-    )
-    district_turnout.append(
-        {
-            "district_num": None,
-            "eligible_voters": eligible_no_district,
-            "ballots_cast": ballots_no_district,
-            "turnout_rate": turnout_no_district,
-        }
-    )
-
-    return {
-        "district_seats": district_seats,
-        "at_large_seats": at_large_seats,
-        "all_candidates": all_candidates,
-        "question_results": question_results,
-        "total_ballots": total_ballots,
-        "eligible_voters_count": eligible_voters_count,
-        "district_turnout": district_turnout,
-    }
@@ -11,6 +11,7 @@ from interactions.models.discord.enums import ScheduledEventStatus
 from events.tasks import sync_to_mailjet
 from facets.models import District, RegisteredCommunityOrganization
 from lib.slugify import unique_slugify
+from pbaabp.models import ChangeTrackingMixin
 
 
 class ScheduledEvent(models.Model):
@@ -93,7 +94,9 @@ class EventRSVP(models.Model):
     email = models.EmailField(null=True, blank=True)
 
 
-class EventSignIn(models.Model):
+class EventSignIn(ChangeTrackingMixin, models.Model):
+    untracked_fields = ("id", "event", "mailjet_contact_id")
+
     class District(models.IntegerChoices):
         NO_DISTRICT = 0, "N/A - I do not live in Philadelphia"
         DISTRICT_1 = 1, "District 1"
@@ -131,20 +134,7 @@ class EventSignIn(models.Model):
     newsletter_opt_in = models.BooleanField(blank=False, default=False)
 
     def save(self, *args, **kwargs):
-        if not self._state.adding:
-            old_model = EventSignIn.objects.get(pk=self.pk)
-            change_fields = [
-                f.name
-                for f in EventSignIn._meta._get_fields()
-                if f.name not in ["id", "event", "mailjet_contact_id"]
-            ]
-            modified = False
-            for i in change_fields:
-                if getattr(old_model, i, None) != getattr(self, i, None):
-                    modified = True
-            if modified:
-                transaction.on_commit(lambda: sync_to_mailjet.delay(self.id))
-        else:
+        if self.has_changed():
             transaction.on_commit(lambda: sync_to_mailjet.delay(self.id))
         super(EventSignIn, self).save(*args, **kwargs)
 
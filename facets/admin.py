@@ -1,11 +1,22 @@
 import csv
+import datetime
 
 from django.contrib import admin
-from django.db.models import Q
-from django.db.models.functions import Length
-from django.http import HttpResponse
+from django.db.models import (
+    Case,
+    Exists,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Length
 from django.template.response import TemplateResponse
 from django.urls import path, reverse
+from django.utils import timezone
 
 from facets.forms import COLUMN_CHOICES, CSVColumnSelectForm
 from facets.models import (
@@ -17,8 +28,10 @@ from facets.models import (
     Ward,
     ZipCode,
 )
+from membership.status import annotate_membership
 from pbaabp.admin import ReadOnlyLeafletGeoAdminMixin, organizer_admin
-from profiles.models import Profile
+from pbaabp.streaming import streaming_csv_response
+from profiles.models import DiscordActivity, Profile
 
 COLUMN_ACCESSORS = {
     "first_name": lambda p: p.user.first_name,
@@ -29,12 +42,58 @@ COLUMN_ACCESSORS = {
     "zip_code": lambda p: p.zip_code or "",
     "newsletter_opt_in": lambda p: p.newsletter_opt_in,
     "created_at": lambda p: p.created_at.strftime("%Y-%m-%d %H:%M"),
-    "district": lambda p: str(p.district) if p.district else "",
-    "membership": lambda p: p.membership(),
-    "donor": lambda p: p.donor(),
-    "discord_active": lambda p: p.discord_active(),
-    "discord_messages_last_30": lambda p: p.discord_messages_last_30(),
-    "is_organizer": lambda p: p.is_organizer,
+    "district": lambda p: p.district_name or "",
+    "membership": lambda p: p.is_member,
+    "donor": lambda p: p.via_donation,
+    "discord_active": lambda p: p.via_discord,
+    "discord_messages_last_30": lambda p: p.discord_messages_30d,
+    "is_organizer": lambda p: p.organizes_district,
+}
+
+
+def _load_district(profiles):
+    # Mirrors Profile.district, which requires a street address and location
+    district = District.objects.filter(mpoly__contains=OuterRef("location")).values("name")[:1]
+    return profiles.annotate(
+        district_name=Case(
+            When(street_address__isnull=True, then=Value(None)),
+            default=Subquery(district),
+        )
+    )
+
+
+def _load_membership(profiles):
+    return annotate_membership(profiles, user_ref="user")
+
+
+def _load_discord_messages(profiles):
+    thirty_days_ago = timezone.now().date() - datetime.timedelta(days=30)
+    total = (
+        DiscordActivity.objects.filter(profile=OuterRef("pk"), date__gte=thirty_days_ago)
+        .values("profile")
+        .annotate(total=Sum("count"))
+        .values("total")
+    )
+    return profiles.annotate(
+        discord_messages_30d=Coalesce(Subquery(total, output_field=IntegerField()), Value(0))
+    )
+
+
+def _load_is_organizer(profiles):
+    return profiles.annotate(
+        organizes_district=Exists(District.objects.filter(organizers=OuterRef("pk")))
+    )
+
+
+# Columns that need more than the profile and user rows are resolved for the
+# whole export in the same query, rather than once per profile.
+COLUMN_LOADERS = {
+    "district": _load_district,
+    "membership": _load_membership,
+    "donor": _load_membership,
+    "discord_active": _load_membership,
+    "discord_messages_last_30": _load_discord_messages,
+    "is_organizer": _load_is_organizer,
 }
 
 
@@ -45,15 +104,30 @@ def _build_profiles_queryset(facets):
     return Profile.objects.filter(q).distinct().select_related("user")
 
 
+class _Echo:
+    """File-like object for csv.writer that hands each row back instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
 def _build_csv_response(profiles, selected_columns):
     column_labels = dict(COLUMN_CHOICES)
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = 'attachment; filename="profiles_export.csv"'
-    writer = csv.writer(response)
-    writer.writerow([column_labels[col] for col in selected_columns])
-    for profile in profiles:
-        writer.writerow([COLUMN_ACCESSORS[col](profile) for col in selected_columns])
-    return response
+    loaders = dict.fromkeys(
+        COLUMN_LOADERS[col] for col in selected_columns if col in COLUMN_LOADERS
+    )
+    for loader in loaders:
+        profiles = loader(profiles)
+
+    writer = csv.writer(_Echo())
+
+    def rows():
+        yield writer.writerow([column_labels[col] for col in selected_columns])
+        # iterator() uses a server-side cursor, so large facets aren't held in memory
+        for profile in profiles.iterator(chunk_size=2000):
+            yield writer.writerow([COLUMN_ACCESSORS[col](profile) for col in selected_columns])
+
+    return streaming_csv_response(rows(), "profiles_export.csv")
 
 
 class FacetAdmin(ReadOnlyLeafletGeoAdminMixin, admin.ModelAdmin):
@@ -170,11 +244,7 @@ class RegisteredCommunityOrganizationAdmin(FacetAdmin):
 
     def zip_code_names(self, obj):
         return ", ".join(
-            [
-                z.name
-                for z in obj.intersecting_zips.all()
-                if z.mpoly.intersection(obj.mpoly).area / z.mpoly.area > 0.01
-            ]
+            obj.overlapping(ZipCode, min_target_ratio=0.01).values_list("name", flat=True)
         )
 
     def zip_codes(self, obj):
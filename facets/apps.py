@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class FacetsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "facets"
+
+    def ready(self):
+        import facets.signals  # noqa: F401
@@ -0,0 +1,102 @@
+"""
+Heatmap points for petition signatures and Laser reports.
+
+Each point is moved by a small deterministic jitter, so exact locations
+aren't published but a point lands in the same place every time. The jitter
+(and optional binning) is computed in the database, and points are returned
+as float32 arrays that are base64 encoded for the page.
+"""
+
+import base64
+import sys
+from array import array
+
+from django.db.models import Avg, BigIntegerField, Count, F, FloatField, Func, TextField, Value
+from django.db.models.functions import Cast, Floor, Mod
+
+# (modulus, span in degrees) for each axis; jitter is up to half the span either way
+LAT_JITTER = (2179, 0.000287)
+LNG_JITTER = (2803, 0.000358)
+
+# Width in screen pixels of a bin at the requested zoom level
+BIN_PIXELS = 4
+
+
+class _Hash32(Func):
+    """A stable 32-bit hash of the expressions, from the first 8 hex digits of their md5."""
+
+    template = "('x' || substr(md5(concat_ws('-', %(expressions)s)), 1, 8))::bit(32)::bigint"
+    output_field = BigIntegerField()
+
+
+def _jitter(hash_, modulus, span):
+    return (Cast(Mod(hash_, Value(modulus)), FloatField()) / modulus - 0.5) * span
+
+
+def jittered_points(queryset, location, salt):
+    """
+    Annotate ``heat_lat`` and ``heat_lng``: the point field ``location``
+    jittered by a hash of ``salt`` and the point.
+    """
+    lat = Func(F(location), function="ST_Y", output_field=FloatField())
+    lng = Func(F(location), function="ST_X", output_field=FloatField())
+    return (
+        queryset.filter(**{f"{location}__isnull": False})
+        .alias(heat_hash=_Hash32(Cast(salt, TextField()), lat, lng))
+        .annotate(
+            heat_lat=lat + _jitter(F("heat_hash"), *LAT_JITTER),
+            heat_lng=lng + _jitter(F("heat_hash"), *LNG_JITTER),
+        )
+    )
+
+
+def bin_size(zoom):
+    """Degrees of longitude covered by BIN_PIXELS at a web map zoom level."""
+    return 360 / (256 * 2**zoom) * BIN_PIXELS
+
+
+def build_heatmap(queryset, location="location", salt="pk", zoom=None):
+    """
+    Jittered heatmap points for the rows of ``queryset`` with a ``location``.
+
+    Without ``zoom`` there's one point of weight 1 per row. With ``zoom``,
+    points are binned into a grid a few pixels wide at that zoom and each bin
+    is one point, at the mean of its points, weighted by how many it holds.
+
+    Returns a dict of float32 arrays: "lat", "lng" and "weight".
+    """
+    points = jittered_points(queryset, location, salt)
+    heatmap = {"lat": array("f"), "lng": array("f"), "weight": array("f")}
+    if zoom is None:
+        for lat, lng in points.values_list("heat_lat", "heat_lng").order_by():
+            heatmap["lat"].append(lat)
+            heatmap["lng"].append(lng)
+        heatmap["weight"] = array("f", [1.0]) * len(heatmap["lat"])
+        return heatmap
+
+    size = bin_size(zoom)
+    bins = (
+        points.values(bin_lat=Floor(F("heat_lat") / size), bin_lng=Floor(F("heat_lng") / size))
+        .annotate(lat=Avg("heat_lat"), lng=Avg("heat_lng"), weight=Count("*"))
+        .values_list("lat", "lng", "weight")
+        .order_by()
+    )
+    for lat, lng, weight in bins:
+        heatmap["lat"].append(lat)
+        heatmap["lng"].append(lng)
+        heatmap["weight"].append(weight)
+    return heatmap
+
+
+def encode_heatmap(heatmap):
+    """
+    JSON-ready heatmap: the point count and each array as base64 little-endian
+    float32s, for decodeHeatmap in static/js/heatmap.js.
+    """
+    encoded = {"count": len(heatmap["lat"])}
+    for name, values in heatmap.items():
+        if sys.byteorder == "big":
+            values = array("f", values)
+            values.byteswap()
+        encoded[name] = base64.b64encode(values.tobytes()).decode()
+    return encoded
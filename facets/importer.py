@@ -0,0 +1,321 @@
+import csv
+import io
+import json
+import pathlib
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from facets.overlaps import refresh_overlaps
+
+DATA_DIR = pathlib.Path(__file__).parent / "data"
+
+STAGING_TABLE = "facets_import_staging"
+
+# Names of features that were skipped, which don't count as stale
+SKIPPED_TABLE = "facets_import_skipped"
+
+# Features sent to the staging table per COPY
+COPY_CHUNK_SIZE = 1000
+
+
+def iter_features(path, chunk_size=1024 * 1024):
+    """
+    Yield the features of a GeoJSON FeatureCollection one at a time without
+    loading the whole document into memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    in_features = False
+
+    with open(path) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            buffer += chunk
+            if not in_features:
+                key = buffer.find('"features"')
+                start = buffer.find("[", key) if key != -1 else -1
+                if start == -1:
+                    if not chunk:
+                        return
+                    continue
+                buffer = buffer[start + 1 :]
+                in_features = True
+
+            while True:
+                buffer = buffer.lstrip().lstrip(",").lstrip()
+                if buffer.startswith("]"):
+                    return
+                try:
+                    feature, end = decoder.raw_decode(buffer)
+                except json.JSONDecodeError:
+                    break
+                yield feature
+                buffer = buffer[end:]
+
+            if not chunk:
+                if buffer.strip():
+                    raise ValueError(f"Truncated GeoJSON feature collection in {path}")
+                return
+
+
+class FacetImportResult:
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.deleted = 0
+        self.skipped = 0
+        self.overlaps = {}
+        self.seconds = 0.0
+
+
+class FacetImporter:
+    """
+    Set-based loader for a Facet model.
+
+    Features are streamed from the GeoJSON file into a temporary staging table
+    with COPY, then applied to the facet table with one UPDATE, one INSERT and
+    (optionally) one stale DELETE inside a single transaction. A dry run performs
+    the same work and rolls it back.
+    """
+
+    def __init__(self, model, path, row_for_feature, extra_columns=None, stdout=None):
+        self.model = model
+        self.path = path
+        self.row_for_feature = row_for_feature
+        self.extra_columns = extra_columns or []
+        self.stdout = stdout
+        self.table = connection.ops.quote_name(model._meta.db_table)
+        self.targetable_default = model._meta.get_field("targetable").default
+
+    def _log(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+
+    def _create_staging(self, cursor):
+        extra = "".join(f", {column} uuid" for column in self.extra_columns)
+        cursor.execute(
+            f"""
+            CREATE TEMPORARY TABLE {STAGING_TABLE} (
+                seq integer NOT NULL,
+                id uuid NOT NULL,
+                name varchar(128) NOT NULL,
+                geometry text NOT NULL,
+                properties jsonb NOT NULL{extra}
+            ) ON COMMIT DROP
+            """
+        )
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {SKIPPED_TABLE} (name varchar(128) NOT NULL) ON COMMIT DROP"
+        )
+
+    def _copy_rows(self, cursor, table, columns, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        cursor.copy_expert(
+            f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '')", buffer
+        )
+
+    def _copy_features(self, cursor, result):
+        columns = ["seq", "id", "name", "geometry", "properties", *self.extra_columns]
+        rows, skipped = [], []
+        for seq, feature in enumerate(iter_features(self.path)):
+            row = self.row_for_feature(feature["properties"])
+            if row is None or row[1] is None:
+                result.skipped += 1
+                if row is not None:
+                    skipped.append([row[0]])
+                continue
+            name, extra = row
+            rows.append(
+                [
+                    seq,
+                    uuid.uuid4(),
+                    name,
+                    json.dumps(feature["geometry"]),
+                    json.dumps(feature["properties"]),
+                    *[extra.get(column) or "" for column in self.extra_columns],
+                ]
+            )
+            # COPY in chunks so a large file is never held in memory as a whole
+            if len(rows) == COPY_CHUNK_SIZE:
+                self._copy_rows(cursor, STAGING_TABLE, columns, rows)
+                rows = []
+        self._copy_rows(cursor, STAGING_TABLE, columns, rows)
+        self._copy_rows(cursor, SKIPPED_TABLE, ["name"], skipped)
+        # When a name appears more than once the last feature wins, as it did with
+        # update_or_create.
+        cursor.execute(
+            f"""
+            DELETE FROM {STAGING_TABLE} a USING {STAGING_TABLE} b
+            WHERE a.name = b.name AND a.seq < b.seq
+            """
+        )
+
+    def _names(self, cursor, sql):
+        cursor.execute(sql)
+        return [name for (name,) in cursor.fetchall()]
+
+    def staged(self, cursor, sql, params=None):
+        """Run a query against the staged rows, for command specific checks."""
+        cursor.execute(sql.format(staging=STAGING_TABLE, table=self.table), params)
+        return cursor.fetchall()
+
+    def run(self, dry_run=False, delete_stale=False, verbose=False, check=None):
+        result = FacetImportResult()
+        started = time.monotonic()
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            self._create_staging(cursor)
+            self._copy_features(cursor, result)
+
+            if check is not None:
+                check(self, cursor)
+
+            created = self._names(
+                cursor,
+                f"""
+                SELECT s.name FROM {STAGING_TABLE} s
+                WHERE NOT EXISTS (SELECT 1 FROM {self.table} t WHERE t.name = s.name)
+                ORDER BY s.seq
+                """,
+            )
+            stale = self._names(
+                cursor,
+                f"""
+                SELECT t.name FROM {self.table} t
+                WHERE NOT EXISTS (SELECT 1 FROM {STAGING_TABLE} s WHERE s.name = t.name)
+                  AND NOT EXISTS (SELECT 1 FROM {SKIPPED_TABLE} k WHERE k.name = t.name)
+                ORDER BY t.name
+                """,
+            )
+            if verbose:
+                updated = self._names(
+                    cursor,
+                    f"""
+                    SELECT s.name FROM {STAGING_TABLE} s
+                    WHERE EXISTS (SELECT 1 FROM {self.table} t WHERE t.name = s.name)
+                    ORDER BY s.seq
+                    """,
+                )
+                for name in updated:
+                    self._log(f"{'Would update' if dry_run else 'Updating'} {name}")
+                for name in created:
+                    self._log(f"{'Would create' if dry_run else 'Creating'} {name}")
+
+            extra_set = "".join(f", {column} = s.{column}" for column in self.extra_columns)
+            cursor.execute(
+                f"""
+                UPDATE {self.table} t
+                SET mpoly = ST_Multi(ST_SetSRID(ST_GeomFromGeoJSON(s.geometry), 4326)),
+                    properties = s.properties{extra_set}
+                FROM {STAGING_TABLE} s
+                WHERE t.name = s.name
+                """
+            )
+            result.updated = cursor.rowcount
+
+            extra_columns = "".join(f", {column}" for column in self.extra_columns)
+            extra_values = "".join(f", s.{column}" for column in self.extra_columns)
+            cursor.execute(
+                f"""
+                INSERT INTO {self.table} (id, name, mpoly, properties, targetable{extra_columns})
+                SELECT s.id, s.name,
+                       ST_Multi(ST_SetSRID(ST_GeomFromGeoJSON(s.geometry), 4326)),
+                       s.properties, %s{extra_values}
+                FROM {STAGING_TABLE} s
+                WHERE NOT EXISTS (SELECT 1 FROM {self.table} t WHERE t.name = s.name)
+                """,
+                [self.targetable_default],
+            )
+            result.created = cursor.rowcount
+
+            if delete_stale and stale:
+                if verbose:
+                    for name in stale:
+                        self._log(f"{'Would delete' if dry_run else 'Deleting'} {name}")
+                # Go through the ORM so cascades to related rows are honoured.
+                self.model.objects.filter(name__in=stale).delete()
+                result.deleted = len(stale)
+
+            result.overlaps = refresh_overlaps(self.model)
+
+            if dry_run:
+                transaction.set_rollback(True)
+
+        result.seconds = time.monotonic() - started
+        return result
+
+
+class FacetImportCommand(BaseCommand):
+    """
+    Base class for the load_* facet commands. Subclasses set ``model`` and
+    ``geojson_filename`` and implement ``row_for_feature``.
+    """
+
+    model = None
+    geojson_filename = None
+    extra_columns = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Preview what would be created or updated without making changes",
+        )
+        parser.add_argument(
+            "--delete-stale",
+            action="store_true",
+            help=f"Delete {self.model._meta.verbose_name_plural} not present in the GeoJSON file",
+        )
+
+    def row_for_feature(self, properties):
+        """
+        Return ``(name, extra_columns)`` for a feature. Return ``(name, None)``
+        to skip it while keeping any existing facet of that name, or None to
+        skip it outright.
+        """
+        raise NotImplementedError
+
+    def prepare(self, dry_run):
+        """Hook run before importing. Return False to abort."""
+        return True
+
+    def check(self, importer, cursor):
+        """Hook run against the staged rows before they are applied."""
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING("DRY RUN - no changes will be made"))
+
+        if self.prepare(dry_run) is False:
+            return
+
+        importer = FacetImporter(
+            self.model,
+            DATA_DIR / self.geojson_filename,
+            self.row_for_feature,
+            extra_columns=self.extra_columns,
+            stdout=self.stdout,
+        )
+        result = importer.run(
+            dry_run=dry_run,
+            delete_stale=options["delete_stale"],
+            verbose=dry_run or options["verbosity"] > 1,
+            check=self.check,
+        )
+
+        if not dry_run:
+            for pair, count in result.overlaps.items():
+                self.stdout.write(f"Refreshed {pair} overlaps: {count}")
+
+        summary = f"{result.created} created, {result.updated} updated, {result.deleted} deleted"
+        if result.skipped:
+            summary += f", {result.skipped} skipped"
+        prefix = "Dry run" if dry_run else "Done"
+        self.stdout.write(self.style.SUCCESS(f"{prefix}: {summary} in {result.seconds:.2f}s"))
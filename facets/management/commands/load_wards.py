@@ -1,97 +1,11 @@
-import json
-import pathlib
-
-from django.contrib.gis.geos import GEOSGeometry, MultiPolygon
-from django.core.management.base import BaseCommand
-
+from facets.importer import FacetImportCommand
 from facets.models import Ward
 
 
-class Command(BaseCommand):
+class Command(FacetImportCommand):
     help = "Load or update Wards from GeoJSON"
+    model = Ward
+    geojson_filename = "Political_Wards.geojson"
 
-    def add_arguments(self, parser):
-        parser.add_argument(
-            "--dry-run",
-            action="store_true",
-            help="Preview what would be created or updated without making changes",
-        )
-        parser.add_argument(
-            "--delete-stale",
-            action="store_true",
-            help="Delete Wards not present in the GeoJSON file",
-        )
-
-    def handle(self, *args, **options):
-        dry_run = options["dry_run"]
-        delete_stale = options["delete_stale"]
-        geojson_path = (
-            pathlib.Path(__file__).parent.parent.parent / "data" / "Political_Wards.geojson"
-        )
-
-        with open(geojson_path) as f:
-            data = json.load(f)
-
-        if dry_run:
-            self.stdout.write(self.style.WARNING("DRY RUN - no changes will be made"))
-
-        created_count = 0
-        updated_count = 0
-        file_names = set()
-
-        for feature in data["features"]:
-            props = feature["properties"]
-            ward_num = int(props["ward_num"])
-            name = f"Political Ward {ward_num}"
-            file_names.add(name)
-
-            existing = Ward.objects.filter(name=name).first()
-
-            if dry_run:
-                action = "Would update" if existing else "Would create"
-                if existing:
-                    updated_count += 1
-                else:
-                    created_count += 1
-                self.stdout.write(f"{action} {name}")
-                continue
-
-            geojson = json.dumps(feature["geometry"])
-            geos_geom = GEOSGeometry(geojson)
-
-            if geos_geom.geom_type == "Polygon":
-                geos_geom = MultiPolygon(geos_geom)
-
-            ward, created = Ward.objects.update_or_create(
-                name=name,
-                defaults={
-                    "mpoly": geos_geom,
-                    "properties": props,
-                },
-            )
-
-            if created:
-                created_count += 1
-            else:
-                updated_count += 1
-
-            action = "Created" if created else "Updated"
-            self.stdout.write(f"{action} {ward.name}")
-
-        deleted_count = 0
-        if delete_stale:
-            stale = Ward.objects.exclude(name__in=file_names)
-            for ward in stale:
-                if dry_run:
-                    self.stdout.write(f"Would delete {ward.name}")
-                else:
-                    self.stdout.write(f"Deleted {ward.name}")
-                deleted_count += 1
-            if not dry_run:
-                stale.delete()
-
-        self.stdout.write(
-            self.style.SUCCESS(
-                f"Done: {created_count} created, {updated_count} updated, {deleted_count} deleted"
-            )
-        )
+    def row_for_feature(self, properties):
+        return f"Political Ward {int(properties['ward_num'])}", {}
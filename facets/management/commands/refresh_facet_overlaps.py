@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from facets.overlaps import refresh_overlaps
+
+
+class Command(BaseCommand):
+    help = "Recompute the precomputed overlap table between facet types"
+
+    def handle(self, *args, **options):
+        counts = refresh_overlaps()
+        for pair, count in counts.items():
+            self.stdout.write(f"{pair}: {count} overlaps")
+        self.stdout.write(self.style.SUCCESS("Done"))
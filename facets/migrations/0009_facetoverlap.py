@@ -0,0 +1,109 @@
+# Generated by Django 5.1.15 on 2026-10-19 14:02
+
+from django.db import migrations, models
+
+# The pairs as they stood when this migration was written: (source, target, kinds)
+OVERLAP_PAIRS = [
+    ("RegisteredCommunityOrganization", "ZipCode", "rco", "zip"),
+    ("RegisteredCommunityOrganization", "District", "rco", "district"),
+    ("Ward", "District", "ward", "district"),
+    ("Division", "District", "division", "district"),
+]
+
+
+def populate_overlaps(apps, schema_editor):
+    quote = schema_editor.connection.ops.quote_name
+    overlap_table = quote(apps.get_model("facets", "FacetOverlap")._meta.db_table)
+    with schema_editor.connection.cursor() as cursor:
+        for source, target, source_kind, target_kind in OVERLAP_PAIRS:
+            source_table = quote(apps.get_model("facets", source)._meta.db_table)
+            target_table = quote(apps.get_model("facets", target)._meta.db_table)
+            cursor.execute(
+                f"""
+                INSERT INTO {overlap_table}
+                    (source_kind, source_id, target_kind, target_id, source_ratio, target_ratio)
+                SELECT %s, a.id, %s, b.id,
+                       COALESCE(overlap.area / NULLIF(ST_Area(a.mpoly), 0), 0),
+                       COALESCE(overlap.area / NULLIF(ST_Area(b.mpoly), 0), 0)
+                FROM {source_table} a
+                JOIN {target_table} b ON ST_Intersects(a.mpoly, b.mpoly)
+                CROSS JOIN LATERAL
+                    (SELECT ST_Area(ST_Intersection(a.mpoly, b.mpoly)) AS area) overlap
+                """,
+                [source_kind, target_kind],
+            )
+            cursor.execute(
+                f"""
+                INSERT INTO {overlap_table}
+                    (source_kind, source_id, target_kind, target_id, source_ratio, target_ratio)
+                SELECT target_kind, target_id, source_kind, source_id, target_ratio, source_ratio
+                FROM {overlap_table}
+                WHERE source_kind = %s AND target_kind = %s
+                """,
+                [source_kind, target_kind],
+            )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("facets", "0008_alter_division_options_alter_ward_options"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FacetOverlap",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "source_kind",
+                    models.CharField(
+                        choices=[
+                            ("district", "Council District"),
+                            ("rco", "Registered Community Organization"),
+                            ("zip", "Zip Code"),
+                            ("ward", "Political Ward"),
+                            ("division", "Political Division"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                ("source_id", models.UUIDField()),
+                (
+                    "target_kind",
+                    models.CharField(
+                        choices=[
+                            ("district", "Council District"),
+                            ("rco", "Registered Community Organization"),
+                            ("zip", "Zip Code"),
+                            ("ward", "Political Ward"),
+                            ("division", "Political Division"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                ("target_id", models.UUIDField()),
+                (
+                    "source_ratio",
+                    models.FloatField(help_text="Share of the source facet's area in the overlap"),
+                ),
+                (
+                    "target_ratio",
+                    models.FloatField(help_text="Share of the target facet's area in the overlap"),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("source_kind", "source_id", "target_kind", "target_id"),
+                        name="unique_facet_overlap",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_overlaps, migrations.RunPython.noop),
+    ]
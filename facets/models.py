@@ -6,6 +6,9 @@ from relativity.fields import L, Relationship
 
 
 class Facet(models.Model):
+    # Identifier used for this facet type in FacetOverlap rows
+    overlap_kind = None
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=128)
     mpoly = models.MultiPolygonField()
@@ -33,8 +36,27 @@ class Facet(models.Model):
             return True
         return self.name > other.name
 
+    def overlapping(self, model, min_ratio=None, min_target_ratio=None):
+        """
+        Facets of type ``model`` that overlap this one, read from the precomputed
+        FacetOverlap table.
+
+        ``min_ratio`` filters on the share of *this* facet's area covered by the
+        other facet, ``min_target_ratio`` on the share of the other facet's area.
+        """
+        overlaps = FacetOverlap.objects.filter(
+            source_kind=self.overlap_kind, source_id=self.id, target_kind=model.overlap_kind
+        )
+        if min_ratio is not None:
+            overlaps = overlaps.filter(source_ratio__gt=min_ratio)
+        if min_target_ratio is not None:
+            overlaps = overlaps.filter(target_ratio__gt=min_target_ratio)
+        return model.objects.filter(id__in=overlaps.values("target_id"))
+
 
 class District(Facet):
+    overlap_kind = "district"
+
     intersecting_rcos = Relationship(
         to="facets.registeredcommunityorganization", predicate=Q(mpoly__intersects=L("mpoly"))
     )
@@ -46,6 +68,8 @@ class District(Facet):
 
 
 class RegisteredCommunityOrganization(Facet):
+    overlap_kind = "rco"
+
     intersecting_zips = Relationship(to="facets.zipcode", predicate=Q(mpoly__intersects=L("mpoly")))
     intersecting_districts = Relationship(
         to="facets.district", predicate=Q(mpoly__intersects=L("mpoly"))
@@ -53,14 +77,12 @@ class RegisteredCommunityOrganization(Facet):
 
     @property
     def zips(self):
-        return [
-            z
-            for z in self.intersecting_zips.all()
-            if z.mpoly.intersection(self.mpoly).area / self.mpoly.area > 0.001
-        ]
+        return list(self.overlapping(ZipCode, min_ratio=0.001))
 
 
 class ZipCode(Facet):
+    overlap_kind = "zip"
+
     intersecting_rcos = Relationship(
         to="facets.registeredcommunityorganization", predicate=Q(mpoly__intersects=L("mpoly"))
     )
@@ -75,14 +97,53 @@ class StateSenateDistrict(Facet):
 
 
 class Ward(Facet):
+    overlap_kind = "ward"
+
     class Meta:
         verbose_name = "Political Ward"
         verbose_name_plural = "Political Wards"
 
 
 class Division(Facet):
+    overlap_kind = "division"
+
     ward = models.ForeignKey(Ward, on_delete=models.CASCADE, related_name="divisions", null=True)
 
     class Meta:
         verbose_name = "Political Division"
         verbose_name_plural = "Political Divisions"
+
+
+class FacetOverlap(models.Model):
+    """
+    Precomputed area overlap between two facets.
+
+    Rows are written in both directions by ``facets.overlaps.refresh_overlaps``,
+    so looking up everything overlapping a facet is a single indexed query on
+    (source_kind, source_id, target_kind).
+    """
+
+    class Kind(models.TextChoices):
+        DISTRICT = "district", "Council District"
+        RCO = "rco", "Registered Community Organization"
+        ZIP = "zip", "Zip Code"
+        WARD = "ward", "Political Ward"
+        DIVISION = "division", "Political Division"
+
+    source_kind = models.CharField(max_length=16, choices=Kind.choices)
+    source_id = models.UUIDField()
+    target_kind = models.CharField(max_length=16, choices=Kind.choices)
+    target_id = models.UUIDField()
+    source_ratio = models.FloatField(help_text="Share of the source facet's area in the overlap")
+    target_ratio = models.FloatField(help_text="Share of the target facet's area in the overlap")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["source_kind", "source_id", "target_kind", "target_id"],
+                name="unique_facet_overlap",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.source_kind}:{self.source_id} -> {self.target_kind}:{self.target_id}"
@@ -0,0 +1,113 @@
+from django.db import connection, transaction
+from django.db.models import Q
+
+from facets.models import (
+    District,
+    Division,
+    FacetOverlap,
+    RegisteredCommunityOrganization,
+    Ward,
+    ZipCode,
+)
+
+# Pairs of facet types whose overlaps we precompute. Each pair is stored in both
+# directions so either side can be looked up with the same index.
+OVERLAP_PAIRS = [
+    (RegisteredCommunityOrganization, ZipCode),
+    (RegisteredCommunityOrganization, District),
+    (Ward, District),
+    (Division, District),
+]
+
+# Every intersecting pair is stored, including pairs that only touch (area 0),
+# matching the mpoly__intersects relationships the overlaps replace.
+_INSERT_SQL = """
+    INSERT INTO {overlap_table}
+        (source_kind, source_id, target_kind, target_id, source_ratio, target_ratio)
+    SELECT %s, a.id, %s, b.id,
+           COALESCE(overlap.area / NULLIF(ST_Area(a.mpoly), 0), 0),
+           COALESCE(overlap.area / NULLIF(ST_Area(b.mpoly), 0), 0)
+    FROM {source_table} a
+    JOIN {target_table} b ON ST_Intersects(a.mpoly, b.mpoly)
+    CROSS JOIN LATERAL (SELECT ST_Area(ST_Intersection(a.mpoly, b.mpoly)) AS area) overlap
+    {where}
+"""
+
+_MIRROR_SQL = """
+    INSERT INTO {overlap_table}
+        (source_kind, source_id, target_kind, target_id, source_ratio, target_ratio)
+    SELECT target_kind, target_id, source_kind, source_id, target_ratio, source_ratio
+    FROM {overlap_table}
+    WHERE source_kind = %s AND target_kind = %s {where}
+"""
+
+
+def _refresh_pair(cursor, source_model, target_model, facet=None):
+    """
+    Insert the overlaps of a pair in both directions, only those involving
+    ``facet`` if it's given. Existing rows must already have been deleted.
+    """
+    source_kind = source_model.overlap_kind
+    target_kind = target_model.overlap_kind
+    overlap_table = connection.ops.quote_name(FacetOverlap._meta.db_table)
+
+    where, mirror_where, params = "", "", []
+    if facet is not None:
+        side = "a" if isinstance(facet, source_model) else "b"
+        column = "source_id" if side == "a" else "target_id"
+        where, mirror_where, params = f"WHERE {side}.id = %s", f"AND {column} = %s", [facet.id]
+
+    cursor.execute(
+        _INSERT_SQL.format(
+            overlap_table=overlap_table,
+            source_table=connection.ops.quote_name(source_model._meta.db_table),
+            target_table=connection.ops.quote_name(target_model._meta.db_table),
+            where=where,
+        ),
+        [source_kind, target_kind, *params],
+    )
+    count = cursor.rowcount
+    cursor.execute(
+        _MIRROR_SQL.format(overlap_table=overlap_table, where=mirror_where),
+        [source_kind, target_kind, *params],
+    )
+    return count
+
+
+def _pairs(model):
+    return [pair for pair in OVERLAP_PAIRS if model is None or model in pair]
+
+
+def refresh_overlaps(model=None):
+    """
+    Recompute FacetOverlap rows in PostGIS.
+
+    When ``model`` is given only the pairs involving that facet type are rebuilt,
+    otherwise all pairs are. Returns a dict of overlap counts keyed by pair.
+    """
+    counts = {}
+    with transaction.atomic(), connection.cursor() as cursor:
+        for source_model, target_model in _pairs(model):
+            source_kind, target_kind = source_model.overlap_kind, target_model.overlap_kind
+            FacetOverlap.objects.filter(
+                Q(source_kind=source_kind, target_kind=target_kind)
+                | Q(source_kind=target_kind, target_kind=source_kind)
+            ).delete()
+            key = f"{source_kind}/{target_kind}"
+            counts[key] = _refresh_pair(cursor, source_model, target_model)
+    return counts
+
+
+def delete_facet_overlaps(facet):
+    FacetOverlap.objects.filter(
+        Q(source_kind=facet.overlap_kind, source_id=facet.id)
+        | Q(target_kind=facet.overlap_kind, target_id=facet.id)
+    ).delete()
+
+
+def refresh_facet_overlaps(facet):
+    """Recompute the overlaps of a single facet, e.g. after it's edited in the admin."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        delete_facet_overlaps(facet)
+        for source_model, target_model in _pairs(type(facet)):
+            _refresh_pair(cursor, source_model, target_model, facet=facet)
@@ -0,0 +1,29 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from facets.models import District, Division, RegisteredCommunityOrganization, Ward, ZipCode
+from facets.overlaps import delete_facet_overlaps, refresh_facet_overlaps
+
+# Bulk imports (facets.importer) bypass these and refresh whole facet types instead
+
+
+@receiver(post_save, sender=District, dispatch_uid="district_overlaps_post_save")
+@receiver(post_save, sender=Division, dispatch_uid="division_overlaps_post_save")
+@receiver(post_save, sender=RegisteredCommunityOrganization, dispatch_uid="rco_overlaps_post_save")
+@receiver(post_save, sender=Ward, dispatch_uid="ward_overlaps_post_save")
+@receiver(post_save, sender=ZipCode, dispatch_uid="zip_code_overlaps_post_save")
+def facet_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(lambda: refresh_facet_overlaps(instance))
+
+
+@receiver(post_delete, sender=District, dispatch_uid="district_overlaps_post_delete")
+@receiver(post_delete, sender=Division, dispatch_uid="division_overlaps_post_delete")
+@receiver(
+    post_delete, sender=RegisteredCommunityOrganization, dispatch_uid="rco_overlaps_post_delete"
+)
+@receiver(post_delete, sender=Ward, dispatch_uid="ward_overlaps_post_delete")
+@receiver(post_delete, sender=ZipCode, dispatch_uid="zip_code_overlaps_post_delete")
+def facet_deleted(sender, instance, **kwargs):
+    delete_facet_overlaps(instance)
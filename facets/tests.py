@@ -0,0 +1,312 @@
+import base64
+import csv
+import json
+import tempfile
+from array import array
+from io import StringIO
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.contrib.gis.geos import MultiPolygon, Point, Polygon
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from facets.heatmap import (
+    LAT_JITTER,
+    LNG_JITTER,
+    bin_size,
+    build_heatmap,
+    encode_heatmap,
+)
+from facets.importer import FacetImporter, iter_features
+from facets.models import (
+    District,
+    FacetOverlap,
+    RegisteredCommunityOrganization,
+    ZipCode,
+)
+from facets.overlaps import refresh_overlaps
+from profiles.models import Profile
+
+
+def square(x, y, size=1):
+    return MultiPolygon(
+        Polygon(((x, y), (x, y + size), (x + size, y + size), (x + size, y), (x, y)))
+    )
+
+
+async def read_streamed(response):
+    """The text of a response streaming an async iterator."""
+    return b"".join([chunk async for chunk in response.streaming_content]).decode()
+
+
+class FacetOverlapTestCase(TestCase):
+    def setUp(self):
+        self.district = District.objects.create(
+            name="District 1", mpoly=square(0, 0), properties={}
+        )
+        # Overlaps the left half of the district
+        self.rco = RegisteredCommunityOrganization.objects.create(
+            name="Overlapping RCO", mpoly=square(-0.5, 0), properties={}
+        )
+        # Only shares the district's right edge
+        self.touching_rco = RegisteredCommunityOrganization.objects.create(
+            name="Touching RCO", mpoly=square(1, 0), properties={}
+        )
+        self.distant_rco = RegisteredCommunityOrganization.objects.create(
+            name="Distant RCO", mpoly=square(5, 5), properties={}
+        )
+
+    def test_refresh_overlaps_stores_intersecting_pairs_both_ways(self):
+        refresh_overlaps()
+
+        self.assertEqual(
+            set(self.district.overlapping(RegisteredCommunityOrganization)),
+            {self.rco, self.touching_rco},
+        )
+        self.assertEqual(list(self.rco.overlapping(District)), [self.district])
+        self.assertEqual(list(self.touching_rco.overlapping(District)), [self.district])
+
+        overlap = FacetOverlap.objects.get(source_id=self.rco.id, target_id=self.district.id)
+        self.assertAlmostEqual(overlap.source_ratio, 0.5)
+        self.assertAlmostEqual(overlap.target_ratio, 0.5)
+        touching = FacetOverlap.objects.get(
+            source_id=self.touching_rco.id, target_id=self.district.id
+        )
+        self.assertEqual(touching.source_ratio, 0)
+
+    def test_refresh_overlaps_for_one_model_keeps_other_pairs(self):
+        zip_code = ZipCode.objects.create(name="19107", mpoly=square(0, 0), properties={})
+        refresh_overlaps()
+        refresh_overlaps(District)
+
+        self.assertEqual(
+            set(zip_code.overlapping(RegisteredCommunityOrganization)),
+            {self.rco, self.touching_rco},
+        )
+        self.assertEqual(
+            FacetOverlap.objects.filter(source_kind="district", target_kind="rco").count(), 2
+        )
+
+    def test_saving_a_facet_refreshes_its_overlaps(self):
+        refresh_overlaps()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.distant_rco.mpoly = square(0.5, 0.5)
+            self.distant_rco.save()
+
+        self.assertIn(self.distant_rco, self.district.overlapping(RegisteredCommunityOrganization))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rco.mpoly = square(5, 5)
+            self.rco.save()
+
+        self.assertNotIn(self.rco, self.district.overlapping(RegisteredCommunityOrganization))
+        self.assertFalse(self.rco.overlapping(District).exists())
+
+    def test_creating_a_facet_adds_its_overlaps(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            district = District.objects.create(
+                name="District 2", mpoly=square(-1, 0), properties={}
+            )
+
+        self.assertEqual(list(district.overlapping(RegisteredCommunityOrganization)), [self.rco])
+        self.assertEqual(list(self.rco.overlapping(District)), [district])
+
+    def test_deleting_a_facet_removes_its_overlaps(self):
+        refresh_overlaps()
+        self.assertTrue(FacetOverlap.objects.exists())
+
+        self.district.delete()
+
+        # The district was the only facet the RCOs overlapped
+        self.assertFalse(FacetOverlap.objects.exists())
+
+
+def write_geojson(text):
+    f = tempfile.NamedTemporaryFile("w", suffix=".geojson", delete=False)
+    f.write(text)
+    f.close()
+    return f.name
+
+
+def feature(name, x=0, y=0):
+    return {
+        "type": "Feature",
+        "properties": {"name": name},
+        "geometry": json.loads(square(x, y).geojson),
+    }
+
+
+class IterFeaturesTestCase(SimpleTestCase):
+    def test_yields_each_feature_across_chunk_boundaries(self):
+        features = [feature(f"Facet {i}", i) for i in range(5)]
+        path = write_geojson(
+            json.dumps({"type": "FeatureCollection", "name": "facets", "features": features})
+        )
+
+        for chunk_size in (7, 64, 1024 * 1024):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(list(iter_features(path, chunk_size=chunk_size)), features)
+
+    def test_handles_whitespace_between_features(self):
+        path = write_geojson(
+            '{"features" :\n [\n  {"properties": {"name": "A"}} ,\n\n'
+            '  {"properties": {"name": "B"}}\n ]\n}'
+        )
+
+        names = [f["properties"]["name"] for f in iter_features(path, chunk_size=5)]
+
+        self.assertEqual(names, ["A", "B"])
+
+    def test_empty_and_missing_features(self):
+        self.assertEqual(list(iter_features(write_geojson('{"features": []}'))), [])
+        self.assertEqual(list(iter_features(write_geojson('{"type": "Feature"}'))), [])
+
+    def test_truncated_file_raises(self):
+        path = write_geojson('{"features": [{"properties": {"name": "A"}}, {"propert')
+
+        with self.assertRaises(ValueError):
+            list(iter_features(path, chunk_size=8))
+
+
+class FacetImporterTestCase(TestCase):
+    def _import(self, features, row_for_feature=None, **kwargs):
+        path = write_geojson(json.dumps({"type": "FeatureCollection", "features": features}))
+        importer = FacetImporter(
+            ZipCode,
+            path,
+            row_for_feature or (lambda properties: (properties["name"], {})),
+        )
+        return importer.run(**kwargs)
+
+    def test_creates_updates_and_deletes_stale(self):
+        ZipCode.objects.create(name="19107", mpoly=square(5, 5), properties={})
+        ZipCode.objects.create(name="19103", mpoly=square(6, 6), properties={})
+
+        result = self._import([feature("19107"), feature("19146", 1)], delete_stale=True)
+
+        self.assertEqual((result.created, result.updated, result.deleted), (1, 1, 1))
+        self.assertEqual(sorted(ZipCode.objects.values_list("name", flat=True)), ["19107", "19146"])
+        self.assertTrue(ZipCode.objects.get(name="19107").mpoly.equals(square(0, 0)))
+
+    def test_skipped_features_are_not_stale(self):
+        ZipCode.objects.create(name="19107", mpoly=square(5, 5), properties={})
+
+        result = self._import(
+            [feature("19107"), feature("19146", 1)],
+            row_for_feature=lambda properties: (
+                properties["name"],
+                None if properties["name"] == "19107" else {},
+            ),
+            delete_stale=True,
+        )
+
+        self.assertEqual((result.created, result.deleted, result.skipped), (1, 0, 1))
+        # Kept as it was
+        self.assertTrue(ZipCode.objects.get(name="19107").mpoly.equals(square(5, 5)))
+
+    def test_copies_in_chunks(self):
+        with patch("facets.importer.COPY_CHUNK_SIZE", 2):
+            result = self._import([feature(f"191{i:02d}", i) for i in range(5)])
+
+        self.assertEqual(result.created, 5)
+        self.assertEqual(ZipCode.objects.count(), 5)
+
+    def test_dry_run_rolls_back(self):
+        result = self._import([feature("19107")], dry_run=True)
+
+        self.assertEqual(result.created, 1)
+        self.assertFalse(ZipCode.objects.exists())
+
+
+def heat_points(heatmap):
+    return sorted(zip(heatmap["lat"], heatmap["lng"], heatmap["weight"]))
+
+
+class HeatmapTestCase(TestCase):
+    def setUp(self):
+        self.points = [(-75.16, 39.95), (-75.16, 39.95), (-75.16, 39.95), (-75.05, 40.05)]
+        for i, (lng, lat) in enumerate(self.points):
+            user = User.objects.create_user(username=f"heat{i}", email=f"heat{i}@example.com")
+            Profile.objects.create(user=user, location=Point(lng, lat, srid=4326))
+        # Profiles without a location are left off
+        nowhere = User.objects.create_user(username="nowhere", email="nowhere@example.com")
+        Profile.objects.create(user=nowhere)
+
+    def test_points_are_jittered_deterministically(self):
+        heatmap = build_heatmap(Profile.objects.all())
+
+        self.assertEqual(len(heatmap["lat"]), 4)
+        self.assertEqual(list(heatmap["weight"]), [1.0] * 4)
+        self.assertEqual(heat_points(build_heatmap(Profile.objects.all())), heat_points(heatmap))
+        for lat, lng in zip(heatmap["lat"], heatmap["lng"]):
+            self.assertTrue(
+                any(
+                    abs(lat - point_lat) <= LAT_JITTER[1] / 2 + 1e-5
+                    and abs(lng - point_lng) <= LNG_JITTER[1] / 2 + 1e-5
+                    for point_lng, point_lat in self.points
+                )
+            )
+        # Points at the same location are spread apart by the hash of their salt
+        self.assertEqual(len(set(zip(heatmap["lat"], heatmap["lng"]))), 4)
+
+    def test_binned_points_are_weighted(self):
+        # Wide enough bins to merge the jittered copies of the same location
+        zoom = 8
+        self.assertGreater(bin_size(zoom), LNG_JITTER[1])
+
+        heatmap = build_heatmap(Profile.objects.all(), zoom=zoom)
+
+        self.assertEqual(sorted(heatmap["weight"]), [1.0, 3.0])
+        self.assertEqual(sum(heatmap["weight"]), 4)
+        self.assertEqual(
+            heat_points(build_heatmap(Profile.objects.all(), zoom=zoom)), heat_points(heatmap)
+        )
+
+    def test_encoded_arrays_round_trip(self):
+        heatmap = build_heatmap(Profile.objects.all())
+
+        encoded = encode_heatmap(heatmap)
+
+        self.assertEqual(encoded["count"], 4)
+        for name in ("lat", "lng", "weight"):
+            decoded = array("f")
+            decoded.frombytes(base64.b64decode(encoded[name]))
+            self.assertEqual(decoded, heatmap[name])
+
+
+class ProfileExportTestCase(TestCase):
+    def setUp(self):
+        self.district = District.objects.create(
+            name="District 1", mpoly=square(0, 0), properties={}
+        )
+        for name, location in [
+            ("Inside", Point(0.5, 0.5, srid=4326)),
+            ("Outside", Point(5, 5, srid=4326)),
+        ]:
+            user = User.objects.create_user(
+                username=name.lower(), email=f"{name.lower()}@example.com", first_name=name
+            )
+            Profile.objects.create(user=user, location=location)
+        admin = User.objects.create_superuser(username="admin", email="admin@example.com")
+        self.client.force_login(admin)
+
+    def test_exports_profiles_in_the_selected_facets(self):
+        response = self.client.post(
+            reverse("admin:facets_district_changelist"),
+            {
+                "action": "export_profiles_csv",
+                "_selected_action": [self.district.pk],
+                "confirm": "1",
+                "columns": ["first_name", "email"],
+            },
+        )
+
+        self.assertTrue(response.streaming)
+        content = async_to_sync(read_streamed)(response)
+        self.assertEqual(
+            list(csv.reader(StringIO(content))),
+            [["First Name", "Email"], ["Inside", "inside@example.com"]],
+        )
@@ -1,5 +1,4 @@
 import interactions
-from asgiref.sync import async_to_sync
 from celery import shared_task
 from django.conf import settings
 
@@ -8,7 +7,7 @@ from lazer.utils import build_embed
 from lazer.utils import (
     submit_violation_report_to_ppa as _submit_violation_report_to_ppa,
 )
-from pba_discord.bot import bot
+from pba_discord.rest import discord_rest
 
 
 @shared_task
@@ -29,9 +28,7 @@ async def _submit_violation_report_discord(violation_id):
     )
     embed = build_embed(violation_report)
 
-    await bot.login(settings.DISCORD_BOT_TOKEN)
-    guild = await bot.fetch_guild(settings.NEW_LASER_VIOLATION_GUILD_ID)
-    notification_channel = await guild.fetch_channel(settings.NEW_LASER_VIOLATION_CHANNEL_ID)
+    notification_channel = await discord_rest.channel(settings.NEW_LASER_VIOLATION_CHANNEL_ID)
 
     components = [
         interactions.Button(
@@ -51,4 +48,4 @@ async def _submit_violation_report_discord(violation_id):
 
 @shared_task
 def submit_violation_report_discord(violation_id):
-    async_to_sync(_submit_violation_report_discord)(violation_id)
+    discord_rest.run(_submit_violation_report_discord(violation_id))
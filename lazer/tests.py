@@ -0,0 +1,69 @@
+from django.contrib.auth.models import User
+from django.contrib.gis.geos import Point
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from facets.heatmap import build_heatmap
+from lazer.models import ViolationReport, ViolationSubmission
+from lazer.views import map_data
+
+
+class MapDataTestCase(TestCase):
+    def setUp(self):
+        self.reporter = User.objects.create_user(username="reporter", email="r@example.com")
+        for i in range(3):
+            self._report(created_by=self.reporter, submitted=timezone.now())
+        self._report(created_by=None, submitted=timezone.now())
+        # Not submitted yet, so left off the map
+        self._report(created_by=self.reporter, submitted=None)
+
+    def _report(self, created_by, submitted):
+        submission = ViolationSubmission.objects.create(
+            created_by=created_by,
+            captured_at=timezone.now(),
+            location=Point(-75.16, 39.95, srid=4326),
+            image="lazer/violations/test.jpg",
+        )
+        return ViolationReport.objects.create(
+            submission=submission,
+            date_observed="2026-10-19",
+            time_observed="12:00",
+            make="Honda",
+            body_style="Sedan",
+            vehicle_color="Blue",
+            violation_observed="Bike lane",
+            occurrence_frequency="Daily",
+            block_number="1300",
+            street_name="Spruce St",
+            zip_code="19107",
+            submitted=submitted,
+        )
+
+    def _get(self, **params):
+        # map_data is wrapped in cache_page; call the view itself
+        return map_data.__wrapped__(RequestFactory().get("/lazer/map/data/", params))
+
+    def test_response_shape(self):
+        response = self._get()
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(set(data), {"pins", "report_count", "unique_users_count"})
+        self.assertEqual(set(data["pins"]), {"count", "lat", "lng", "weight"})
+        self.assertEqual(data["pins"]["count"], 4)
+        self.assertEqual(data["report_count"], 4)
+        self.assertEqual(data["unique_users_count"], 1)
+
+    def test_zoom_bins_pins(self):
+        data = self._get(zoom="10").json()
+
+        self.assertEqual(data["pins"]["count"], 1)
+        self.assertEqual(data["report_count"], 4)
+        submitted = ViolationReport.objects.filter(submitted__isnull=False)
+        self.assertEqual(
+            data["pins"]["count"],
+            len(build_heatmap(submitted, location="submission__location", zoom=10)["lat"]),
+        )
+
+    def test_invalid_zoom_is_ignored(self):
+        self.assertEqual(self._get(zoom="close").json()["pins"]["count"], 4)
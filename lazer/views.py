@@ -14,13 +14,14 @@ from django.contrib.gis.geos import Point
 from django.core.files.base import ContentFile
 from django.core.paginator import Paginator
 from django.db import transaction
+from django.db.models import Count
 from django.http import JsonResponse
 from django.shortcuts import render
 from django.utils import timezone
 from django.views.decorators.cache import cache_page
 from django.views.decorators.csrf import csrf_exempt
 
-from campaigns.admin import randomize_lat_long
+from facets.heatmap import build_heatmap, encode_heatmap
 from facets.utils import reverse_geocode_point
 from lazer.forms import ReportForm, SubmissionForm
 from lazer.integrations.platerecognizer import read_plate
@@ -223,8 +224,7 @@ def map_data(request):
     date_lte = request.GET.get("date_lte", None)
     date = request.GET.get("date", None)
 
-    pins = []
-    queryset = ViolationReport.objects.filter(submitted__isnull=False).select_related("submission")
+    queryset = ViolationReport.objects.filter(submitted__isnull=False)
     if violation_filter:
         queryset = queryset.filter(violation_observed__startswith=violation_filter).filter(
             submission__captured_at__lt=timezone.now() - datetime.timedelta(minutes=15)
@@ -250,17 +250,21 @@ def map_data(request):
                 .date()
             )
 
-    # Count unique users who submitted violations
-    unique_users = set()
-    for report in queryset.only("submission__location", "submission__created_by").all():
-        if report.submission.created_by_id:
-            unique_users.add(report.submission.created_by_id)
-        lat, lng = randomize_lat_long(
-            report.id, *(report.submission.location.y, report.submission.location.x)
-        )
-        pins.append([lat, lng, 1])
+    zoom = request.GET.get("zoom", None)
+    zoom = min(max(int(zoom), 0), 22) if zoom and zoom.isdigit() else None
+    heatmap = build_heatmap(queryset, location="submission__location", salt="pk", zoom=zoom)
+    unique_users_count = queryset.aggregate(
+        unique_users=Count("submission__created_by", distinct=True)
+    )["unique_users"]
 
-    return JsonResponse({"pins": pins, "unique_users_count": len(unique_users)}, safe=False)
+    return JsonResponse(
+        {
+            "pins": encode_heatmap(heatmap),
+            "report_count": int(sum(heatmap["weight"])),
+            "unique_users_count": unique_users_count,
+        },
+        safe=False,
+    )
 
 
 def map(request):
@@ -1,7 +1,14 @@
+import datetime
+
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.urls import path
+from django.utils import timezone
 from ordered_model.admin import OrderedModelAdmin
 
 from membership.models import Donation, DonationProduct, DonationTier, Membership
+from membership.voter_list import stream_voter_list
+from pbaabp.streaming import streaming_csv_response
 
 
 class MembershipAdmin(admin.ModelAdmin):
@@ -12,6 +19,27 @@ class MembershipAdmin(admin.ModelAdmin):
     date_hierarchy = "start_date"
     fields = ("user", "kind", "start_date", "end_date", "reason", "created_at", "updated_at")
     readonly_fields = ("created_at", "updated_at")
+    change_list_template = "admin/membership/membership/change_list.html"
+
+    def get_urls(self):
+        custom_urls = [
+            path(
+                "export-voter-list/",
+                self.admin_site.admin_view(self.export_voter_list_view),
+                name="membership_membership_export_voter_list",
+            ),
+        ]
+        return custom_urls + super().get_urls()
+
+    def export_voter_list_view(self, request):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        try:
+            as_of = datetime.date.fromisoformat(request.GET.get("as_of", ""))
+        except ValueError:
+            as_of = timezone.now().date()
+
+        return streaming_csv_response(stream_voter_list(as_of), f"voter_list_{as_of}.csv")
 
 
 class DonationTierAdmin(OrderedModelAdmin):
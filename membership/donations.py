@@ -0,0 +1,35 @@
+"""
+Per-product donation totals, cached until a donation to the product is added,
+changed or removed.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum
+
+from membership.models import Donation
+
+# Bounds how long a total recomputed alongside a concurrent donation can be stale
+DONATION_TOTAL_TIMEOUT = 60 * 60
+
+
+def _total_key(product_id):
+    return f"donation-product-total:{product_id}"
+
+
+def donation_total(product_id):
+    """Sum of the donations to a DonationProduct."""
+    return cache.get_or_set(
+        _total_key(product_id),
+        lambda: Donation.objects.filter(donation_product_id=product_id).aggregate(
+            total=Sum("amount", default=0)
+        )["total"],
+        DONATION_TOTAL_TIMEOUT,
+    )
+
+
+def invalidate_donation_totals(*product_ids):
+    """Drop the cached totals of the given products once the transaction commits."""
+    keys = [_total_key(product_id) for product_id in product_ids if product_id is not None]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
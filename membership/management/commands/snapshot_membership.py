@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from membership.status import take_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Snapshot membership status for every user as of a completed day. "
+        "Defaults to yesterday; this normally runs nightly from celery beat."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            type=str,
+            help="Date to snapshot (YYYY-MM-DD format), must be in the past",
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+        if options["date"]:
+            try:
+                as_of = datetime.strptime(options["date"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError(f"Invalid date format: {options['date']}. Use YYYY-MM-DD")
+            if as_of >= today:
+                raise CommandError("Only completed days can be snapshotted")
+        else:
+            as_of = today - timedelta(days=1)
+
+        count = take_snapshot(as_of)
+        self.stdout.write(self.style.SUCCESS(f"Snapshotted {count} members as of {as_of}"))
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.15 on 2026-10-19 16:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("djstripe", "0012_2_8"),
+        ("membership", "0007_membershipsnapshotrun_membershipsnapshot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StripeCustomerSync",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("last_synced_at", models.DateTimeField(blank=True, null=True)),
+                ("last_requested_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "customer",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sync_state",
+                        to="djstripe.customer",
+                    ),
+                ),
+            ],
+        ),
+    ]
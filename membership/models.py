@@ -2,7 +2,7 @@ import uuid
 
 from django.contrib.auth.models import User
 from django.db import models, transaction
-from djstripe.models import Price, Product
+from djstripe.models import Customer, Price, Product
 from markdownfield.models import RenderedMarkdownField
 from ordered_model.models import OrderedModel
 
@@ -10,10 +10,12 @@ from membership.tasks import (
     sync_donation_product_to_stripe,
     sync_donation_tier_to_stripe,
 )
-from pbaabp.models import MarkdownField
+from pbaabp.models import ChangeTrackingMixin, MarkdownField
 
 
-class DonationProduct(OrderedModel):
+class DonationProduct(ChangeTrackingMixin, OrderedModel):
+    untracked_fields = ("id", "stripe_product")
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     stripe_product = models.ForeignKey(Product, blank=True, null=True, on_delete=models.SET_NULL)
 
@@ -25,28 +27,17 @@ class DonationProduct(OrderedModel):
     disclaimer_rendered = RenderedMarkdownField()
 
     def save(self, *args, **kwargs):
-        if self._state.adding:
+        if self.has_changed():
             transaction.on_commit(lambda: sync_donation_product_to_stripe.delay(self.id))
-        else:
-            old_model = DonationProduct.objects.get(pk=self.pk)
-            change_fields = [
-                f.name
-                for f in DonationProduct._meta._get_fields()
-                if f.name not in ["id", "stripe_product"]
-            ]
-            modified = False
-            for i in change_fields:
-                if getattr(old_model, i, None) != getattr(self, i, None):
-                    modified = True
-            if modified:
-                transaction.on_commit(lambda: sync_donation_product_to_stripe.delay(self.id))
         super(DonationProduct, self).save(*args, **kwargs)
 
     def __str__(self):
         return f"Donation: {self.name}"
 
 
-class Donation(models.Model):
+class Donation(ChangeTrackingMixin, models.Model):
+    tracked_fields = ["donation_product"]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     donation_product = models.ForeignKey(
         DonationProduct, blank=True, null=True, on_delete=models.SET_NULL, related_name="donations"
@@ -62,7 +53,9 @@ class Donation(models.Model):
         return f"Donation of ${self.amount} to {self.donation_product.name}"
 
 
-class DonationTier(OrderedModel):
+class DonationTier(ChangeTrackingMixin, OrderedModel):
+    untracked_fields = ("id", "stripe_price")
+
     class Recurrence(models.IntegerChoices):
         MONTHLY = 0, "month"
         ANNUAL = 1, "year"
@@ -75,28 +68,17 @@ class DonationTier(OrderedModel):
     recurrence = models.IntegerField(null=False, blank=False, choices=Recurrence.choices)
 
     def save(self, *args, **kwargs):
-        if self._state.adding:
+        if self.has_changed():
             transaction.on_commit(lambda: sync_donation_tier_to_stripe.delay(self.id))
-        else:
-            old_model = DonationTier.objects.get(pk=self.pk)
-            change_fields = [
-                f.name
-                for f in DonationTier._meta._get_fields()
-                if f.name not in ["id", "stripe_price"]
-            ]
-            modified = False
-            for i in change_fields:
-                if getattr(old_model, i, None) != getattr(self, i, None):
-                    modified = True
-            if modified:
-                transaction.on_commit(lambda: sync_donation_tier_to_stripe.delay(self.id))
         super(DonationTier, self).save(*args, **kwargs)
 
     def __str__(self):
         return f"${self.cost}/{self.get_recurrence_display()}"
 
 
-class Membership(models.Model):
+class Membership(ChangeTrackingMixin, models.Model):
+    tracked_fields = ["user", "start_date"]
+
     class Kind(models.IntegerChoices):
         FISCAL = 0, "Fiscal"
         PARTICIPATION = 1, "Participation"
@@ -116,3 +98,51 @@ class Membership(models.Model):
     def __str__(self):
         end_str = f" to {self.end_date}" if self.end_date else " (ongoing)"
         return f"{self.user.email} - {self.get_kind_display()} - {self.start_date}{end_str}"
+
+
+class MembershipSnapshotRun(models.Model):
+    """Marks a date for which MembershipSnapshot rows have been computed."""
+
+    date = models.DateField(unique=True)
+    member_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-date"]
+
+    def __str__(self):
+        return f"Membership snapshot for {self.date} ({self.member_count} members)"
+
+
+class MembershipSnapshot(models.Model):
+    """
+    A user who was a member on ``date``, and why. Only members get a row; anyone
+    without a row on a date with a MembershipSnapshotRun was not a member.
+    """
+
+    date = models.DateField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="membership_snapshots")
+    via_membership_record = models.BooleanField(default=False)
+    via_discord = models.BooleanField(default=False)
+    via_donation = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "date"], name="unique_membership_snapshot")
+        ]
+        indexes = [models.Index(fields=["date"])]
+
+    def __str__(self):
+        return f"{self.user.email} - member on {self.date}"
+
+
+class StripeCustomerSync(models.Model):
+    """Tracks when a customer's Stripe data was last pulled into the local dj-stripe tables."""
+
+    customer = models.OneToOneField(Customer, on_delete=models.CASCADE, related_name="sync_state")
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+    last_requested_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Stripe sync for {self.customer_id} (last synced {self.last_synced_at})"
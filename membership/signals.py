@@ -0,0 +1,65 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from djstripe.models import Customer
+from djstripe.signals import WEBHOOK_SIGNALS
+
+from membership.donations import invalidate_donation_totals
+from membership.models import Donation, Membership
+from membership.stripe_sync import request_customer_sync
+from membership.tasks import refresh_membership_snapshots
+
+# Webhook events after which a customer's local subscriptions and charges may be
+# out of date. dj-stripe syncs the event's own object; this refreshes the rest.
+STRIPE_SYNC_EVENTS = [
+    "customer.updated",
+    "customer.subscription.created",
+    "customer.subscription.updated",
+    "customer.subscription.deleted",
+    "invoice.paid",
+    "invoice.payment_failed",
+    "charge.succeeded",
+    "charge.failed",
+    "charge.refunded",
+]
+
+
+@receiver(post_save, sender=Membership, dispatch_uid="membership_post_save")
+@receiver(post_delete, sender=Membership, dispatch_uid="membership_post_delete")
+def membership_changed(sender, instance, created=False, **kwargs):
+    # Membership records can be backdated, so past snapshots from the earliest
+    # start date involved onwards may need updating
+    user_ids = {instance.user_id}
+    start_dates = {instance.start_date}
+    if not created and kwargs["signal"] is post_save:
+        user_ids.add(instance.previous_value("user"))
+        start_dates.add(instance.previous_value("start_date"))
+    start_dates.discard(None)
+    since = min(start_dates).isoformat() if start_dates else None
+    for user_id in user_ids:
+        transaction.on_commit(
+            lambda user_id=user_id: refresh_membership_snapshots.delay(user_id, since=since)
+        )
+
+
+@receiver(
+    [WEBHOOK_SIGNALS[event_type] for event_type in STRIPE_SYNC_EVENTS],
+    dispatch_uid="stripe_customer_webhook",
+)
+def stripe_customer_webhook(sender, event, **kwargs):
+    data = event.data.get("object", {})
+    stripe_id = data.get("id") if data.get("object") == "customer" else data.get("customer")
+    if not stripe_id:
+        return
+    if customer := Customer.objects.filter(id=stripe_id).first():
+        request_customer_sync(customer, force=True)
+
+
+@receiver(post_save, sender=Donation, dispatch_uid="donation_post_save")
+@receiver(post_delete, sender=Donation, dispatch_uid="donation_post_delete")
+def donation_changed(sender, instance, created=False, **kwargs):
+    product_ids = {instance.donation_product_id}
+    if not created:
+        # A donation moved to another product changes both products' totals
+        product_ids.add(instance.previous_value("donation_product"))
+    invalidate_donation_totals(*product_ids)
@@ -0,0 +1,195 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import BooleanField, Exists, ExpressionWrapper, OuterRef, Q
+from django.utils import timezone
+from djstripe.models import Subscription
+
+from membership.models import Membership, MembershipSnapshot, MembershipSnapshotRun
+
+# A user is a member on a date if they meet ANY of these criteria:
+# 1. An explicit Membership record active on the date
+# 2. Discord activity within 30 days before the date (with a linked Discord account)
+# 3. A Stripe subscription covering the date, either through a paid invoice or
+#    its current billing period (invoices only exist once a period has ended)
+FLAGS = ("via_membership_record", "via_discord", "via_donation")
+
+DISCORD_ACTIVITY_WINDOW = datetime.timedelta(days=30)
+
+# Subscription statuses whose current billing period counts towards membership
+CURRENT_SUBSCRIPTION_STATUSES = ["active", "trialing"]
+
+
+def _as_date(as_of):
+    if as_of is None:
+        return timezone.now().date()
+    if isinstance(as_of, datetime.datetime):
+        if timezone.is_aware(as_of):
+            as_of = as_of.astimezone(datetime.timezone.utc)
+        return as_of.date()
+    return as_of
+
+
+def _day_bounds(as_of):
+    # Stripe timestamps are in UTC, so days are UTC days
+    day_start = datetime.datetime.combine(as_of, datetime.time.min, tzinfo=datetime.timezone.utc)
+    day_end = datetime.datetime.combine(as_of, datetime.time.max, tzinfo=datetime.timezone.utc)
+    return day_start, day_end
+
+
+def _live_flags(as_of, user_ref):
+    from profiles.models import DiscordActivity
+
+    day_start, day_end = _day_bounds(as_of)
+    return {
+        "via_membership_record": Exists(
+            Membership.objects.filter(user=OuterRef(user_ref), start_date__lte=as_of).filter(
+                Q(end_date__isnull=True) | Q(end_date__gte=as_of)
+            )
+        ),
+        "via_discord": Exists(
+            DiscordActivity.objects.filter(
+                profile__user=OuterRef(user_ref),
+                profile__user__socialaccount__provider="discord",
+                date__gte=as_of - DISCORD_ACTIVITY_WINDOW,
+                date__lte=as_of,
+            )
+        ),
+        "via_donation": Exists(
+            Subscription.objects.filter(customer__subscriber=OuterRef(user_ref)).filter(
+                Q(
+                    invoices__status="paid",
+                    invoices__period_start__lte=day_end,
+                    invoices__period_end__gte=day_start,
+                )
+                | Q(
+                    status__in=CURRENT_SUBSCRIPTION_STATUSES,
+                    current_period_start__lte=day_end,
+                    current_period_end__gte=day_start,
+                )
+            )
+        ),
+    }
+
+
+def _snapshot_flags(as_of, user_ref):
+    snapshots = MembershipSnapshot.objects.filter(user=OuterRef(user_ref), date=as_of)
+    return {flag: Exists(snapshots.filter(**{flag: True})) for flag in FLAGS}
+
+
+def has_snapshot(as_of):
+    return MembershipSnapshotRun.objects.filter(date=_as_date(as_of)).exists()
+
+
+def membership_flags(as_of=None, user_ref="pk"):
+    """
+    Return ``{flag: Exists(...)}`` expressions for the membership criteria as of
+    a date, correlated to the user referenced by ``user_ref``.
+
+    Dates with a completed snapshot read from MembershipSnapshot; any other date
+    is computed live.
+    """
+    as_of = _as_date(as_of)
+    if has_snapshot(as_of):
+        return _snapshot_flags(as_of, user_ref)
+    return _live_flags(as_of, user_ref)
+
+
+def _is_member(flags):
+    condition = Q()
+    for flag in flags.values():
+        condition |= Q(flag)
+    return condition
+
+
+def annotate_membership(queryset, as_of=None, user_ref="pk"):
+    """
+    Annotate a queryset with ``via_membership_record``, ``via_discord``,
+    ``via_donation`` and ``is_member``. ``user_ref`` is the path to the user
+    from the queryset's model, e.g. ``"user"`` for profiles.
+    """
+    queryset = queryset.annotate(**membership_flags(as_of, user_ref))
+    return queryset.annotate(
+        is_member=ExpressionWrapper(
+            Q(via_membership_record=True) | Q(via_discord=True) | Q(via_donation=True),
+            output_field=BooleanField(),
+        )
+    )
+
+
+def members_as_of(as_of=None):
+    """Users who were members as of a date, as a single query."""
+    as_of = _as_date(as_of)
+    if has_snapshot(as_of):
+        return User.objects.filter(membership_snapshots__date=as_of)
+    return User.objects.filter(_is_member(_live_flags(as_of, "pk")))
+
+
+def status_for_user(user_id, as_of=None):
+    """Membership flags and ``is_member`` for a single user."""
+    status = (
+        annotate_membership(User.objects.filter(pk=user_id), as_of)
+        .values(*FLAGS, "is_member")
+        .first()
+    )
+    return status or {flag: False for flag in (*FLAGS, "is_member")}
+
+
+def _live_rows(as_of, users=None):
+    users = User.objects.all() if users is None else users
+    flags = _live_flags(as_of, "pk")
+    return (
+        users.annotate(**flags)
+        .filter(_is_member(flags))
+        .values_list("pk", *FLAGS)
+        .iterator(chunk_size=2000)
+    )
+
+
+def _snapshot(as_of, user_id, via_membership_record, via_discord, via_donation):
+    return MembershipSnapshot(
+        date=as_of,
+        user_id=user_id,
+        via_membership_record=via_membership_record,
+        via_discord=via_discord,
+        via_donation=via_donation,
+    )
+
+
+@transaction.atomic
+def take_snapshot(as_of):
+    """
+    Compute membership for every user as of a date and store it, replacing any
+    existing snapshot for that date. Returns the number of members.
+    """
+    as_of = _as_date(as_of)
+    MembershipSnapshot.objects.filter(date=as_of).delete()
+    snapshots = MembershipSnapshot.objects.bulk_create(
+        (_snapshot(as_of, *row) for row in _live_rows(as_of)), batch_size=2000
+    )
+    MembershipSnapshotRun.objects.update_or_create(
+        date=as_of, defaults={"member_count": len(snapshots)}
+    )
+    return len(snapshots)
+
+
+@transaction.atomic
+def refresh_user_snapshots(user_id, since=None):
+    """
+    Recompute a single user's rows in existing snapshots, for when their
+    membership records change after the fact. Only snapshots on or after
+    ``since`` are rewritten, and only those runs are locked.
+    """
+    runs = MembershipSnapshotRun.objects.order_by("date")
+    if since is not None:
+        runs = runs.filter(date__gte=_as_date(since))
+    users = User.objects.filter(pk=user_id)
+    for run in runs.select_for_update():
+        deleted, _ = MembershipSnapshot.objects.filter(date=run.date, user_id=user_id).delete()
+        created = MembershipSnapshot.objects.bulk_create(
+            _snapshot(run.date, *row) for row in _live_rows(run.date, users)
+        )
+        if len(created) != deleted:
+            run.member_count += len(created) - deleted
+            run.save(update_fields=["member_count", "updated_at"])
@@ -0,0 +1,43 @@
+import datetime
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from membership.models import StripeCustomerSync
+from membership.tasks import sync_stripe_customer
+
+# Local customer, subscription and charge data older than this is refreshed in
+# the background the next time it's displayed.
+STALE_AFTER = datetime.timedelta(minutes=15)
+
+# At most one refresh is queued per customer in this window, however many page
+# views or webhooks ask for one.
+MIN_REQUEST_INTERVAL = datetime.timedelta(minutes=1)
+
+
+def request_customer_sync(customer, force=False):
+    """
+    Queue a background refresh of a customer's Stripe data if it is stale (or
+    ``force`` is set), unless one was queued recently. Returns True if queued.
+    """
+    now = timezone.now()
+    state, _ = StripeCustomerSync.objects.get_or_create(customer=customer)
+    if not force and state.last_synced_at and now - state.last_synced_at <= STALE_AFTER:
+        return False
+
+    # Claim the request with a conditional UPDATE so concurrent requests queue
+    # at most one task.
+    claimed = (
+        StripeCustomerSync.objects.filter(pk=state.pk)
+        .filter(
+            Q(last_requested_at__isnull=True) | Q(last_requested_at__lt=now - MIN_REQUEST_INTERVAL)
+        )
+        .update(last_requested_at=now)
+    )
+    if not claimed:
+        return False
+
+    customer_id = customer.pk
+    transaction.on_commit(lambda: sync_stripe_customer.delay(customer_id))
+    return True
@@ -1,7 +1,10 @@
+import datetime
+
 import stripe
 from celery import shared_task
 from django.conf import settings
-from djstripe.models import Price, Product
+from django.utils import timezone
+from djstripe.models import Customer, Price, Product
 
 
 @shared_task
@@ -84,3 +87,42 @@ def sync_donation_product_to_stripe(donationproduct_id):
 
     donation_product.stripe_product = stripe_product
     donation_product.save()
+
+
+@shared_task
+def snapshot_membership(as_of=None):
+    """Snapshot membership for a completed day, yesterday by default."""
+    from membership.status import take_snapshot
+
+    if as_of is None:
+        as_of = timezone.now().astimezone(datetime.timezone.utc).date() - datetime.timedelta(days=1)
+    else:
+        as_of = datetime.date.fromisoformat(as_of)
+    return take_snapshot(as_of)
+
+
+@shared_task
+def refresh_membership_snapshots(user_id, since=None):
+    from membership.status import refresh_user_snapshots
+
+    if since is not None:
+        since = datetime.date.fromisoformat(since)
+    refresh_user_snapshots(user_id, since=since)
+
+
+@shared_task(rate_limit="30/m")
+def sync_stripe_customer(customer_pk):
+    """Pull a customer's details, subscriptions and charges from Stripe."""
+    from membership.models import StripeCustomerSync
+
+    customer = Customer.objects.filter(pk=customer_pk).first()
+    if customer is None:
+        return
+
+    customer = Customer.sync_from_stripe_data(customer.api_retrieve())
+    customer._sync_subscriptions()
+    customer._sync_charges()
+
+    StripeCustomerSync.objects.update_or_create(
+        customer=customer, defaults={"last_synced_at": timezone.now()}
+    )
@@ -3,23 +3,49 @@ import datetime
 import os
 import tempfile
 import uuid
+from decimal import Decimal
 from io import StringIO
+from unittest.mock import patch
 
 from allauth.socialaccount.models import SocialAccount
+from asgiref.sync import async_to_sync
 from django.contrib.auth import get_user_model
 from django.contrib.gis.geos import MultiPolygon, Point, Polygon
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.test import TestCase
+from django.urls import reverse
 from django.utils import timezone
 from djstripe.models import Customer, Price, Product, Subscription
 
 from facets.models import District, ZipCode
-from membership.models import Membership
+from membership.donations import donation_total
+from membership.models import (
+    Donation,
+    DonationProduct,
+    DonationTier,
+    Membership,
+    MembershipSnapshot,
+    MembershipSnapshotRun,
+    StripeCustomerSync,
+)
+from membership.status import (
+    annotate_membership,
+    members_as_of,
+    refresh_user_snapshots,
+    take_snapshot,
+)
+from membership.stripe_sync import request_customer_sync
 from profiles.models import DiscordActivity, Profile
 
 User = get_user_model()
 
 
+async def read_streamed(response):
+    """The text of a response streaming an async iterator."""
+    return b"".join([chunk async for chunk in response.streaming_content]).decode()
+
+
 class ExportVoterListCommandTestCase(TestCase):
     def setUp(self):
         """Create test data for all tests"""
@@ -592,3 +618,274 @@ class ExportVoterListCommandTestCase(TestCase):
                 self.assertTrue(os.path.exists("voter_list.csv"))
             finally:
                 os.chdir(original_cwd)
+
+    def test_export_query_count_does_not_grow(self):
+        """Districts and membership flags are resolved in the same query for every member"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        now = timezone.now().date()
+        Membership.objects.create(
+            user=self.user1,
+            kind=Membership.Kind.FISCAL,
+            start_date=now - datetime.timedelta(days=30),
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_file = os.path.join(tmpdir, "one.csv")
+            with CaptureQueriesContext(connection) as one_member:
+                call_command("export_voter_list", now.isoformat(), output=output_file)
+
+            for user in (self.user2, self.user3):
+                Membership.objects.create(
+                    user=user,
+                    kind=Membership.Kind.FISCAL,
+                    start_date=now - datetime.timedelta(days=30),
+                )
+            output_file = os.path.join(tmpdir, "three.csv")
+            with CaptureQueriesContext(connection) as three_members:
+                call_command("export_voter_list", now.isoformat(), output=output_file)
+
+            self.assertEqual(len(self._read_csv(output_file)), 3)
+        self.assertEqual(len(three_members), len(one_member))
+
+    def test_admin_download_streams_voter_list(self):
+        """Staff can download the same voter list from the Membership admin"""
+        now = timezone.now().date()
+        Membership.objects.create(
+            user=self.user1,
+            kind=Membership.Kind.FISCAL,
+            start_date=now - datetime.timedelta(days=30),
+        )
+        url = reverse("admin:membership_membership_export_voter_list")
+
+        self.client.force_login(self.user2)
+        response = self.client.get(url, {"as_of": now.isoformat()})
+        self.assertEqual(response.status_code, 302)
+
+        admin = User.objects.create_superuser(username="admin", email="admin@example.com")
+        self.client.force_login(admin)
+        response = self.client.get(url, {"as_of": now.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        rows = list(csv.DictReader(StringIO(async_to_sync(read_streamed)(response))))
+        self.assertEqual([row["email"] for row in rows], ["member1@example.com"])
+        self.assertTrue(rows[0]["unique_id"].startswith("d5-"))
+
+
+@patch("membership.models.sync_donation_tier_to_stripe")
+@patch("membership.models.sync_donation_product_to_stripe")
+class DonationChangeTrackingTestCase(TestCase):
+    def setUp(self):
+        with (
+            patch("membership.models.sync_donation_product_to_stripe"),
+            patch("membership.models.sync_donation_tier_to_stripe"),
+        ):
+            DonationProduct.objects.create(name="General Fund", disclaimer="")
+            DonationTier.objects.create(cost="10.00", recurrence=DonationTier.Recurrence.MONTHLY)
+
+    def test_product_save_does_not_refetch(self, mock_product_sync, mock_tier_sync):
+        product = DonationProduct.objects.get()
+        product.name = "Renamed Fund"
+        with self.assertNumQueries(1), self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        mock_product_sync.delay.assert_called_once_with(product.id)
+
+    def test_tier_save_does_not_refetch(self, mock_product_sync, mock_tier_sync):
+        tier = DonationTier.objects.get()
+        tier.active = True
+        with self.assertNumQueries(1), self.captureOnCommitCallbacks(execute=True):
+            tier.save()
+        mock_tier_sync.delay.assert_called_once_with(tier.id)
+
+    def test_unchanged_tier_does_not_sync(self, mock_product_sync, mock_tier_sync):
+        tier = DonationTier.objects.get()
+        with self.assertNumQueries(1), self.captureOnCommitCallbacks(execute=True):
+            tier.save()
+        mock_tier_sync.delay.assert_not_called()
+
+
+class DonationTotalTestCase(TestCase):
+    def setUp(self):
+        with patch("membership.models.sync_donation_product_to_stripe"):
+            self.product = DonationProduct.objects.create(name="General Fund", disclaimer="")
+            self.other_product = DonationProduct.objects.create(name="Other Fund", disclaimer="")
+        Donation.objects.create(donation_product=self.product, amount="10.00")
+
+    def test_total_is_cached(self):
+        self.assertEqual(donation_total(self.product.id), 10)
+        with self.assertNumQueries(0):
+            self.assertEqual(donation_total(self.product.id), 10)
+
+    def test_new_donation_updates_total(self):
+        self.assertEqual(donation_total(self.product.id), 10)
+        with self.captureOnCommitCallbacks(execute=True):
+            Donation.objects.create(donation_product=self.product, amount="5.50")
+        self.assertEqual(donation_total(self.product.id), Decimal("15.50"))
+
+    def test_moved_donation_updates_both_totals(self):
+        self.assertEqual(donation_total(self.product.id), 10)
+        self.assertEqual(donation_total(self.other_product.id), 0)
+        donation = Donation.objects.get()
+        donation.donation_product = self.other_product
+        with self.captureOnCommitCallbacks(execute=True):
+            donation.save()
+        self.assertEqual(donation_total(self.product.id), 0)
+        self.assertEqual(donation_total(self.other_product.id), 10)
+
+
+class MembershipSnapshotTestCase(TestCase):
+    def setUp(self):
+        self.yesterday = timezone.now().date() - datetime.timedelta(days=1)
+        self.member = User.objects.create_user(
+            username="member", email="member@example.com", password="testpass"
+        )
+        Profile.objects.create(user=self.member)
+        self.other = User.objects.create_user(
+            username="other", email="other@example.com", password="testpass"
+        )
+        Profile.objects.create(user=self.other)
+        Membership.objects.create(
+            user=self.member,
+            kind=Membership.Kind.FISCAL,
+            start_date=self.yesterday - datetime.timedelta(days=10),
+            reason="Test",
+        )
+
+    def test_snapshot_records_members(self):
+        """Taking a snapshot stores one row per member with their criteria"""
+        self.assertEqual(take_snapshot(self.yesterday), 1)
+
+        snapshot = MembershipSnapshot.objects.get(date=self.yesterday)
+        self.assertEqual(snapshot.user, self.member)
+        self.assertTrue(snapshot.via_membership_record)
+        self.assertFalse(snapshot.via_discord)
+        self.assertFalse(snapshot.via_donation)
+        self.assertEqual(MembershipSnapshotRun.objects.get(date=self.yesterday).member_count, 1)
+
+    def test_members_as_of_reads_snapshot(self):
+        """Snapshotted dates read from the snapshot rather than live records"""
+        take_snapshot(self.yesterday)
+        Membership.objects.filter(user=self.member).delete()
+
+        self.assertEqual(list(members_as_of(self.yesterday)), [self.member])
+
+        refresh_user_snapshots(self.member.id)
+        self.assertFalse(members_as_of(self.yesterday).exists())
+        self.assertEqual(MembershipSnapshotRun.objects.get(date=self.yesterday).member_count, 0)
+
+    def test_annotate_membership_matches_snapshot(self):
+        """Live and snapshotted annotations agree"""
+        live = dict(
+            annotate_membership(User.objects.all(), self.yesterday).values_list("pk", "is_member")
+        )
+        take_snapshot(self.yesterday)
+        snapshotted = dict(
+            annotate_membership(User.objects.all(), self.yesterday).values_list("pk", "is_member")
+        )
+        self.assertEqual(live, snapshotted)
+        self.assertEqual(live, {self.member.pk: True, self.other.pk: False})
+
+    def _subscribe(self, user, status):
+        customer = Customer.objects.create(
+            id=f"cus_{uuid.uuid4().hex[:10]}", subscriber=user, livemode=False
+        )
+        now = timezone.now()
+        return Subscription.objects.create(
+            id=f"sub_{uuid.uuid4().hex[:10]}",
+            customer=customer,
+            status=status,
+            created=now - datetime.timedelta(days=60),
+            current_period_start=now - datetime.timedelta(days=30),
+            current_period_end=now + datetime.timedelta(days=30),
+            livemode=False,
+        )
+
+    def test_current_period_requires_active_subscription(self):
+        """Only active or trialing subscriptions count through their current period"""
+        statuses = ["active", "trialing", "canceled", "incomplete", "past_due"]
+        users = {}
+        for status in statuses:
+            users[status] = User.objects.create_user(
+                username=status, email=f"{status}@example.com", password="testpass"
+            )
+            self._subscribe(users[status], status)
+
+        donors = set(
+            annotate_membership(User.objects.all(), self.yesterday)
+            .filter(via_donation=True)
+            .values_list("pk", flat=True)
+        )
+
+        self.assertEqual(donors, {users["active"].pk, users["trialing"].pk})
+
+    def test_refresh_user_snapshots_since(self):
+        """Only snapshots from ``since`` onwards are rewritten"""
+        earlier = self.yesterday - datetime.timedelta(days=5)
+        take_snapshot(earlier)
+        take_snapshot(self.yesterday)
+        Membership.objects.filter(user=self.member).delete()
+
+        refresh_user_snapshots(self.member.id, since=self.yesterday)
+
+        self.assertEqual(list(members_as_of(earlier)), [self.member])
+        self.assertFalse(members_as_of(self.yesterday).exists())
+        self.assertEqual(MembershipSnapshotRun.objects.get(date=earlier).member_count, 1)
+        self.assertEqual(MembershipSnapshotRun.objects.get(date=self.yesterday).member_count, 0)
+
+    @patch("membership.signals.refresh_membership_snapshots")
+    def test_membership_changes_refresh_from_earliest_start_date(self, refresh):
+        membership = Membership.objects.get(user=self.member)
+        original_start = membership.start_date
+
+        with self.captureOnCommitCallbacks(execute=True):
+            membership.start_date = original_start + datetime.timedelta(days=3)
+            membership.save()
+        refresh.delay.assert_called_once_with(self.member.id, since=original_start.isoformat())
+
+        refresh.reset_mock()
+        with self.captureOnCommitCallbacks(execute=True):
+            membership.delete()
+        refresh.delay.assert_called_once_with(
+            self.member.id, since=(original_start + datetime.timedelta(days=3)).isoformat()
+        )
+
+    def test_snapshot_command_rejects_today(self):
+        with self.assertRaises(CommandError):
+            call_command("snapshot_membership", date=timezone.now().date().isoformat())
+
+
+@patch("membership.stripe_sync.sync_stripe_customer")
+class StripeCustomerSyncTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="donor", email="donor@example.com", password="testpass"
+        )
+        self.customer = Customer.objects.create(
+            id=f"cus_{uuid.uuid4().hex[:10]}", subscriber=self.user, livemode=False
+        )
+
+    def test_stale_customer_queues_refresh(self, mock_sync):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(request_customer_sync(self.customer))
+        mock_sync.delay.assert_called_once_with(self.customer.pk)
+
+    def test_fresh_customer_does_not_queue_refresh(self, mock_sync):
+        StripeCustomerSync.objects.create(customer=self.customer, last_synced_at=timezone.now())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertFalse(request_customer_sync(self.customer))
+        mock_sync.delay.assert_not_called()
+
+    def test_refresh_requests_are_rate_limited(self, mock_sync):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(request_customer_sync(self.customer))
+            self.assertFalse(request_customer_sync(self.customer))
+            self.assertFalse(request_customer_sync(self.customer, force=True))
+        mock_sync.delay.assert_called_once_with(self.customer.pk)
+
+    def test_partial_renders_without_calling_stripe(self, mock_sync):
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(reverse("donation_history_partial"))
+        self.assertEqual(response.status_code, 200)
+        mock_sync.delay.assert_called_once_with(self.customer.pk)
@@ -19,6 +19,7 @@ from djstripe.models import (
 
 from membership.forms import RecurringDonationSetupForm
 from membership.models import Donation, DonationProduct, DonationTier
+from membership.stripe_sync import request_customer_sync
 from pbaabp.tasks import create_pba_account
 
 _CUSTOM_FIELDS = [
@@ -358,11 +359,8 @@ def change_recurring_donation(request, subscription_id=None):
 def charge_history_partial(request):
     customer = request.user.djstripe_customers.first()
     if customer:
-        try:
-            customer._sync_subscriptions()
-            customer._sync_charges()
-        except Exception:
-            pass
+        # Render from local data; a background task refreshes it from Stripe
+        request_customer_sync(customer)
         charges = customer.charges.order_by("-created").all()
     else:
         charges = []
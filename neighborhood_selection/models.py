@@ -4,9 +4,12 @@ from django.db import models, transaction
 
 from facets.models import RegisteredCommunityOrganization
 from neighborhood_selection.tasks import update_neighborhood_role_and_channel
+from pbaabp.models import ChangeTrackingMixin
 
 
-class Neighborhood(models.Model):
+class Neighborhood(ChangeTrackingMixin, models.Model):
+    untracked_fields = ("id", "discord_role_id", "discord_channel_id", "requests")
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     discord_role_id = models.CharField(max_length=64, null=True, blank=True)
     discord_channel_id = models.CharField(max_length=64, null=True, blank=True)
@@ -18,20 +21,7 @@ class Neighborhood(models.Model):
     rcos = models.ManyToManyField(RegisteredCommunityOrganization, blank=True)
 
     def save(self, *args, **kwargs):
-        if not self._state.adding:
-            old_model = Neighborhood.objects.get(pk=self.pk)
-            change_fields = [
-                f.name
-                for f in Neighborhood._meta._get_fields()
-                if f.name not in ["id", "discord_role_id", "discord_channel_id", "requests"]
-            ]
-            modified = False
-            for i in change_fields:
-                if getattr(old_model, i, None) != getattr(self, i, None):
-                    modified = True
-            if modified:
-                transaction.on_commit(lambda: update_neighborhood_role_and_channel.delay(self.id))
-        else:
+        if self.has_changed():
             transaction.on_commit(lambda: update_neighborhood_role_and_channel.delay(self.id))
         super(Neighborhood, self).save(*args, **kwargs)
 
@@ -1,10 +1,9 @@
-from asgiref.sync import async_to_sync
 from celery import shared_task
 from django.conf import settings
 from interactions import Permissions
 
-from pba_discord.bot import bot
 from pba_discord.components.neighborhood_selection import NeighborhoodSelection
+from pba_discord.rest import discord_rest
 
 
 async def aupdate_neighborhood_role_and_channel(neighborhood_id):
@@ -14,9 +13,8 @@ async def aupdate_neighborhood_role_and_channel(neighborhood_id):
     if neighborhood is None or not neighborhood.approved:
         return
 
-    await bot.login(settings.DISCORD_BOT_TOKEN)
-    guild = await bot.fetch_guild(settings.NEIGHBORHOOD_SELECTION_DISCORD_GUILD_ID)
-    selection_channel = await guild.fetch_channel(
+    guild = await discord_rest.guild(settings.NEIGHBORHOOD_SELECTION_DISCORD_GUILD_ID)
+    selection_channel = await discord_rest.channel(
         settings.NEIGHBORHOOD_SELECTION_DISCORD_CHANNEL_ID
     )
     channels = await guild.fetch_channels()
@@ -31,6 +29,8 @@ async def aupdate_neighborhood_role_and_channel(neighborhood_id):
             role = await guild.create_role(role_name, permissions=Permissions.NONE)
             neighborhood.discord_role_id = role.id
             await neighborhood.asave()
+            # the cached guild's role list is now out of date
+            discord_rest.invalidate("guild", guild.id)
     else:
         role = await guild.fetch_role(neighborhood.discord_role_id)
 
@@ -58,38 +58,41 @@ async def aupdate_neighborhood_role_and_channel(neighborhood_id):
     await channel.set_permission(guild.default_role, view_channel=False, connect=False)
 
     if settings.NEIGHBORHOOD_SELECTION_NOTIFICATION_DISCORD_CHANNEL_ID:
-        await bot.get_channel(settings.NEIGHBORHOOD_SELECTION_NOTIFICATION_DISCORD_CHANNEL_ID).send(
-            f"Neighborhood `{neighborhood.name}` approved!"
+        notification_channel = await discord_rest.channel(
+            settings.NEIGHBORHOOD_SELECTION_NOTIFICATION_DISCORD_CHANNEL_ID
         )
+        await notification_channel.send(f"Neighborhood `{neighborhood.name}` approved!")
 
     await NeighborhoodSelection.update_buttons(
-        bot, settings.NEIGHBORHOOD_SELECTION_DISCORD_CHANNEL_ID, None
+        discord_rest.client, settings.NEIGHBORHOOD_SELECTION_DISCORD_CHANNEL_ID, None
     )
 
 
 @shared_task
 def update_neighborhood_role_and_channel(neighborhood_id):
-    async_to_sync(aupdate_neighborhood_role_and_channel)(neighborhood_id)
+    discord_rest.run(aupdate_neighborhood_role_and_channel(neighborhood_id))
 
 
 async def adelete_neighborhood_role_and_channel(discord_role_id, discord_channel_id):
-    await bot.login(settings.DISCORD_BOT_TOKEN)
-    guild = await bot.fetch_guild(settings.NEIGHBORHOOD_SELECTION_DISCORD_GUILD_ID)
+    guild = await discord_rest.guild(settings.NEIGHBORHOOD_SELECTION_DISCORD_GUILD_ID)
 
     if discord_channel_id is not None:
         channel = await guild.fetch_channel(discord_channel_id)
         await channel.delete()
+        discord_rest.invalidate("channel", discord_channel_id)
 
     if discord_role_id is not None:
         role = await guild.fetch_role(discord_role_id)
         await role.delete()
+        discord_rest.invalidate("role", discord_role_id)
+        discord_rest.invalidate("guild", guild.id)
 
     await NeighborhoodSelection.update_buttons(
-        bot, settings.NEIGHBORHOOD_SELECTION_DISCORD_CHANNEL_ID, None
+        discord_rest.client, settings.NEIGHBORHOOD_SELECTION_DISCORD_CHANNEL_ID, None
     )
     print("all tidied!")
 
 
 @shared_task
 def delete_neighborhood_role_and_channel(discord_role_id, discord_channel_id):
-    async_to_sync(adelete_neighborhood_role_and_channel)(discord_role_id, discord_channel_id)
+    discord_rest.run(adelete_neighborhood_role_and_channel(discord_role_id, discord_channel_id))
@@ -1,11 +1,11 @@
-from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.sync import sync_to_async
 from celery import shared_task
 from django.conf import settings
 from django.urls import reverse
 from interactions.models.discord.enums import AutoArchiveDuration
 
 from organizers.models import OrganizerApplication
-from pba_discord.bot import bot
+from pba_discord.rest import discord_rest
 
 
 async def _add_new_organizer_message_and_thread(organizer_application_id):
@@ -13,10 +13,11 @@ async def _add_new_organizer_message_and_thread(organizer_application_id):
     if application is None or application.draft or application.thread_id:
         return
 
-    await bot.login(settings.DISCORD_BOT_TOKEN)
-    guild = await bot.fetch_guild(settings.NEW_ORGANIZER_REVIEW_DISCORD_GUILD_ID)
-    selection_channel = await guild.fetch_channel(settings.NEW_ORGANIZER_REVIEW_DISCORD_CHANNEL_ID)
-    mention_role = await guild.fetch_role(settings.NEW_ORGANIZER_REVIEW_DISCORD_ROLE_MENTION_ID)
+    guild = await discord_rest.guild(settings.NEW_ORGANIZER_REVIEW_DISCORD_GUILD_ID)
+    selection_channel = await discord_rest.channel(settings.NEW_ORGANIZER_REVIEW_DISCORD_CHANNEL_ID)
+    mention_role = await discord_rest.role(
+        guild, settings.NEW_ORGANIZER_REVIEW_DISCORD_ROLE_MENTION_ID
+    )
     submitter = await sync_to_async(lambda: application.submitter)()
     profile = await sync_to_async(lambda: submitter.profile)()
     discord = await sync_to_async(lambda: profile.discord)()
@@ -68,4 +69,4 @@ async def _add_new_organizer_message_and_thread(organizer_application_id):
 
 @shared_task
 def add_new_organizer_message_and_thread(organizer_application_id):
-    async_to_sync(_add_new_organizer_message_and_thread)(organizer_application_id)
+    discord_rest.run(_add_new_organizer_message_and_thread(organizer_application_id))
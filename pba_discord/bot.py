@@ -1,3 +1,4 @@
+import asyncio
 import datetime
 import pathlib
 import pkgutil
@@ -17,9 +18,20 @@ from interactions.ext import prefixed_commands
 
 from events.models import EventRSVP, ScheduledEvent
 from pba_discord.handlers import OnMessage
+from profiles.discord_activity import FLUSH_INTERVAL, activity_buffer
 
 
 class PBADiscordBot(Client):
+    _activity_flusher = None
+
+    async def _flush_activity_periodically(self):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            try:
+                await activity_buffer.aflush()
+            except Exception as e:
+                print(f"Failed to flush discord activity: {e}")
+
     @listen()
     async def on_ready(self):
         print(f"Logged on as {self.user}!")
@@ -32,6 +44,10 @@ class PBADiscordBot(Client):
         for handler in self.handlers:
             print(handler.priority, handler)
 
+        # on_ready fires again on reconnect, only start one flusher
+        if self._activity_flusher is None:
+            self._activity_flusher = asyncio.create_task(self._flush_activity_periodically())
+
     @listen()
     async def on_message_create(self, event):
         # Our bot should not pay attention to its own messages
@@ -173,6 +189,13 @@ class PBADiscordBot(Client):
             event.status = ScheduledEvent.Status.DELETED
             await event.asave()
 
+    async def astart(self, token=None):
+        try:
+            await super().astart(token)
+        finally:
+            # Don't lose activity counted since the last flush on shutdown
+            await activity_buffer.aflush()
+
     def run(self, token):
         self.start(token)
 
@@ -1,11 +1,7 @@
-from django.contrib.auth import get_user_model
-from django.db.models import F
 from django.utils import timezone
 
 from pba_discord.handlers import OnMessage
 
-User = get_user_model()
-
 
 class DiscordActivity(OnMessage):
     # defines the priority of this handler, lower numbers execute first
@@ -22,18 +18,7 @@ class DiscordActivity(OnMessage):
         return True
 
     async def on_message(self, message):
-        from profiles.models import DiscordActivity
-
-        if (
-            user := await User.objects.filter(
-                socialaccount__provider="discord", socialaccount__uid=message.author.user.id
-            )
-            .select_related("profile")
-            .aget()
-        ):
-            await DiscordActivity.objects.aupdate_or_create(
-                profile=user.profile,
-                date=timezone.now().date(),
-                defaults={"count": F("count") + 1},
-                create_defaults={"count": 1},
-            )
+        from profiles.discord_activity import activity_buffer
+
+        # Counted in memory; the bot flushes the buffer to the database periodically
+        activity_buffer.record(message.author.user.id, timezone.now().date())
@@ -0,0 +1,114 @@
+import asyncio
+import concurrent.futures
+import os
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from pba_discord.bot import bot
+
+# Marks run() calls that use the instance's timeout
+DEFAULT_TIMEOUT = object()
+
+
+class DiscordREST:
+    """
+    Worker-level access to the Discord REST API for celery tasks.
+
+    Each worker process logs the bot in once and keeps a single event loop
+    running in a background thread, so the bot's HTTP session (and its
+    connection pool) is reused by every task instead of being rebuilt on each
+    ``async_to_sync`` call. Guilds, channels and roles are cached for ``ttl``
+    seconds.
+
+    Database queries made with ``sync_to_async`` from these coroutines run in
+    asgiref's shared thread rather than the task's, so that thread's stale
+    connections are closed around each ``run``, as Django does around requests.
+    """
+
+    def __init__(self, client, ttl=300, timeout=120):
+        self.client = client
+        self.ttl = ttl
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._pid = None
+        self._loop = None
+        self._logged_in = False
+        self._cache = {}
+
+    def _ensure_loop(self):
+        with self._lock:
+            # Worker processes are forked, so anything set up in the parent
+            # process (or a previous incarnation) must be rebuilt.
+            if self._pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever, name="discord-rest", daemon=True
+                ).start()
+                self._pid = os.getpid()
+                self._logged_in = False
+                self._cache = {}
+            return self._loop
+
+    async def _login(self):
+        if not self._logged_in:
+            await self.client.login(settings.DISCORD_BOT_TOKEN)
+            self._logged_in = True
+
+    def run(self, coro, timeout=DEFAULT_TIMEOUT):
+        """
+        Run a coroutine on the worker's Discord loop and return its result.
+        Raises TimeoutError, after cancelling it, if it takes over ``timeout``
+        seconds (the instance's by default; None waits indefinitely).
+        """
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.timeout
+        loop = self._ensure_loop()
+
+        async def _run():
+            await sync_to_async(close_old_connections)()
+            try:
+                await self._login()
+                return await coro
+            finally:
+                await sync_to_async(close_old_connections)()
+
+        future = asyncio.run_coroutine_threadsafe(_run(), loop)
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Discord call timed out after {timeout}s") from None
+
+    async def _cached(self, key, fetch):
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+        value = await fetch()
+        if value is not None:
+            self._cache[key] = (time.monotonic() + self.ttl, value)
+        return value
+
+    def invalidate(self, kind, object_id):
+        self._cache.pop((kind, int(object_id)), None)
+
+    async def guild(self, guild_id):
+        return await self._cached(
+            ("guild", int(guild_id)), lambda: self.client.fetch_guild(guild_id, force=True)
+        )
+
+    async def channel(self, channel_id):
+        return await self._cached(
+            ("channel", int(channel_id)), lambda: self.client.fetch_channel(channel_id, force=True)
+        )
+
+    async def role(self, guild, role_id):
+        return await self._cached(
+            ("role", int(role_id)), lambda: guild.fetch_role(role_id, force=True)
+        )
+
+
+discord_rest = DiscordREST(bot)
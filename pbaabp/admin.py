@@ -3,10 +3,14 @@ from django.contrib import admin
 from django.contrib.admin.sites import NotRegistered
 from django.contrib.auth.forms import AuthenticationForm
 from django.core.exceptions import ValidationError
+from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 from djstripe.models import WebhookEndpoint
 from leaflet.admin import LeafletGeoAdminMixin
 
+from pbaabp.exports import download_url
+from pbaabp.models import ExportJob
+
 
 class ReadOnlyLeafletGeoAdminMixin(LeafletGeoAdminMixin):
     modifiable = False
@@ -85,3 +89,37 @@ class OrganizerAdminSite(admin.AdminSite):
 
 organizer_admin = OrganizerAdminSite(name="organizer_admin")
 organizer_admin.disable_action("delete_selected")
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ["__str__", "created_by", "status", "progress", "download"]
+    list_filter = ["status", "export"]
+    fields = [
+        "export",
+        "created_by",
+        "created_at",
+        "finished_at",
+        "status",
+        "progress",
+        "download",
+    ]
+    readonly_fields = fields
+    ordering = ["-created_at"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def progress(self, obj):
+        if not obj.total_rows:
+            return "-"
+        percent = int(100 * obj.rows_written / obj.total_rows)
+        return f"{obj.rows_written:,} of {obj.total_rows:,} rows ({percent}%)"
+
+    def download(self, obj):
+        if obj.status != ExportJob.Status.DONE or not obj.file:
+            return "-"
+        return format_html('<a href="{}">Download</a>', download_url(obj))
@@ -133,6 +133,7 @@ def send_email_message(
     subject=None,
     attachments=None,
     reply_to=None,
+    connection=None,
 ):
     """
     Send an email message.
@@ -146,6 +147,7 @@ def send_email_message(
     templates.
     :param subject_template: optional string to use as the subject template, in place of
        email/{{ template_name }}/subject.txt
+    :param connection: optional open email connection, to reuse across messages
     """
     # Filter out emails in DoNotEmail list
     filtered_to = []
@@ -203,6 +205,7 @@ def send_email_message(
         from_,
         to,
         reply_to=reply_to,
+        connection=connection,
     )
     mail.mixed_subtype = "related"
 
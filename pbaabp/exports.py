@@ -0,0 +1,190 @@
+"""
+CSV exports for admin actions.
+
+Small exports stream straight back to the browser. Larger ones become an
+ExportJob that a Celery task writes out as gzipped CSV through a server-side
+cursor; the admin shows its progress and, once it's done, a signed download
+link.
+"""
+
+import csv
+import datetime
+import gzip
+import io
+import itertools
+import tempfile
+
+from django.contrib import admin, messages
+from django.core import signing
+from django.core.files import File
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import format_html
+
+from pbaabp.models import ExportJob
+from pbaabp.streaming import streaming_csv_response
+from pbaabp.tasks import run_export_job
+
+# Selections up to this many rows are exported within the request
+SYNC_EXPORT_LIMIT = 2000
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_CHUNK_SIZE = 2000
+
+# Rows between progress updates on a running job
+PROGRESS_INTERVAL = 5000
+
+# Primary keys per query when a job reads back its rows
+OBJECT_ID_CHUNK_SIZE = 5000
+
+DOWNLOAD_SALT = "pbaabp.exports.download"
+
+# Seconds a download link works for
+DOWNLOAD_MAX_AGE = 60 * 60 * 24
+
+# Finished exports hold personal data, so they're deleted after this long
+EXPORT_RETENTION = datetime.timedelta(days=7)
+
+EXPORTS = {}
+
+
+class CSVExport:
+    """
+    A CSV export of a model's rows. Subclasses set ``name``, ``model`` and the
+    ``fields`` for the header, and implement ``row``. Override ``prepare`` to
+    add select_related and the like to the queryset.
+    """
+
+    name = None
+    model = None
+    fields = []
+
+    def prepare(self, queryset):
+        return queryset
+
+    def row(self, obj):
+        raise NotImplementedError
+
+    def rows(self, queryset):
+        # iterator() uses a server-side cursor, so rows are never all held in memory
+        for obj in self.prepare(queryset).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield self.row(obj)
+
+
+def register_export(cls):
+    """Class decorator making a CSVExport available to export jobs."""
+    EXPORTS[cls.name] = cls()
+    return cls
+
+
+class _Echo:
+    """File-like object for csv.writer that hands each row back instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+def stream_export(export, queryset):
+    """A response streaming the export as CSV."""
+    writer = csv.writer(_Echo())
+    lines = itertools.chain([export.fields], export.rows(queryset))
+    return streaming_csv_response((writer.writerow(line) for line in lines), f"{export.name}.csv")
+
+
+def start_export_job(export, queryset, user, total_rows):
+    job = ExportJob.objects.create(
+        export=export.name,
+        object_ids=list(queryset.order_by().values_list("pk", flat=True)),
+        created_by=user,
+        total_rows=total_rows,
+    )
+    transaction.on_commit(lambda: run_export_job.delay(job.pk))
+    return job
+
+
+def run_export(job):
+    """Write the job's rows to a gzipped CSV file in export storage."""
+    export = EXPORTS[job.export]
+    manager = export.model._default_manager
+
+    ExportJob.objects.filter(pk=job.pk).update(status=ExportJob.Status.RUNNING)
+    written = 0
+    try:
+        with tempfile.TemporaryFile() as tmp:
+            with gzip.GzipFile(fileobj=tmp, mode="wb") as compressed:
+                text = io.TextIOWrapper(compressed, encoding="utf-8", newline="")
+                writer = csv.writer(text)
+                writer.writerow(export.fields)
+                for start in range(0, len(job.object_ids), OBJECT_ID_CHUNK_SIZE):
+                    chunk = job.object_ids[start : start + OBJECT_ID_CHUNK_SIZE]
+                    for row in export.rows(manager.filter(pk__in=chunk).order_by("pk")):
+                        writer.writerow(row)
+                        written += 1
+                        if written % PROGRESS_INTERVAL == 0:
+                            ExportJob.objects.filter(pk=job.pk).update(rows_written=written)
+                text.flush()
+                text.detach()
+            tmp.seek(0)
+            job.file.save(
+                f"{export.name}-{job.created_at:%Y%m%d-%H%M%S}.csv.gz", File(tmp), save=False
+            )
+    except Exception:
+        ExportJob.objects.filter(pk=job.pk).update(
+            status=ExportJob.Status.FAILED, rows_written=written, finished_at=timezone.now()
+        )
+        raise
+    job.status = ExportJob.Status.DONE
+    job.rows_written = written
+    job.finished_at = timezone.now()
+    job.save(update_fields=["file", "status", "rows_written", "finished_at"])
+
+
+def download_url(job):
+    """A link to the job's file that works for DOWNLOAD_MAX_AGE seconds."""
+    token = signing.dumps(str(job.pk), salt=DOWNLOAD_SALT)
+    return reverse("export_download", kwargs={"token": token})
+
+
+def can_download(user, job):
+    """Exports hold personal data: only their creator and users who may view jobs get them."""
+    return user.is_staff and (
+        job.created_by_id == user.pk or user.has_perm("pbaabp.view_exportjob")
+    )
+
+
+def job_for_download(token):
+    """The ExportJob a download token was signed for, or None if it's invalid or expired."""
+    try:
+        job_id = signing.loads(token, salt=DOWNLOAD_SALT, max_age=DOWNLOAD_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    return ExportJob.objects.filter(pk=job_id, status=ExportJob.Status.DONE).first()
+
+
+def export_action(export_class, description="Export selected as CSV"):
+    """
+    An admin action running ``export_class``: streamed for small selections,
+    a background job for larger ones.
+    """
+    export = EXPORTS[export_class.name]
+
+    @admin.action(description=description)
+    def action(modeladmin, request, queryset):
+        total_rows = queryset.count()
+        if total_rows <= SYNC_EXPORT_LIMIT:
+            return stream_export(export, queryset)
+        job = start_export_job(export, queryset, request.user, total_rows)
+        modeladmin.message_user(
+            request,
+            format_html(
+                'Exporting {} rows in the background. <a href="{}">Follow its progress</a>.',
+                total_rows,
+                reverse("admin:pbaabp_exportjob_change", args=[job.pk]),
+            ),
+            messages.INFO,
+        )
+
+    # Action names must be unique within a model admin
+    action.__name__ = f"export_{export.name}"
+    return action
@@ -0,0 +1,65 @@
+from django.conf import settings
+
+
+class FakeMailjet:
+    """
+    In-memory stand-in for the Mailjet client, for tests. Contacts are kept in
+    ``contacts`` keyed by email and every API call is recorded in ``calls``.
+    """
+
+    def __init__(self):
+        self.contact_list_id = settings.MAILJET_CONTACT_LIST_ID
+        self.contacts = {}
+        self.calls = []
+        self._next_id = 1
+
+    def _new_contact(self, email):
+        contact = {"ID": self._next_id, "Email": email, "Name": "", "Properties": {}, "Lists": {}}
+        self._next_id += 1
+        self.contacts[email] = contact
+        return contact
+
+    def create_contact(self, email):
+        self.calls.append(("create_contact", email))
+        return self._new_contact(email)
+
+    def get_contact(self, email):
+        self.calls.append(("get_contact", email))
+        return self.contacts.get(email)
+
+    def fetch_contact(self, email):
+        self.calls.append(("fetch_contact", email))
+        return self.contacts.get(email) or self._new_contact(email)
+
+    def update_contact_data(self, email, data):
+        self.calls.append(("update_contact_data", email))
+        contact = self.contacts[email]
+        contact["Properties"].update(data)
+        return contact
+
+    def fetch_contact_lists(self, email):
+        self.calls.append(("fetch_contact_lists", email))
+        contact = self.contacts.get(email)
+        if contact is None:
+            return {"Count": 0, "Data": [], "Total": 0}
+        data = [
+            {"ListID": list_id, "IsUnsub": not subscribed}
+            for list_id, subscribed in contact["Lists"].items()
+        ]
+        return {"Count": len(data), "Data": data, "Total": len(data)}
+
+    def add_contact_to_list(self, email, subscribed=True):
+        self.calls.append(("add_contact_to_list", email))
+        contact = self.contacts[email]
+        contact["Lists"][int(self.contact_list_id)] = subscribed
+        return contact
+
+    def manage_many_contacts(self, contacts, subscribed=None):
+        self.calls.append(("manage_many_contacts", [c["Email"] for c in contacts]))
+        for data in contacts:
+            contact = self.contacts.get(data["Email"]) or self._new_contact(data["Email"])
+            contact["Name"] = data.get("Name", contact["Name"])
+            contact["Properties"].update(data.get("Properties", {}))
+            if subscribed is not None:
+                contact["Lists"][int(self.contact_list_id)] = subscribed
+        return [len(self.calls)]
@@ -1,22 +1,53 @@
 import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_session = None
+
+
+def get_session():
+    """
+    Shared requests session for the Mailjet API, so connections are pooled
+    across calls. Retries transient errors and rate limiting, honouring
+    Mailjet's Retry-After header.
+    """
+    global _session
+    if _session is None:
+        retry = Retry(
+            total=5,
+            backoff_factor=1,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=None,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        _session = requests.Session()
+        _session.mount("https://", HTTPAdapter(max_retries=retry, pool_maxsize=10))
+    return _session
 
 
 class Mailjet:
-    def __init__(self):
+    # Mailjet accepts large bulk payloads, but smaller jobs finish faster
+    bulk_batch_size = 1000
+
+    def __init__(self, session=None):
         self.base_url = "https://api.mailjet.com/v3/REST"
         self.api_key = settings.MAILJET_API_KEY
         self.secret_key = settings.MAILJET_SECRET_KEY
         self.contact_list_id = settings.MAILJET_CONTACT_LIST_ID
         self.auth = (self.api_key, self.secret_key)
+        self.session = session or get_session()
 
     def create_contact(self, email):
-        response = requests.post(f"{self.base_url}/contact", json={"Email": email}, auth=self.auth)
+        response = self.session.post(
+            f"{self.base_url}/contact", json={"Email": email}, auth=self.auth
+        )
         response.raise_for_status()
         return response.json()["Data"][0]
 
     def get_contact(self, email):
-        response = requests.get(f"{self.base_url}/contact/{email}", auth=self.auth)
+        response = self.session.get(f"{self.base_url}/contact/{email}", auth=self.auth)
         try:
             response.raise_for_status()
         except requests.exceptions.HTTPError as e:
@@ -27,7 +58,7 @@ class Mailjet:
         return response.json()["Data"][0]
 
     def fetch_contact(self, email):
-        response = requests.get(f"{self.base_url}/contact/{email}", auth=self.auth)
+        response = self.session.get(f"{self.base_url}/contact/{email}", auth=self.auth)
         try:
             response.raise_for_status()
         except requests.exceptions.HTTPError as e:
@@ -38,7 +69,7 @@ class Mailjet:
         return response.json()["Data"][0]
 
     def update_contact_data(self, email, data):
-        response = requests.put(
+        response = self.session.put(
             f"{self.base_url}/contactdata/{email}",
             json={"Data": [{"Name": k, "Value": v} for k, v in data.items()]},
             auth=self.auth,
@@ -47,7 +78,9 @@ class Mailjet:
         return response.json()["Data"][0]
 
     def fetch_contact_lists(self, email):
-        response = requests.get(f"{self.base_url}/contact/{email}/getcontactslists", auth=self.auth)
+        response = self.session.get(
+            f"{self.base_url}/contact/{email}/getcontactslists", auth=self.auth
+        )
         try:
             response.raise_for_status()
         except requests.exceptions.HTTPError as e:
@@ -59,10 +92,40 @@ class Mailjet:
         return response.json()
 
     def add_contact_to_list(self, email, subscribed=True):
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/contactslist/{self.contact_list_id}/managecontact",
             json={"Action": "addforce" if subscribed else "remove", "Email": email},
             auth=self.auth,
         )
         response.raise_for_status()
         return response.json()["Data"][0]
+
+    def manage_many_contacts(self, contacts, subscribed=None):
+        """
+        Create or update many contacts, with their contact properties, in bulk.
+        ``contacts`` is a list of ``{"Email", "Name", "Properties"}`` dicts. When
+        ``subscribed`` is True or False they are also added to or removed from the
+        newsletter list. Returns the Mailjet job IDs.
+        """
+        contacts_lists = []
+        if subscribed is not None:
+            contacts_lists.append(
+                {
+                    "ListID": int(self.contact_list_id),
+                    "Action": "addforce" if subscribed else "remove",
+                }
+            )
+
+        job_ids = []
+        for start in range(0, len(contacts), self.bulk_batch_size):
+            response = self.session.post(
+                f"{self.base_url}/contact/managemanycontacts",
+                json={
+                    "Contacts": contacts[start : start + self.bulk_batch_size],
+                    "ContactsLists": contacts_lists,
+                },
+                auth=self.auth,
+            )
+            response.raise_for_status()
+            job_ids.append(response.json()["Data"][0]["JobID"])
+        return job_ids
@@ -1,3 +1,4 @@
+import uuid
 from functools import partial
 
 import bleach
@@ -5,7 +6,11 @@ import cmarkgfm
 from bleach.linkifier import LinkifyFilter
 from cmarkgfm.cmark import Options as cmarkgfmOptions
 from django import forms
+from django.conf import settings
 from django.contrib.postgres.fields import ArrayField
+from django.core.files.storage import storages
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
 from markdownfield.models import MarkdownField as _MarkdownField
 from markdownfield.util import blacklist_link, format_link
 
@@ -65,3 +70,126 @@ class MarkdownField(_MarkdownField):
             setattr(model_instance, self.rendered_field, dirty)
 
         return value
+
+
+class ChangeTrackingMixin:
+    """
+    Snapshot field values when an instance is loaded from (or saved to) the
+    database so ``save()`` overrides can see what changed without re-fetching
+    the row.
+
+    Set ``tracked_fields`` to the field names to watch, or ``untracked_fields``
+    to watch every concrete field except those.
+
+    Usage:
+
+        class Thing(ChangeTrackingMixin, models.Model):
+            tracked_fields = ["name"]
+
+            def save(self, *args, **kwargs):
+                if self.has_changed("name"):
+                    ...
+                super().save(*args, **kwargs)
+    """
+
+    tracked_fields = None
+    untracked_fields = ()
+
+    @classmethod
+    def _tracked_attnames(cls):
+        if cls.tracked_fields is not None:
+            fields = [cls._meta.get_field(name) for name in cls.tracked_fields]
+        else:
+            fields = [f for f in cls._meta.concrete_fields if f.name not in cls.untracked_fields]
+        return {f.name: f.attname for f in fields}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked_fields()
+        return instance
+
+    def _snapshot_tracked_fields(self, fields=None):
+        if fields is None or not hasattr(self, "_tracked_initial"):
+            self._tracked_initial = {}
+        for name, attname in self._tracked_attnames().items():
+            if fields is not None and name not in fields and attname not in fields:
+                continue
+            # Deferred fields aren't in __dict__ and are left out of the snapshot
+            if attname in self.__dict__:
+                self._tracked_initial[name] = self.__dict__[attname]
+
+    def previous_value(self, field_name):
+        """Value of a tracked field as it was last loaded from or saved to the database."""
+        initial = getattr(self, "_tracked_initial", {})
+        if field_name in initial:
+            return initial[field_name]
+        # Deferred on load, so fall back to asking the database
+        return (
+            type(self)._base_manager.filter(pk=self.pk).values_list(field_name, flat=True).first()
+        )
+
+    def has_changed(self, *field_names):
+        """
+        Whether any of the given tracked fields (or any tracked field if none are
+        given) differ from the database. Unsaved instances always count as changed.
+        """
+        initial = getattr(self, "_tracked_initial", None)
+        if self._state.adding or initial is None:
+            return True
+        attnames = self._tracked_attnames()
+        for name in field_names or attnames:
+            attname = attnames[name]
+            if name not in initial:
+                # Deferred on load; it can only have changed if it has been assigned since
+                if attname in self.__dict__:
+                    return True
+            elif self.__dict__.get(attname) != initial[name]:
+                return True
+        return False
+
+    @property
+    def changed_fields(self):
+        return [name for name in self._tracked_attnames() if self.has_changed(name)]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        self._snapshot_tracked_fields(fields=update_fields)
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._snapshot_tracked_fields(fields=fields)
+
+
+def export_storage():
+    return storages["exports"]
+
+
+class ExportJob(models.Model):
+    """A CSV export run in the background by pbaabp.exports."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending"
+        RUNNING = "running"
+        DONE = "done"
+        FAILED = "failed"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, on_delete=models.SET_NULL, related_name="+"
+    )
+
+    export = models.CharField(max_length=64)
+    # Primary keys of the exported rows
+    object_ids = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    total_rows = models.IntegerField(default=0)
+    rows_written = models.IntegerField(default=0)
+    file = models.FileField(storage=export_storage, upload_to="exports/", null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.export} export {self.created_at:%Y-%m-%d %H:%M}"
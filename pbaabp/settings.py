@@ -2,6 +2,7 @@ import sys
 from pathlib import Path
 
 import environ
+from celery.schedules import crontab
 
 env = environ.Env()
 
@@ -273,6 +274,11 @@ TESTING = "test" in sys.argv
 
 STORAGES = {
     "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    # Admin CSV exports, outside MEDIA_ROOT and only served through signed links
+    "exports": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {"location": BASE_DIR / "private"},
+    },
     "staticfiles": {
         # Use simpler storage during tests to avoid manifest requirement
         "BACKEND": (
@@ -301,6 +307,10 @@ if all(
     [x is not None for x in [AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_STORAGE_BUCKET_NAME]]
 ):
     STORAGES["default"] = {"BACKEND": "storages.backends.s3boto3.S3Boto3Storage"}
+    STORAGES["exports"] = {
+        "BACKEND": "storages.backends.s3boto3.S3Boto3Storage",
+        "OPTIONS": {"default_acl": "private"},
+    }
     THUMBNAIL_DEFAULT_STORAGE = "storages.backends.s3boto3.S3Boto3Storage"
 
 # Default primary key field type
@@ -311,7 +321,35 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Celery
 CELERY_BROKER_URL = _REDIS_URL
 CELERY_RESULT_BACKEND = _REDIS_URL
-CELERY_BEAT_SCHEDULE = {}
+CELERY_BEAT_SCHEDULE = {
+    "snapshot-membership": {
+        "task": "membership.tasks.snapshot_membership",
+        "schedule": crontab(hour=1, minute=0),
+    },
+    # Picks up any queued Mailjet updates whose scheduled flush was lost
+    "flush-mailjet-updates": {
+        "task": "profiles.tasks.flush_mailjet_updates",
+        "schedule": 300.0,
+    },
+    # Picks up any new petition signatures whose scheduled processing was lost
+    "process-petition-signatures": {
+        "task": "campaigns.tasks.process_petition_signatures",
+        "schedule": 300.0,
+    },
+    "delete-expired-exports": {
+        "task": "pbaabp.tasks.delete_expired_exports",
+        "schedule": crontab(hour=4, minute=0),
+    },
+    "freeze-voter-rolls": {
+        "task": "elections.tasks.freeze_voter_rolls",
+        "schedule": crontab(minute=5),
+    },
+    # Catches connected role changes missed by the SocialAccount signals
+    "reconcile-connected-role": {
+        "task": "profiles.tasks.reconcile_connected_role",
+        "schedule": crontab(hour=3, minute=30),
+    },
+}
 
 # MAIL
 # ------------------------------------------------------------------------------
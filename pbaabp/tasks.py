@@ -7,10 +7,10 @@ from django.conf import settings
 from django.db import transaction
 from django.test import RequestFactory
 from django.urls import reverse
+from django.utils import timezone
 from easy_thumbnails.files import generate_all_aliases
 
 from pbaabp.email import send_email_message
-from pbaabp.integrations.mailjet import Mailjet
 from profiles.forms import BaseProfileSignupForm
 
 BASE_MESSAGE = """
@@ -92,17 +92,18 @@ def subscribe_to_newsletter(email, first_name=None, last_name=None, tags=None):
         name += first_name
     if last_name:
         name += f" {last_name}"
-    mailjet = Mailjet()
-    mailjet.fetch_contact(email)
-    mailjet.update_contact_data(
+    from profiles.mailjet_sync import queue_contact_update
+
+    queue_contact_update(
         email,
         {
             "first_name": first_name,
             "last_name": last_name,
             "name": name,
         },
+        subscribed=True,
+        name=name,
     )
-    mailjet.add_contact_to_list(email, subscribed=True)
 
 
 @shared_task
@@ -111,3 +112,21 @@ def generate_thumbnails(app_name, object_name, pk, field):
     instance = model._default_manager.get(pk=pk)
     fieldfile = getattr(instance, field)
     generate_all_aliases(fieldfile, include_global=True)
+
+
+@shared_task
+def run_export_job(job_id):
+    from pbaabp.exports import run_export
+    from pbaabp.models import ExportJob
+
+    run_export(ExportJob.objects.get(pk=job_id))
+
+
+@shared_task
+def delete_expired_exports():
+    from pbaabp.exports import EXPORT_RETENTION
+    from pbaabp.models import ExportJob
+
+    for job in ExportJob.objects.filter(created_at__lt=timezone.now() - EXPORT_RETENTION):
+        job.file.delete(save=False)
+        job.delete()
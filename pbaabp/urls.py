@@ -29,6 +29,7 @@ from pbaabp.views import (
     email_draft,
     email_draft_image,
     email_draft_preview,
+    export_download,
     mailjet_unsubscribe,
     newsletter_bridge,
     wagtail_pages,
@@ -48,6 +49,7 @@ urlpatterns = [
     path("email-draft/", email_draft, name="email_draft"),
     path("email-draft/preview/", email_draft_preview, name="email_draft_preview"),
     path("email-draft/image/<str:filename>", email_draft_image, name="email_draft_image"),
+    path("exports/<str:token>/", export_download, name="export_download"),
     path("maillink/", include("maillinks.urls")),
     path("rcos/", include("facets.urls")),
     path("projects/", include("projects.urls")),
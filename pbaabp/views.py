@@ -4,6 +4,7 @@ import os
 
 import sesame.utils
 from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import PermissionDenied, SuspiciousOperation
@@ -20,6 +21,7 @@ from pbaabp.email import (
     send_email_message,
     template_from_string,
 )
+from pbaabp.exports import can_download, job_for_download
 from pbaabp.forms import EmailDraftForm, EmailLoginForm, NewsletterSignupForm
 from pbaabp.tasks import subscribe_to_newsletter
 from profiles.tasks import add_mailjet_subscriber, unsubscribe_mailjet_email
@@ -215,3 +217,18 @@ def email_draft_image(request, filename):
         raise Http404()
 
     return FileResponse(open(image_path, "rb"), content_type="image/png")
+
+
+@staff_member_required
+def export_download(request, token):
+    job = job_for_download(token)
+    if job is None or not job.file:
+        raise Http404()
+    if not can_download(request.user, job):
+        raise PermissionDenied
+    return FileResponse(
+        job.file.open("rb"),
+        as_attachment=True,
+        filename=os.path.basename(job.file.name),
+        content_type="application/gzip",
+    )
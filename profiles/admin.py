@@ -1,12 +1,22 @@
-import csv
 import datetime
 from collections import defaultdict
 from io import BytesIO
 
+from allauth.socialaccount.models import SocialAccount
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
-from django.db.models import Count, Exists, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models import (
+    Count,
+    IntegerField,
+    OuterRef,
+    Prefetch,
+    Q,
+    Subquery,
+    Value,
+    prefetch_related_objects,
+)
 from django.db.models.functions import Coalesce
 from django.http import HttpResponse
 from django.utils import timezone
@@ -16,9 +26,10 @@ from email_log.models import Email
 from reportlab.lib.units import inch as rl_inch
 from reportlab.pdfgen import canvas
 
-from facets.models import District, RegisteredCommunityOrganization
-from membership.models import Membership
+from facets.models import District, FacetOverlap, RegisteredCommunityOrganization
+from membership.status import annotate_membership
 from pbaabp.admin import ReadOnlyLeafletGeoAdminMixin, organizer_admin
+from pbaabp.exports import CSVExport, export_action, register_export
 from profiles.models import DiscordActivity, DoNotEmail, Profile, ShirtOrder
 
 
@@ -162,20 +173,12 @@ class MemberFilter(admin.SimpleListFilter):
             "True",
             True,
         ):
-            return queryset.filter(
-                Q(has_discord_activity=True)
-                | Q(has_active_subscription=True)
-                | Q(has_special_membership=True)
-            )
+            return queryset.filter(is_member=True)
         elif self.value() in (
             "False",
             False,
         ):
-            return queryset.filter(
-                has_discord_activity=False,
-                has_active_subscription=False,
-                has_special_membership=False,
-            )
+            return queryset.filter(is_member=False)
         return queryset
 
 
@@ -192,12 +195,12 @@ class MemberByDonationFilter(admin.SimpleListFilter):
             "True",
             True,
         ):
-            return queryset.filter(has_active_subscription=True)
+            return queryset.filter(via_donation=True)
         elif self.value() in (
             "False",
             False,
         ):
-            return queryset.filter(has_active_subscription=False)
+            return queryset.filter(via_donation=False)
         return queryset
 
 
@@ -214,12 +217,12 @@ class MemberByDiscordActivityFilter(admin.SimpleListFilter):
             "True",
             True,
         ):
-            return queryset.filter(has_discord_activity=True)
+            return queryset.filter(via_discord=True)
         elif self.value() in (
             "False",
             False,
         ):
-            return queryset.filter(has_discord_activity=False)
+            return queryset.filter(via_discord=False)
         return queryset
 
 
@@ -236,12 +239,12 @@ class MemberBySpecialRecognitionFilter(admin.SimpleListFilter):
             "True",
             True,
         ):
-            return queryset.filter(has_special_membership=True)
+            return queryset.filter(via_membership_record=True)
         elif self.value() in (
             "False",
             False,
         ):
-            return queryset.filter(has_special_membership=False)
+            return queryset.filter(via_membership_record=False)
         return queryset
 
 
@@ -298,11 +301,16 @@ class EmailHistory:
 
 class OrganizerRCOFilter(RCOFilter):
     def lookups(self, request, model_amin):
+        overlaps = FacetOverlap.objects.filter(
+            source_kind=District.overlap_kind,
+            source_id__in=request.user.profile.organized_districts.values("id"),
+            target_kind=RegisteredCommunityOrganization.overlap_kind,
+        )
         return [
             (f.id, f.name)
-            for district in request.user.profile.organized_districts.all()
-            for f in district.intersecting_rcos.all()
-            if f.targetable
+            for f in RegisteredCommunityOrganization.objects.filter(
+                targetable=True, id__in=overlaps.values("target_id")
+            )
         ]
 
 
@@ -313,6 +321,14 @@ class OrganizesDistrictInline(admin.TabularInline):
     extra = 0
 
 
+class ProfileChangeList(ChangeList):
+    def get_results(self, request):
+        super().get_results(request)
+        # Evaluating the page here fills the queryset's result cache, so the
+        # prefetched data lands on the same instances the template renders.
+        self.model_admin.prefetch_page(self.result_list)
+
+
 class ProfileAdmin(ReadOnlyLeafletGeoAdminMixin, admin.ModelAdmin):
     list_display = [
         "_name",
@@ -372,34 +388,13 @@ class ProfileAdmin(ReadOnlyLeafletGeoAdminMixin, admin.ModelAdmin):
         queryset = queryset.annotate(email_count_30d=Coalesce(email_count_subquery, Value(0)))
 
         # Pre-compute membership status flags to avoid expensive joins in filters
-        now = timezone.now().date()
-
-        # Check for active Stripe subscriptions
-        has_active_subscription = Exists(
-            Subscription.objects.filter(
-                customer__subscriber=OuterRef("user"), status__in=["active"]
-            )
-        )
-
-        # Check for Discord activity in last 30 days
-        # Need both Discord connection AND recent activity
-        has_discord_activity = Exists(
-            DiscordActivity.objects.filter(
-                profile=OuterRef("pk"), date__gte=(now - datetime.timedelta(days=30))
-            ).filter(profile__user__socialaccount__provider="discord")
-        )
-
-        # Check for special recognition membership
-        has_special_membership = Exists(
-            Membership.objects.filter(user=OuterRef("user"), start_date__lte=now).filter(
-                Q(end_date__isnull=True) | Q(end_date__gte=now)
-            )
-        )
+        queryset = annotate_membership(queryset, user_ref="user")
 
+        # Council district for the list column, rather than a spatial query per row
         queryset = queryset.annotate(
-            has_active_subscription=has_active_subscription,
-            has_discord_activity=has_discord_activity,
-            has_special_membership=has_special_membership,
+            council_district_name=Subquery(
+                District.objects.filter(mpoly__contains=OuterRef("location")).values("name")[:1]
+            )
         )
 
         return queryset
@@ -414,34 +409,97 @@ class ProfileAdmin(ReadOnlyLeafletGeoAdminMixin, admin.ModelAdmin):
             return ""
         return f"{obj.user.first_name} {obj.user.last_name}"
 
-    def discord_handle(self, obj=None):
-        if obj is None or obj.discord is None:
-            return ""
-        return obj.discord.extra_data["username"]
+    def get_changelist(self, request, **kwargs):
+        return ProfileChangeList
 
-    def discord_activity(self, obj=None):
-        if obj is None:
-            return ""
+    def prefetch_page(self, profiles):
+        """
+        Load the data behind the per-row columns for a page of profiles in a
+        handful of grouped queries, instead of a few queries per row.
+        """
+        profiles = [profile for profile in profiles if not hasattr(profile, "recent_email_dates")]
+        if not profiles:
+            return
+
+        ninety_days_ago = timezone.now().date() - datetime.timedelta(days=90)
+        prefetch_related_objects(
+            profiles,
+            Prefetch(
+                "user__socialaccount_set",
+                queryset=SocialAccount.objects.filter(provider="discord"),
+                to_attr="discord_accounts",
+            ),
+            Prefetch(
+                "discord_activity",
+                queryset=DiscordActivity.objects.filter(date__gte=ninety_days_ago),
+                to_attr="recent_discord_activity",
+            ),
+            Prefetch(
+                "user__djstripe_customers__subscriptions",
+                queryset=Subscription.objects.filter(status__in=["active", "trialing"]),
+                to_attr="active_subscription_list",
+            ),
+            "organized_districts",
+        )
+
+        # Recipients are free text, so match every address on the page in one
+        # scan of the email log and split the results up here.
+        addresses = {profile.user.email.lower() for profile in profiles if profile.user.email}
+        recipients_q = Q()
+        for address in addresses:
+            recipients_q |= Q(recipients__icontains=address)
+        emails = (
+            Email.objects.filter(recipients_q, date_sent__gte=ninety_days_ago).values_list(
+                "recipients", "date_sent"
+            )
+            if addresses
+            else []
+        )
+        email_dates = defaultdict(list)
+        for recipients, date_sent in emails:
+            recipients = recipients.lower()
+            for address in addresses:
+                if address in recipients:
+                    email_dates[address].append(date_sent.date())
+
+        for profile in profiles:
+            profile.recent_email_dates = email_dates.get((profile.user.email or "").lower(), [])
+
+    def _prefetched(self, obj):
+        self.prefetch_page([obj])
+        return obj
+
+    def _discord_account(self, obj):
+        accounts = self._prefetched(obj).user.discord_accounts
+        return accounts[0] if accounts else None
+
+    def _sparkline_counts(self, counts_by_date):
         date_range_prev_60 = [
             timezone.now().date() - datetime.timedelta(days=(90 - i)) for i in range(60)
         ]
         date_range_last_30 = [
             timezone.now().date() - datetime.timedelta(days=(30 - i)) for i in range(31)
         ]
-        query_prev_60 = DiscordActivity.objects.filter(
-            profile=obj, date__in=date_range_prev_60
-        ).all()
-        query_last_30 = DiscordActivity.objects.filter(
-            profile=obj, date__in=date_range_last_30
-        ).all()
-        counts_by_date_prev_60 = {activity.date: activity.count for activity in query_prev_60}
-        counts_by_date_last_30 = {activity.date: activity.count for activity in query_last_30}
-        counts_prev_60 = ",".join(
-            [str(counts_by_date_prev_60.get(date, 0)) for date in date_range_prev_60]
-        )
-        counts_last_30 = ",".join(
-            [str(counts_by_date_last_30.get(date, 0)) for date in date_range_last_30]
-        )
+        counts_prev_60 = ",".join([str(counts_by_date.get(date, 0)) for date in date_range_prev_60])
+        counts_last_30 = ",".join([str(counts_by_date.get(date, 0)) for date in date_range_last_30])
+        return counts_prev_60, counts_last_30
+
+    def discord_handle(self, obj=None):
+        if obj is None:
+            return ""
+        discord = self._discord_account(obj)
+        if discord is None:
+            return ""
+        return discord.extra_data["username"]
+
+    def discord_activity(self, obj=None):
+        if obj is None:
+            return ""
+        counts_by_date = {
+            activity.date: activity.count
+            for activity in self._prefetched(obj).recent_discord_activity
+        }
+        counts_prev_60, counts_last_30 = self._sparkline_counts(counts_by_date)
         return mark_safe(
             f"""
             <div style="padding: 0; margin: 0; display: block; border-collapse: collapse;">
@@ -490,12 +548,14 @@ class ProfileAdmin(ReadOnlyLeafletGeoAdminMixin, admin.ModelAdmin):
     def districts_organized(self, obj=None):
         if obj is None:
             return ""
-        return ", ".join([d.name.lstrip("District ") for d in obj.organized_districts.all()])
+        return ", ".join(
+            [d.name.lstrip("District ") for d in self._prefetched(obj).organized_districts.all()]
+        )
 
     def apps_connected(self, obj=None):
         if obj is None:
             return False
-        return obj.discord is not None
+        return self._discord_account(obj) is not None
 
     apps_connected.boolean = True
 
@@ -507,7 +567,10 @@ class ProfileAdmin(ReadOnlyLeafletGeoAdminMixin, admin.ModelAdmin):
     def council_district_display(self, obj=None):
         if obj is None:
             return None
-        return obj.district
+        if obj.street_address is None:
+            return None
+        # Annotated in get_queryset
+        return obj.council_district_name
 
     council_district_display.short_description = "District"
 
@@ -523,9 +586,10 @@ class ProfileAdmin(ReadOnlyLeafletGeoAdminMixin, admin.ModelAdmin):
     def active_subscription(self, obj=None):
         if obj is None:
             return None
-        if customer := obj.user.djstripe_customers.first():
-            print(customer)
-            if subscription := customer.active_subscriptions.first():
+        customers = self._prefetched(obj).user.djstripe_customers.all()
+        if customers:
+            if subscriptions := customers[0].active_subscription_list:
+                subscription = subscriptions[0]
                 return (
                     f"${subscription.stripe_data['plan']['amount'] / 100:,.2f}/"
                     f"{subscription.stripe_data['plan']['interval']} "
@@ -537,29 +601,12 @@ class ProfileAdmin(ReadOnlyLeafletGeoAdminMixin, admin.ModelAdmin):
         if obj is None or not obj.user.email:
             return ""
 
-        # Get date ranges for sparkline
-        date_range_prev_60 = [
-            timezone.now().date() - datetime.timedelta(days=(90 - i)) for i in range(60)
-        ]
-        date_range_last_30 = [
-            timezone.now().date() - datetime.timedelta(days=(30 - i)) for i in range(31)
-        ]
-
-        # Query emails for the last 90 days
-        ninety_days_ago = timezone.now().date() - datetime.timedelta(days=90)
-        emails = Email.objects.filter(
-            recipients__icontains=obj.user.email, date_sent__gte=ninety_days_ago
-        ).values_list("date_sent", flat=True)
-
         # Count emails by date
-        email_dates = [email.date() if hasattr(email, "date") else email for email in emails]
         counts_by_date = {}
-        for date in email_dates:
+        for date in self._prefetched(obj).recent_email_dates:
             counts_by_date[date] = counts_by_date.get(date, 0) + 1
 
-        # Build counts for sparklines
-        counts_prev_60 = ",".join([str(counts_by_date.get(date, 0)) for date in date_range_prev_60])
-        counts_last_30 = ",".join([str(counts_by_date.get(date, 0)) for date in date_range_last_30])
+        counts_prev_60, counts_last_30 = self._sparkline_counts(counts_by_date)
 
         return mark_safe(
             f"""
@@ -975,9 +1022,10 @@ def export_shipping_labels(modeladmin, request, queryset):
     return response
 
 
-@admin.action(description="Export Orders as CSV")
-def csv_export(self, request, queryset):
-
+@register_export
+class ShirtOrderExport(CSVExport):
+    name = "shirt-orders"
+    model = ShirtOrder
     fields = [
         "product_type",
         "shipping_method",
@@ -992,28 +1040,23 @@ def csv_export(self, request, queryset):
         "get_size_display",
     ]
 
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = "attachment; filename=shirt-orders.csv"
-    writer = csv.writer(response)
-    writer.writerow(fields)
-    for obj in queryset:
-        writer.writerow(
-            [
-                obj.get_product_type_display(),
-                obj.shipping_method,
-                obj.shipping_name(),
-                obj.shipping_line1(),
-                obj.shipping_line2(),
-                obj.shipping_city(),
-                obj.shipping_state(),
-                obj.shipping_postal_code(),
-                obj.get_fit_display(),
-                obj.get_print_color_display(),
-                obj.get_size_display(),
-            ]
-        )
+    def row(self, obj):
+        return [
+            obj.get_product_type_display(),
+            obj.shipping_method,
+            obj.shipping_name(),
+            obj.shipping_line1(),
+            obj.shipping_line2(),
+            obj.shipping_city(),
+            obj.shipping_state(),
+            obj.shipping_postal_code(),
+            obj.get_fit_display(),
+            obj.get_print_color_display(),
+            obj.get_size_display(),
+        ]
 
-    return response
+
+csv_export = export_action(ShirtOrderExport, description="Export Orders as CSV")
 
 
 class ShirtOrderAdmin(ReadOnlyLeafletGeoAdminMixin, admin.ModelAdmin):
@@ -0,0 +1,98 @@
+import uuid
+from collections import Counter
+
+from allauth.socialaccount.models import SocialAccount
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import connection, transaction
+
+# Seconds between flushes of buffered message counts from the bot
+FLUSH_INTERVAL = 30
+
+# Bumped whenever a Discord SocialAccount changes, so every process holding a
+# uid -> profile map knows to drop it
+PROFILE_MAP_VERSION_KEY = "discord-activity-profile-map-version"
+
+
+def invalidate_profile_map():
+    cache.set(PROFILE_MAP_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+class DiscordActivityBuffer:
+    """
+    Accumulates Discord message counts per (discord uid, date) in memory and
+    writes them with one bulk upsert per flush, instead of a lookup and an
+    update for every message.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self._profile_ids = {}
+        self._profile_map_version = None
+
+    def record(self, uid, date):
+        self.counts[(int(uid), date)] += 1
+
+    def _resolve_profiles(self, uids):
+        version = cache.get(PROFILE_MAP_VERSION_KEY)
+        if version != self._profile_map_version:
+            self._profile_ids = {}
+            self._profile_map_version = version
+
+        missing = {uid for uid in uids if uid not in self._profile_ids}
+        if missing:
+            # Unlinked uids are remembered as None so they aren't looked up again
+            self._profile_ids.update(dict.fromkeys(missing))
+            self._profile_ids.update(
+                (int(uid), profile_id)
+                for uid, profile_id in SocialAccount.objects.filter(
+                    provider="discord",
+                    uid__in=[str(uid) for uid in missing],
+                    user__profile__isnull=False,
+                ).values_list("uid", "user__profile__id")
+            )
+        return self._profile_ids
+
+    def write(self, counts):
+        """Upsert ``counts``, adding them to any counts already stored."""
+        # Imported here as profiles.models leads, through profiles.tasks and
+        # pba_discord.rest, to the bot, which imports this module
+        from profiles.models import DiscordActivity
+
+        profile_ids = self._resolve_profiles({uid for uid, _ in counts})
+        rows = Counter()
+        for (uid, date), count in counts.items():
+            if profile_ids.get(uid) is not None:
+                rows[(profile_ids[uid], date)] += count
+        if not rows:
+            return 0
+
+        table = DiscordActivity._meta.db_table
+        values = ", ".join(["(%s, %s, %s)"] * len(rows))
+        params = [
+            param
+            for (profile_id, date), count in rows.items()
+            for param in (profile_id, date, count)
+        ]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (profile_id, date, count) VALUES {values} "
+                "ON CONFLICT (profile_id, date) "
+                f"DO UPDATE SET count = {table}.count + EXCLUDED.count",
+                params,
+            )
+        return len(rows)
+
+    async def aflush(self):
+        counts, self.counts = self.counts, Counter()
+        if not counts:
+            return 0
+        try:
+            return await sync_to_async(self.write)(counts)
+        except Exception:
+            # Keep the counts for the next flush rather than dropping them
+            self.counts.update(counts)
+            raise
+
+
+activity_buffer = DiscordActivityBuffer()
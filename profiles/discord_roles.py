@@ -0,0 +1,103 @@
+from allauth.socialaccount.models import SocialAccount
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from pba_discord.rest import discord_rest
+
+# Discord's maximum page size for the list guild members endpoint
+MEMBER_PAGE_SIZE = 1000
+
+# Largest share of the role's holders a reconcile may remove without ``force``.
+# Losing most linked accounts at once points at a bad query or settings rather
+# than real unlinks.
+MAX_REMOVAL_SHARE = 0.1
+
+
+class UnsafeRoleChange(Exception):
+    pass
+
+
+def plan_connected_role_changes(member_roles, linked_uids, role_id, force=False):
+    """
+    Work out which guild members need the connected role added or removed.
+
+    ``member_roles`` maps member IDs to the set of role IDs they hold and
+    ``linked_uids`` is the set of Discord IDs with a linked account. Linked
+    accounts that aren't in the guild are skipped; there's nothing to assign.
+    Returns ``(to_add, to_remove)`` as sorted lists of member IDs.
+
+    Raises UnsafeRoleChange, unless ``force`` is set, when there are no linked
+    accounts at all or more than MAX_REMOVAL_SHARE of the role's holders would
+    lose it.
+    """
+    to_add = sorted(
+        uid for uid in linked_uids if uid in member_roles and role_id not in member_roles[uid]
+    )
+    to_remove = sorted(
+        uid for uid, roles in member_roles.items() if role_id in roles and uid not in linked_uids
+    )
+    if to_remove and not force:
+        holders = sum(1 for roles in member_roles.values() if role_id in roles)
+        if not linked_uids:
+            raise UnsafeRoleChange(f"No linked accounts; refusing to remove {holders} roles")
+        if len(to_remove) > holders * MAX_REMOVAL_SHARE:
+            raise UnsafeRoleChange(
+                f"Refusing to remove the role from {len(to_remove)} of {holders} holders"
+            )
+    return to_add, to_remove
+
+
+async def _fetch_member_roles(guild_id):
+    member_roles = {}
+    after = 0
+    while True:
+        page = await discord_rest.client.http.list_members(
+            guild_id, limit=MEMBER_PAGE_SIZE, after=after
+        )
+        for member in page:
+            member_roles[int(member["user"]["id"])] = {int(r) for r in member["roles"]}
+        if len(page) < MEMBER_PAGE_SIZE:
+            return member_roles
+        after = page[-1]["user"]["id"]
+
+
+def _linked_uids():
+    return {
+        int(uid)
+        for uid in SocialAccount.objects.filter(provider="discord").values_list("uid", flat=True)
+    }
+
+
+async def areconcile_connected_role(dry_run=False, force=False):
+    """
+    Bring the connected role in line with linked Discord accounts, touching only
+    the members whose role is wrong. Requests go out one at a time through the
+    bot's HTTP client, which waits out Discord's rate limit buckets using the
+    X-RateLimit headers (and Retry-After on a 429), so no fixed sleep is needed.
+    Mass removals are refused unless ``force`` is set; see
+    plan_connected_role_changes.
+    """
+    guild_id = int(settings.DISCORD_CONNECTED_GUILD_ID)
+    role_id = int(settings.DISCORD_CONNECTED_ROLE_ID)
+
+    member_roles = await _fetch_member_roles(guild_id)
+    linked_uids = await sync_to_async(_linked_uids)()
+    to_add, to_remove = plan_connected_role_changes(member_roles, linked_uids, role_id, force=force)
+
+    if not dry_run:
+        for uid in to_add:
+            await discord_rest.client.http.add_guild_member_role(
+                guild_id, uid, role_id, reason="Linked Discord account"
+            )
+        for uid in to_remove:
+            await discord_rest.client.http.remove_guild_member_role(
+                guild_id, uid, role_id, reason="No linked Discord account"
+            )
+
+    return {"members": len(member_roles), "added": to_add, "removed": to_remove}
+
+
+def reconcile_connected_role(dry_run=False, force=False):
+    # One rate-limited request per change, so a backfill can take far longer
+    # than a single Discord call is normally allowed.
+    return discord_rest.run(areconcile_connected_role(dry_run=dry_run, force=force), timeout=None)
@@ -0,0 +1,104 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from events.models import EventSignIn
+from pbaabp.integrations.mailjet import Mailjet
+from profiles.models import MailjetContactUpdate, Profile
+from profiles.tasks import flush_mailjet_updates
+
+# Seconds to wait after the first queued update before pushing to Mailjet, so
+# that bursts of updates (and updates for the same address) go out together.
+FLUSH_DELAY = 30
+
+# Pending updates pushed per flush; a full batch schedules another flush.
+FLUSH_BATCH_SIZE = 500
+
+FLUSH_SCHEDULED_KEY = "mailjet-flush-scheduled"
+
+# A lost scheduled flush only holds up scheduling this long; the beat schedule
+# picks up its updates meanwhile.
+FLUSH_SCHEDULED_TIMEOUT = 300
+
+
+def _schedule_flush():
+    if cache.add(FLUSH_SCHEDULED_KEY, True, timeout=FLUSH_SCHEDULED_TIMEOUT):
+        flush_mailjet_updates.apply_async(countdown=FLUSH_DELAY)
+
+
+def queue_contact_update(email, properties=None, subscribed=None, name=None):
+    """
+    Queue a Mailjet update for ``email``, merging it into any update already
+    pending for that address. ``subscribed`` adds the contact to (True) or
+    removes it from (False) the newsletter list; None leaves the list alone.
+    """
+    with transaction.atomic():
+        update, _ = MailjetContactUpdate.objects.select_for_update().get_or_create(email=email)
+        update.properties = {**update.properties, **(properties or {})}
+        if subscribed is not None:
+            update.subscribed = subscribed
+        if name:
+            update.name = name
+        update.version += 1
+        update.save()
+
+    # Updates merged into a row that's mid-flush stay queued, so schedule a
+    # flush for any update unless one is already pending
+    transaction.on_commit(_schedule_flush)
+    return update
+
+
+def _store_contact_ids(mailjet, emails):
+    """Fill in missing Mailjet contact IDs for profiles and event sign ins."""
+    missing = set(
+        Profile.objects.filter(user__email__in=emails, mailjet_contact_id__isnull=True).values_list(
+            "user__email", flat=True
+        )
+    ) | set(
+        EventSignIn.objects.filter(
+            email__in=emails, newsletter_opt_in=True, mailjet_contact_id__isnull=True
+        ).values_list("email", flat=True)
+    )
+    for email in sorted(missing):
+        contact_id = mailjet.fetch_contact(email)["ID"]
+        # update() rather than save(), so storing the ID doesn't queue another sync
+        Profile.objects.filter(user__email=email, mailjet_contact_id__isnull=True).update(
+            mailjet_contact_id=contact_id
+        )
+        EventSignIn.objects.filter(email=email, mailjet_contact_id__isnull=True).update(
+            mailjet_contact_id=contact_id
+        )
+
+
+def flush_contact_updates(mailjet=None):
+    """
+    Push pending updates to Mailjet with one bulk request per list action.
+    Returns the number of updates pushed.
+    """
+    # Updates queued from here on schedule a new flush
+    cache.delete(FLUSH_SCHEDULED_KEY)
+    mailjet = mailjet or Mailjet()
+    updates = list(MailjetContactUpdate.objects.order_by("updated_at")[:FLUSH_BATCH_SIZE])
+    if not updates:
+        return 0
+
+    _store_contact_ids(mailjet, [update.email for update in updates])
+
+    for subscribed in (True, False, None):
+        contacts = [
+            {"Email": update.email, "Name": update.name, "Properties": update.properties}
+            for update in updates
+            if update.subscribed is subscribed
+        ]
+        if contacts:
+            mailjet.manage_many_contacts(contacts, subscribed=subscribed)
+
+    # Updates merged in while we were pushing have a newer version and stay queued
+    pushed = Q()
+    for update in updates:
+        pushed |= Q(pk=update.pk, version=update.version)
+    MailjetContactUpdate.objects.filter(pushed).delete()
+
+    if len(updates) == FLUSH_BATCH_SIZE:
+        transaction.on_commit(lambda: flush_mailjet_updates.delay())
+    return len(updates)
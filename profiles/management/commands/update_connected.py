@@ -1,15 +1,30 @@
-import time
+from django.core.management.base import BaseCommand, CommandError
 
-from allauth.socialaccount.models import SocialAccount
-from django.core.management.base import BaseCommand
-
-from profiles.tasks import add_user_to_connected_role
+from profiles.discord_roles import UnsafeRoleChange, reconcile_connected_role
 
 
 class Command(BaseCommand):
-    help = "Update roles for all connected discord auths"
+    help = "Reconcile the connected role with all connected discord auths"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report the changes that would be made without making them",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Make the changes even if they would remove the role from many members",
+        )
 
-    def handle(self, *args, **kwargs):
-        for sa in SocialAccount.objects.filter(provider="discord"):
-            add_user_to_connected_role.delay(sa.uid)
-            time.sleep(10)
+    def handle(self, *args, **options):
+        try:
+            result = reconcile_connected_role(dry_run=options["dry_run"], force=options["force"])
+        except UnsafeRoleChange as e:
+            raise CommandError(f"{e}. Check the linked accounts, or pass --force.")
+        prefix = "[dry run] " if options["dry_run"] else ""
+        self.stdout.write(
+            f"{prefix}Checked {result['members']} guild members: "
+            f"{len(result['added'])} added, {len(result['removed'])} removed"
+        )
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.15 on 2026-10-19 18:05
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_days(apps, schema_editor):
+    DiscordActivity = apps.get_model("profiles", "DiscordActivity")
+    duplicates = (
+        DiscordActivity.objects.values("profile", "date")
+        .annotate(rows=Count("id"), keep=Min("id"), total=Sum("count"))
+        .filter(rows__gt=1)
+    )
+    for duplicate in duplicates:
+        DiscordActivity.objects.filter(id=duplicate["keep"]).update(count=duplicate["total"])
+        DiscordActivity.objects.filter(
+            profile=duplicate["profile"], date=duplicate["date"]
+        ).exclude(id=duplicate["keep"]).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0023_mailjetcontactupdate"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_days, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name="discordactivity",
+            name="profiles_di_profile_1454a5_idx",
+        ),
+        migrations.AddConstraint(
+            model_name="discordactivity",
+            constraint=models.UniqueConstraint(
+                fields=("profile", "date"), name="unique_discord_activity_day"
+            ),
+        ),
+    ]
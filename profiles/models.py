@@ -14,12 +14,17 @@ from facets.models import (
     RegisteredCommunityOrganization as RegisteredCommunityOrganizationFacet,
 )
 from membership.models import Membership
+from membership.status import FLAGS as MEMBERSHIP_FLAGS
+from membership.status import status_for_user
 from organizers.models import OrganizerApplication
+from pbaabp.models import ChangeTrackingMixin
 from profiles.tasks import geocode_profile, sync_to_mailjet
 from projects.models import ProjectApplication
 
 
-class Profile(models.Model):
+class Profile(ChangeTrackingMixin, models.Model):
+    tracked_fields = ["newsletter_opt_in", "street_address"]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     mailjet_contact_id = models.BigIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -67,82 +72,35 @@ class Profile(models.Model):
     location = models.PointField(blank=True, null=True, srid=4326)
 
     def save(self, *args, **kwargs):
-        if not self._state.adding:
-            old_model = Profile.objects.get(pk=self.pk)
-            change_fields = [
-                f.name
-                for f in Profile._meta._get_fields()
-                if f.name in ["newsletter_opt_in", "street_address"]
-            ]
-            modified = False
-            for i in change_fields:
-                if getattr(old_model, i, None) != getattr(self, i, None):
-                    modified = True
-            if modified:
-                transaction.on_commit(lambda: sync_to_mailjet.delay(self.id))
-                transaction.on_commit(lambda: geocode_profile.delay(self.id))
-        else:
+        if self.has_changed():
             transaction.on_commit(lambda: sync_to_mailjet.delay(self.id))
             transaction.on_commit(lambda: geocode_profile.delay(self.id))
         super(Profile, self).save(*args, **kwargs)
 
-    def membership(self):
-        now = timezone.now().date()
-
-        # Check if there's an active Membership record
-        has_membership_record = (
-            Membership.objects.filter(
-                user=self.user,
-                start_date__lte=now,
-            )
-            .filter(Q(end_date__isnull=True) | Q(end_date__gte=now))
-            .exists()
-        )
-
-        if has_membership_record:
-            return True
+    def membership_status(self):
+        """Today's membership flags for this profile's user, fetched once per instance."""
+        if not hasattr(self, "_membership_status"):
+            if hasattr(self, "is_member"):
+                # Loaded through annotate_membership, e.g. in the admin
+                self._membership_status = {
+                    flag: getattr(self, flag) for flag in (*MEMBERSHIP_FLAGS, "is_member")
+                }
+            else:
+                self._membership_status = status_for_user(self.user_id)
+        return self._membership_status
 
-        # Otherwise check Discord activity or active subscription
-        return (
-            User.objects.filter(id=self.user.id)
-            .filter(
-                Q(
-                    Q(socialaccount__provider="discord")
-                    & Q(
-                        profile__discord_activity__date__gte=(
-                            timezone.now().date() - datetime.timedelta(days=30)
-                        )
-                    )
-                )
-                | Q(djstripe_customers__subscriptions__status__in=["active"])
-            )
-            .exists()
-        )
+    def membership(self):
+        return self.membership_status()["is_member"]
 
     membership.boolean = True
 
     def donor(self):
-        return (
-            User.objects.filter(id=self.user.id)
-            .filter(Q(djstripe_customers__subscriptions__status__in=["active"]))
-            .exists()
-        )
+        return self.membership_status()["via_donation"]
 
     donor.boolean = True
 
     def discord_active(self):
-        return (
-            User.objects.filter(id=self.user.id)
-            .filter(
-                Q(socialaccount__provider="discord")
-                & Q(
-                    profile__discord_activity__date__gte=(
-                        timezone.now().date() - datetime.timedelta(days=30)
-                    )
-                )
-            )
-            .exists()
-        )
+        return self.membership_status()["via_discord"]
 
     discord_active.boolean = True
 
@@ -405,7 +363,9 @@ class DiscordActivity(models.Model):
     count = models.IntegerField()
 
     class Meta:
-        indexes = [models.Index(fields=["profile", "date"])]
+        constraints = [
+            models.UniqueConstraint(fields=["profile", "date"], name="unique_discord_activity_day")
+        ]
 
 
 class DoNotEmail(models.Model):
@@ -430,6 +390,24 @@ class DoNotEmail(models.Model):
         verbose_name_plural = "Do Not Email"
 
 
+class MailjetContactUpdate(models.Model):
+    """
+    A pending Mailjet update for one email address. Updates queued for the same
+    address before the next flush are merged into a single row.
+    """
+
+    email = models.EmailField(unique=True)
+    name = models.CharField(max_length=256, blank=True, default="")
+    properties = models.JSONField(default=dict)
+    subscribed = models.BooleanField(null=True, blank=True)
+    version = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Pending Mailjet update for {self.email}"
+
+
 class ShirtOrder(models.Model):
     class ProductType(models.IntegerChoices):
         T_SHIRT = 0, "T-Shirt"
@@ -1,37 +1,42 @@
+import requests
 from asgiref.sync import async_to_sync
 from celery import shared_task
 from django.conf import settings
 from django.contrib.gis.geos import Point
 
 from facets.utils import geocode_address
-from pba_discord.bot import bot
-from pbaabp.integrations.mailjet import Mailjet
+from pba_discord.rest import discord_rest
 
 
 async def _add_user_to_connected_role(uid):
-    await bot.login(settings.DISCORD_BOT_TOKEN)
-    guild = await bot.fetch_guild(settings.DISCORD_CONNECTED_GUILD_ID)
-    role = await guild.fetch_role(settings.DISCORD_CONNECTED_ROLE_ID)
-    member = await guild.fetch_member(uid)
-    await member.add_role(role.id)
+    # The role and guild are known, so this is a single request
+    await discord_rest.client.http.add_guild_member_role(
+        settings.DISCORD_CONNECTED_GUILD_ID, uid, settings.DISCORD_CONNECTED_ROLE_ID
+    )
 
 
 @shared_task
 def add_user_to_connected_role(uid):
-    async_to_sync(_add_user_to_connected_role)(uid)
+    discord_rest.run(_add_user_to_connected_role(uid))
 
 
 async def _remove_user_from_connected_role(uid):
-    await bot.login(settings.DISCORD_BOT_TOKEN)
-    guild = await bot.fetch_guild(settings.DISCORD_CONNECTED_GUILD_ID)
-    role = await guild.fetch_role(settings.DISCORD_CONNECTED_ROLE_ID)
-    member = await guild.fetch_member(uid)
-    await member.remove_role(role.id)
+    await discord_rest.client.http.remove_guild_member_role(
+        settings.DISCORD_CONNECTED_GUILD_ID, uid, settings.DISCORD_CONNECTED_ROLE_ID
+    )
 
 
 @shared_task
 def remove_user_from_connected_role(uid):
-    async_to_sync(_remove_user_from_connected_role)(uid)
+    discord_rest.run(_remove_user_from_connected_role(uid))
+
+
+@shared_task
+def reconcile_connected_role():
+    from profiles.discord_roles import reconcile_connected_role
+
+    result = reconcile_connected_role()
+    return {"added": len(result["added"]), "removed": len(result["removed"])}
 
 
 @shared_task
@@ -55,13 +60,11 @@ def geocode_profile(profile_id):
 
 @shared_task
 def sync_to_mailjet(profile_id):
+    from profiles.mailjet_sync import queue_contact_update
     from profiles.models import Profile
 
-    profile = Profile.objects.get(id=profile_id)
-    mailjet = Mailjet()
-
-    response = mailjet.fetch_contact(profile.user.email)
-    mailjet.update_contact_data(
+    profile = Profile.objects.select_related("user").get(id=profile_id)
+    queue_contact_update(
         profile.user.email,
         {
             "apps": True,
@@ -70,18 +73,16 @@ def sync_to_mailjet(profile_id):
             "last_name": profile.user.last_name,
             "name": profile.user.first_name + " " + profile.user.last_name,
         },
+        subscribed=profile.newsletter_opt_in,
+        name=f"{profile.user.first_name} {profile.user.last_name}",
     )
-    mailjet.add_contact_to_list(profile.user.email, subscribed=profile.newsletter_opt_in)
-    profile.mailjet_contact_id = response["ID"]
-    profile.save()
 
 
 @shared_task
 def add_mailjet_subscriber(email, first_name, last_name, name):
-    mailjet = Mailjet()
+    from profiles.mailjet_sync import queue_contact_update
 
-    mailjet.fetch_contact(email)
-    mailjet.update_contact_data(
+    queue_contact_update(
         email,
         {
             "newsletter_form": True,
@@ -89,8 +90,16 @@ def add_mailjet_subscriber(email, first_name, last_name, name):
             "last_name": last_name,
             "name": name,
         },
+        subscribed=True,
+        name=name,
     )
-    mailjet.add_contact_to_list(email, subscribed=True)
+
+
+@shared_task(autoretry_for=(requests.RequestException,), retry_backoff=True, max_retries=5)
+def flush_mailjet_updates():
+    from profiles.mailjet_sync import flush_contact_updates
+
+    return flush_contact_updates()
 
 
 @shared_task
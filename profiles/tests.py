@@ -1,13 +1,45 @@
+import asyncio
+import csv
 import datetime
+import gzip
+import tempfile
+import threading
+from io import StringIO
+from unittest.mock import patch
 
 from allauth.socialaccount.models import SocialAccount
-from django.contrib.auth.models import User
-from django.test import TestCase
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import Permission, User
+from django.contrib.gis.geos import MultiPolygon, Polygon
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from django.utils import timezone
 from djstripe.models import Customer, Price, Product, Subscription
 
+from facets.models import District
 from membership.models import Membership
-from profiles.models import DiscordActivity, Profile
+from pba_discord.rest import DiscordREST
+from pbaabp.exports import download_url, run_export
+from pbaabp.integrations.fake_mailjet import FakeMailjet
+from pbaabp.models import ExportJob
+from profiles.discord_activity import DiscordActivityBuffer
+from profiles.discord_roles import UnsafeRoleChange, plan_connected_role_changes
+from profiles.mailjet_sync import (
+    FLUSH_SCHEDULED_KEY,
+    flush_contact_updates,
+    queue_contact_update,
+)
+from profiles.models import DiscordActivity, MailjetContactUpdate, Profile, ShirtOrder
+from profiles.tasks import sync_to_mailjet
+
+
+async def read_streamed(response):
+    """The text of a response streaming an async iterator."""
+    return b"".join([chunk async for chunk in response.streaming_content]).decode()
 
 
 class ProfileEligibilityTestCase(TestCase):
@@ -702,3 +734,395 @@ class ProfileEligibilityTestCase(TestCase):
         after_end = end_date + datetime.timedelta(days=1)
         result = self.profile.eligible_as_of(after_end)
         self.assertFalse(result["membership_sufficient_alone"])
+
+
+class ProfileChangeTrackingTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="tracked", email="tracked@example.com", password="testpass123"
+        )
+        Profile.objects.create(user=self.user, street_address="123 Main St", zip_code="19107")
+        self.profile = Profile.objects.select_related("user").get(user=self.user)
+
+    def test_save_without_changes_is_a_single_query(self):
+        """Saving an unchanged profile shouldn't re-fetch the row"""
+        with self.assertNumQueries(1):
+            self.profile.save()
+
+    def test_save_with_changes_is_a_single_query(self):
+        self.profile.street_address = "456 Market St"
+        with self.assertNumQueries(1):
+            self.profile.save()
+
+    @patch("profiles.models.geocode_profile")
+    @patch("profiles.models.sync_to_mailjet")
+    def test_tracked_change_enqueues_sync(self, mock_sync, mock_geocode):
+        self.profile.street_address = "456 Market St"
+        self.assertTrue(self.profile.has_changed("street_address"))
+        self.assertEqual(self.profile.changed_fields, ["street_address"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.save()
+
+        mock_sync.delay.assert_called_once_with(self.profile.id)
+        mock_geocode.delay.assert_called_once_with(self.profile.id)
+        self.assertFalse(self.profile.has_changed())
+
+    @patch("profiles.models.geocode_profile")
+    @patch("profiles.models.sync_to_mailjet")
+    def test_untracked_change_does_not_enqueue_sync(self, mock_sync, mock_geocode):
+        self.profile.pronouns = "they/them"
+        self.profile.mailjet_contact_id = 12345
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.save()
+
+        mock_sync.delay.assert_not_called()
+        mock_geocode.delay.assert_not_called()
+
+
+class ProfileAdminChangelistTestCase(TestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="testpass123"
+        )
+        Profile.objects.create(user=self.admin_user)
+        self.client.force_login(self.admin_user)
+
+    def _create_profiles(self, start, count):
+        for i in range(start, start + count):
+            user = User.objects.create_user(
+                username=f"listed{i}", email=f"listed{i}@example.com", password="testpass123"
+            )
+            profile = Profile.objects.create(
+                user=user, street_address=f"{i} Main St", zip_code="19107"
+            )
+            SocialAccount.objects.create(
+                user=user, provider="discord", uid=f"listed{i}", extra_data={"username": f"l{i}"}
+            )
+            DiscordActivity.objects.create(
+                profile=profile, date=timezone.now().date() - datetime.timedelta(days=5), count=3
+            )
+            District.objects.first().organizers.add(profile)
+
+    def _changelist_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("admin:profiles_profile_changelist"))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Per-row columns are prefetched for the whole page"""
+        District.objects.create(
+            name="District 1",
+            mpoly=MultiPolygon(Polygon(((0, 0), (0, 1), (1, 1), (1, 0), (0, 0)))),
+            properties={},
+        )
+        self._create_profiles(0, 2)
+        few = self._changelist_queries()
+
+        self._create_profiles(2, 6)
+        self.assertEqual(self._changelist_queries(), few)
+
+
+class ShirtOrderExportTestCase(TestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="testpass123"
+        )
+        Profile.objects.create(user=self.admin_user)
+        self.client.force_login(self.admin_user)
+        for name in ["Ann", "Ben", "Cat"]:
+            ShirtOrder.objects.create(
+                user=self.admin_user,
+                shipping_details={"name": name, "address": {"city": "Philadelphia"}},
+                fit=ShirtOrder.Fit.NEXT_LEVEL_3600,
+                size=ShirtOrder.Size.M,
+                print_color=ShirtOrder.PrintColor.PINK,
+            )
+        export_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(export_dir.cleanup)
+        storage = patch.object(
+            ExportJob._meta.get_field("file"),
+            "storage",
+            FileSystemStorage(location=export_dir.name),
+        )
+        storage.start()
+        self.addCleanup(storage.stop)
+
+    def _export(self):
+        return self.client.post(
+            reverse("admin:profiles_shirtorder_changelist"),
+            {
+                "action": "export_shirt-orders",
+                "_selected_action": ShirtOrder.objects.values_list("pk", flat=True),
+            },
+        )
+
+    def test_small_export_streams(self):
+        response = self._export()
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(StringIO(async_to_sync(read_streamed)(response))))
+        self.assertEqual(rows[0][:3], ["product_type", "shipping_method", "shipping_name"])
+        self.assertEqual(sorted(row[2] for row in rows[1:]), ["Ann", "Ben", "Cat"])
+        self.assertFalse(ExportJob.objects.exists())
+
+    @patch("pbaabp.exports.run_export_job")
+    @patch("pbaabp.exports.SYNC_EXPORT_LIMIT", 2)
+    def test_large_export_runs_in_background(self, mock_run_export_job):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._export()
+        self.assertEqual(response.status_code, 302)
+        job = ExportJob.objects.get()
+        self.assertEqual(job.total_rows, 3)
+        self.assertCountEqual(job.object_ids, ShirtOrder.objects.values_list("pk", flat=True))
+        mock_run_export_job.delay.assert_called_once_with(job.pk)
+
+        run_export(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.Status.DONE)
+        self.assertEqual(job.rows_written, 3)
+
+        response = self.client.get(download_url(job))
+        content = gzip.decompress(b"".join(response.streaming_content)).decode()
+        rows = list(csv.reader(StringIO(content)))
+        self.assertEqual(sorted(row[2] for row in rows[1:]), ["Ann", "Ben", "Cat"])
+
+    def test_download_link_must_be_signed(self):
+        response = self.client.get(reverse("export_download", kwargs={"token": "not-signed"}))
+        self.assertEqual(response.status_code, 404)
+
+    @patch("pbaabp.exports.run_export_job")
+    @patch("pbaabp.exports.SYNC_EXPORT_LIMIT", 2)
+    def test_download_needs_creator_or_view_permission(self, mock_run_export_job):
+        self._export()
+        job = ExportJob.objects.get()
+        run_export(job)
+
+        staff = User.objects.create_user(username="staff", password="testpass123", is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(download_url(job)).status_code, 403)
+
+        staff.user_permissions.add(Permission.objects.get(codename="view_exportjob"))
+        staff = User.objects.get(pk=staff.pk)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(download_url(job)).status_code, 200)
+
+
+@override_settings(MAILJET_CONTACT_LIST_ID="1")
+@patch("profiles.mailjet_sync.flush_mailjet_updates")
+class MailjetSyncTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="mailjet",
+            email="mailjet@example.com",
+            password="testpass123",
+            first_name="Mail",
+            last_name="Jet",
+        )
+        self.profile = Profile.objects.create(user=self.user, newsletter_opt_in=True)
+        self.mailjet = FakeMailjet()
+        cache.delete(FLUSH_SCHEDULED_KEY)
+
+    def test_updates_for_the_same_email_are_merged(self, mock_flush):
+        with self.captureOnCommitCallbacks(execute=True):
+            queue_contact_update("mailjet@example.com", {"first_name": "Mail"}, subscribed=False)
+            queue_contact_update("mailjet@example.com", {"apps": True}, subscribed=True)
+
+        update = MailjetContactUpdate.objects.get()
+        self.assertEqual(update.properties, {"first_name": "Mail", "apps": True})
+        self.assertTrue(update.subscribed)
+        mock_flush.apply_async.assert_called_once()
+
+    def test_flush_pushes_updates_in_bulk(self, mock_flush):
+        sync_to_mailjet(self.profile.id)
+        queue_contact_update("other@example.com", {"newsletter_form": True}, subscribed=True)
+        queue_contact_update("gone@example.com", {}, subscribed=False)
+
+        self.assertEqual(flush_contact_updates(self.mailjet), 3)
+
+        bulk_calls = [call for call in self.mailjet.calls if call[0] == "manage_many_contacts"]
+        self.assertEqual(len(bulk_calls), 2)
+        contact = self.mailjet.contacts["mailjet@example.com"]
+        self.assertEqual(contact["Properties"]["first_name"], "Mail")
+        self.assertTrue(contact["Lists"][1])
+        self.assertFalse(self.mailjet.contacts["gone@example.com"]["Lists"][1])
+        self.assertFalse(MailjetContactUpdate.objects.exists())
+
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.mailjet_contact_id, contact["ID"])
+
+    def test_updates_queued_during_a_flush_are_kept(self, mock_flush):
+        queue_contact_update("mailjet@example.com", {"first_name": "Mail"})
+        pending = MailjetContactUpdate.objects.get()
+
+        original = self.mailjet.manage_many_contacts
+
+        def queue_during_push(contacts, subscribed=None):
+            queue_contact_update("mailjet@example.com", {"last_name": "Jet"})
+            return original(contacts, subscribed=subscribed)
+
+        self.mailjet.manage_many_contacts = queue_during_push
+        flush_contact_updates(self.mailjet)
+
+        remaining = MailjetContactUpdate.objects.get()
+        self.assertEqual(remaining.pk, pending.pk)
+        self.assertEqual(remaining.properties, {"first_name": "Mail", "last_name": "Jet"})
+
+    def test_update_to_an_existing_row_schedules_a_flush(self, mock_flush):
+        """A row left over from a flush gets a new flush when it's updated again"""
+        queue_contact_update("mailjet@example.com", {"first_name": "Mail"})
+        flush_contact_updates(self.mailjet)
+        MailjetContactUpdate.objects.create(email="mailjet@example.com")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            queue_contact_update("mailjet@example.com", {"last_name": "Jet"})
+            queue_contact_update("mailjet@example.com", {"apps": True})
+
+        mock_flush.apply_async.assert_called_once()
+
+
+class ConnectedRolePlanTestCase(SimpleTestCase):
+    ROLE = 99
+
+    def test_only_mismatched_members_change(self):
+        member_roles = {
+            1: {self.ROLE},  # linked, has role
+            2: set(),  # linked, missing role
+            3: {self.ROLE, 5},  # not linked, has role
+            4: {5},  # not linked, no role
+        }
+        to_add, to_remove = plan_connected_role_changes(member_roles, {1, 2, 6}, self.ROLE)
+        self.assertEqual(to_add, [2])
+        self.assertEqual(to_remove, [3])
+
+    def test_linked_accounts_outside_guild_are_skipped(self):
+        to_add, to_remove = plan_connected_role_changes({}, {1, 2}, self.ROLE)
+        self.assertEqual((to_add, to_remove), ([], []))
+
+    def test_no_linked_accounts_is_refused(self):
+        member_roles = {uid: {self.ROLE} for uid in range(1, 21)}
+        with self.assertRaises(UnsafeRoleChange):
+            plan_connected_role_changes(member_roles, set(), self.ROLE)
+
+        to_add, to_remove = plan_connected_role_changes(member_roles, set(), self.ROLE, force=True)
+        self.assertEqual(len(to_remove), 20)
+
+    def test_mass_removal_is_refused(self):
+        member_roles = {uid: {self.ROLE} for uid in range(1, 21)}
+        # 2 of 20 holders is within MAX_REMOVAL_SHARE
+        _, to_remove = plan_connected_role_changes(member_roles, set(range(1, 19)), self.ROLE)
+        self.assertEqual(to_remove, [19, 20])
+
+        with self.assertRaises(UnsafeRoleChange):
+            plan_connected_role_changes(member_roles, set(range(1, 18)), self.ROLE)
+
+    def test_nothing_to_remove_is_never_refused(self):
+        to_add, to_remove = plan_connected_role_changes({1: set()}, set(), self.ROLE)
+        self.assertEqual((to_add, to_remove), ([], []))
+
+
+class DiscordActivityBufferTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="chatty", email="chatty@example.com")
+        self.profile = Profile.objects.create(user=self.user)
+        SocialAccount.objects.create(user=self.user, provider="discord", uid="1234")
+        self.buffer = DiscordActivityBuffer()
+        self.today = timezone.now().date()
+
+    def test_flush_adds_to_existing_counts(self):
+        DiscordActivity.objects.create(profile=self.profile, date=self.today, count=5)
+        self.buffer.record(1234, self.today)
+        self.buffer.record("1234", self.today)
+        self.buffer.record(9999, self.today)  # not linked, ignored
+
+        self.assertEqual(self.buffer.write(self.buffer.counts), 1)
+        self.assertEqual(DiscordActivity.objects.get(profile=self.profile).count, 7)
+
+    def test_newly_linked_account_is_picked_up(self):
+        self.buffer.record(5678, self.today)
+        self.assertEqual(self.buffer.write(self.buffer.counts), 0)
+
+        other = User.objects.create_user(username="newcomer", email="newcomer@example.com")
+        other_profile = Profile.objects.create(user=other)
+        SocialAccount.objects.create(user=other, provider="discord", uid="5678")
+
+        self.assertEqual(self.buffer.write(self.buffer.counts), 1)
+        self.assertEqual(DiscordActivity.objects.get(profile=other_profile).count, 1)
+
+
+class FakeDiscordClient:
+    def __init__(self):
+        self.logins = 0
+
+    async def login(self, token):
+        self.logins += 1
+
+
+class DiscordRESTTestCase(SimpleTestCase):
+    def setUp(self):
+        self.client_ = FakeDiscordClient()
+        self.rest = DiscordREST(self.client_, timeout=1)
+
+    def tearDown(self):
+        if self.rest._loop is not None:
+            self.rest._loop.call_soon_threadsafe(self.rest._loop.stop)
+
+    async def _loop_thread(self):
+        return threading.current_thread().name
+
+    def test_runs_on_one_loop_and_logs_in_once(self):
+        self.assertEqual(self.rest.run(self._loop_thread()), "discord-rest")
+        loop = self.rest._loop
+        self.assertEqual(self.rest.run(self._loop_thread()), "discord-rest")
+
+        self.assertIs(self.rest._loop, loop)
+        self.assertEqual(self.client_.logins, 1)
+
+    def test_forked_process_gets_a_new_loop(self):
+        self.rest.run(self._loop_thread())
+        parent_loop = self.rest._loop
+        self.rest._cache[("guild", 1)] = (float("inf"), object())
+
+        with patch("pba_discord.rest.os.getpid", return_value=-1):
+            self.rest.run(self._loop_thread())
+
+        self.assertIsNot(self.rest._loop, parent_loop)
+        self.assertEqual(self.client_.logins, 2)
+        self.assertEqual(self.rest._cache, {})
+        parent_loop.call_soon_threadsafe(parent_loop.stop)
+
+    def test_timeout_cancels_the_coroutine(self):
+        cancelled = threading.Event()
+
+        async def hang():
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with self.assertRaises(TimeoutError):
+            self.rest.run(hang())
+        self.assertTrue(cancelled.wait(1))
+
+    def test_timeout_can_be_set_per_call(self):
+        async def slow():
+            await asyncio.sleep(1.5)
+            return "done"
+
+        self.assertEqual(self.rest.run(slow(), timeout=None), "done")
+        with self.assertRaises(TimeoutError):
+            self.rest.run(asyncio.sleep(1), timeout=0.1)
+
+    @patch("pba_discord.rest.close_old_connections")
+    def test_closes_old_connections_around_each_run(self, close_old_connections):
+        async def fail():
+            raise ValueError
+
+        self.rest.run(self._loop_thread())
+        self.assertEqual(close_old_connections.call_count, 2)
+
+        with self.assertRaises(ValueError):
+            self.rest.run(fail())
+        self.assertEqual(close_old_connections.call_count, 4)
@@ -11,6 +11,7 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.generic import CreateView, DeleteView, DetailView, UpdateView
 from djstripe.models import Customer, Price
 
+from membership.stripe_sync import request_customer_sync
 from organizers.models import OrganizerApplication
 from pbaabp.integrations.mailjet import Mailjet
 from profiles.forms import ProfileUpdateForm
@@ -123,8 +124,7 @@ class ProfileDetailView(LoginRequiredMixin, DetailView):
 
         for election in voting_open_elections:
             # Check if user was eligible as of membership deadline
-            eligible_voters = election.get_eligible_voters()
-            if self.request.user.profile in eligible_voters:
+            if election.is_eligible_voter(self.request.user):
                 context["voting_open_election"] = election
                 # Check if user has already voted
                 context["user_ballot"] = Ballot.objects.filter(
@@ -148,14 +148,10 @@ class ProfileDonationsPartial(LoginRequiredMixin, DetailView):
     template_name = "profiles/_donations_partial.html"
 
     def get_object(self, queryset=None):
-        try:
-            customer = Customer.objects.filter(subscriber=self.request.user).first()
-            if customer:
-                customer.api_retrieve()
-                customer._sync_subscriptions()
-                customer._sync_charges()
-        except Exception:
-            pass
+        # Render from local data; a background task refreshes it from Stripe
+        customer = Customer.objects.filter(subscriber=self.request.user).first()
+        if customer:
+            request_customer_sync(customer)
         return self.request.user.profile
 
 
@@ -1,10 +1,10 @@
-from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.sync import sync_to_async
 from celery import shared_task
 from django.conf import settings
 from django.urls import reverse
 from interactions.models.discord.enums import AutoArchiveDuration
 
-from pba_discord.bot import bot
+from pba_discord.rest import discord_rest
 from projects.models import ProjectApplication
 
 
@@ -13,10 +13,11 @@ async def _add_new_project_message_and_thread(project_application_id):
     if application is None or application.draft or application.thread_id:
         return
 
-    await bot.login(settings.DISCORD_BOT_TOKEN)
-    guild = await bot.fetch_guild(settings.NEW_PROJECT_REVIEW_DISCORD_GUILD_ID)
-    channel = await guild.fetch_channel(settings.NEW_PROJECT_REVIEW_DISCORD_CHANNEL_ID)
-    mention_role = await guild.fetch_role(settings.NEW_PROJECT_REVIEW_DISCORD_ROLE_MENTION_ID)
+    guild = await discord_rest.guild(settings.NEW_PROJECT_REVIEW_DISCORD_GUILD_ID)
+    channel = await discord_rest.channel(settings.NEW_PROJECT_REVIEW_DISCORD_CHANNEL_ID)
+    mention_role = await discord_rest.role(
+        guild, settings.NEW_PROJECT_REVIEW_DISCORD_ROLE_MENTION_ID
+    )
     submitter = await sync_to_async(lambda: application.submitter)()
     profile = await sync_to_async(lambda: submitter.profile)()
     discord = await sync_to_async(lambda: profile.discord)()
@@ -61,11 +62,12 @@ async def _add_new_project_voting_message_and_thread(project_application_id):
     if application is None or application.approved or application.voting_thread_id:
         return
 
-    await bot.login(settings.DISCORD_BOT_TOKEN)
-    guild = await bot.fetch_guild(settings.NEW_PROJECT_REVIEW_DISCORD_GUILD_ID)
+    guild = await discord_rest.guild(settings.NEW_PROJECT_REVIEW_DISCORD_GUILD_ID)
     discussion_thread = await guild.fetch_channel(application.thread_id)
-    channel = await guild.fetch_channel(settings.NEW_PROJECT_REVIEW_DISCORD_VOTE_CHANNEL_ID)
-    mention_role = await guild.fetch_role(settings.NEW_PROJECT_REVIEW_DISCORD_ROLE_VOTE_MENTION_ID)
+    channel = await discord_rest.channel(settings.NEW_PROJECT_REVIEW_DISCORD_VOTE_CHANNEL_ID)
+    mention_role = await discord_rest.role(
+        guild, settings.NEW_PROJECT_REVIEW_DISCORD_ROLE_VOTE_MENTION_ID
+    )
     submitter = await sync_to_async(lambda: application.submitter)()
     profile = await sync_to_async(lambda: submitter.profile)()
     discord = await sync_to_async(lambda: profile.discord)()
@@ -102,8 +104,7 @@ async def _approve_new_project(
 ):
     application = await ProjectApplication.objects.filter(id=project_application_id).afirst()
 
-    await bot.login(settings.DISCORD_BOT_TOKEN)
-    guild = await bot.fetch_guild(settings.NEW_PROJECT_REVIEW_DISCORD_GUILD_ID)
+    guild = await discord_rest.guild(settings.NEW_PROJECT_REVIEW_DISCORD_GUILD_ID)
     discussion_thread = await guild.fetch_channel(application.thread_id)
     voting_thread = await guild.fetch_channel(application.voting_thread_id)
     messages = await voting_thread.history(limit=0).flatten()
@@ -145,7 +146,7 @@ async def _approve_new_project(
         mentor = await guild.fetch_member(project_mentor_id)
         actions.append(f"Assigned Mentor {mentor.mention}")
 
-    role = await guild.fetch_role(settings.ACTIVE_PROJECT_LEAD_ROLE_ID)
+    role = await discord_rest.role(guild, settings.ACTIVE_PROJECT_LEAD_ROLE_ID)
     project_lead = await guild.fetch_member(project_lead_id)
     application.project_lead_id = project_lead.id
     await project_lead.add_role(role)
@@ -181,13 +182,14 @@ async def _approve_new_project(
 async def _archive_project(project_application_id):
     application = await ProjectApplication.objects.filter(id=project_application_id).afirst()
 
-    await bot.login(settings.DISCORD_BOT_TOKEN)
-    guild = await bot.fetch_guild(settings.NEW_PROJECT_REVIEW_DISCORD_GUILD_ID)
+    guild = await discord_rest.guild(settings.NEW_PROJECT_REVIEW_DISCORD_GUILD_ID)
 
     channel = None
     if application.channel_id:
         channel = await guild.fetch_channel(application.channel_id)
-        mention_role = await guild.fetch_role(settings.NEW_PROJECT_REVIEW_DISCORD_ROLE_MENTION_ID)
+        mention_role = await discord_rest.role(
+            guild, settings.NEW_PROJECT_REVIEW_DISCORD_ROLE_MENTION_ID
+        )
         await channel.send(
             f"This project has been marked complete by {application.archived_by}, "
             "and archived.\n\n"
@@ -195,7 +197,7 @@ async def _archive_project(project_application_id):
             f"https://discord.com/channels/{guild.id}/{settings.PROJECT_LOG_CHANNEL_ID}, "
             "leave a :white_check_mark: when complete."
         )
-        await bot.http.move_channel(
+        await discord_rest.client.http.move_channel(
             guild_id=guild.id,
             channel_id=channel.id,
             new_pos=0,
@@ -207,12 +209,12 @@ async def _archive_project(project_application_id):
 
 @shared_task
 def add_new_project_message_and_thread(project_application_id):
-    async_to_sync(_add_new_project_message_and_thread)(project_application_id)
+    discord_rest.run(_add_new_project_message_and_thread(project_application_id))
 
 
 @shared_task
 def add_new_project_voting_message_and_thread(project_application_id):
-    async_to_sync(_add_new_project_voting_message_and_thread)(project_application_id)
+    discord_rest.run(_add_new_project_voting_message_and_thread(project_application_id))
 
 
 @shared_task
@@ -222,14 +224,16 @@ def approve_new_project(
     project_mentor_id,
     project_lead_id,
 ):
-    async_to_sync(_approve_new_project)(
-        project_application_id,
-        project_channel_name,
-        project_mentor_id,
-        project_lead_id,
+    discord_rest.run(
+        _approve_new_project(
+            project_application_id,
+            project_channel_name,
+            project_mentor_id,
+            project_lead_id,
+        )
     )
 
 
 @shared_task
 def archive_project(project_application_id):
-    async_to_sync(_archive_project)(project_application_id)
+    discord_rest.run(_archive_project(project_application_id))
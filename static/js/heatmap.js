@@ -0,0 +1,14 @@
+// Decodes heatmap data from facets.heatmap.encode_heatmap into the
+// [lat, lng, weight] points taken by L.heatLayer
+function decodeHeatmap(data) {
+  const floats = (encoded) =>
+    new Float32Array(Uint8Array.from(atob(encoded), (c) => c.charCodeAt(0)).buffer);
+  const lat = floats(data.lat);
+  const lng = floats(data.lng);
+  const weight = floats(data.weight);
+  const points = new Array(data.count);
+  for (let i = 0; i < data.count; i++) {
+    points[i] = [lat[i], lng[i], weight[i]];
+  }
+  return points;
+}